@@ -0,0 +1,94 @@
+import uuid
+from django.contrib.auth.models import Group, Permission, User
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.db import transaction as db_transaction
+from django.db.models.signals import m2m_changed, post_save, post_delete
+
+ACCESS_VERSION_KEY = 'access_version'
+ACCESS_CACHE_TIMEOUT = 60 * 60
+
+
+class UserAccess:
+    """
+    Group names and permissions of one user, loaded once and cached per user.
+
+    The cache key carries a global version stamp that is bumped whenever group
+    membership, group permissions or user permissions change, so a stale entry
+    is never read after a change.
+    """
+
+    def __init__(self, groups, permissions):
+        self.groups = frozenset(groups)
+        self.permissions = frozenset(permissions)
+        self._groups_lower = [name.lower() for name in self.groups]
+
+    def in_group(self, name):
+        """Same match as `user.groups.filter(name__icontains=name).exists()`"""
+        name = name.lower()
+        return any(name in group for group in self._groups_lower)
+
+    @staticmethod
+    def version():
+        version = cache.get(ACCESS_VERSION_KEY)
+        if version is None:
+            version = uuid.uuid4().hex
+            if not cache.add(ACCESS_VERSION_KEY, version, None):
+                version = cache.get(ACCESS_VERSION_KEY, version)
+        return version
+
+    @staticmethod
+    def invalidate(**kwargs):
+        """Signal handler - publish a new version so every cached entry is dropped"""
+        db_transaction.on_commit(lambda: cache.set(ACCESS_VERSION_KEY, uuid.uuid4().hex, None))
+
+    @classmethod
+    def for_user(cls, user):
+        if not user.is_authenticated:
+            return cls([], [])
+
+        # Flags live on the user row, which is loaded anyway, so they key the entry
+        cache_key = f'user_access:{cls.version()}:{user.pk}:{int(user.is_active)}{int(user.is_superuser)}'
+        cached = cache.get(cache_key)
+        if cached is None:
+            groups = list(user.groups.values_list('name', flat=True))
+            # Same set the ModelBackend builds: user and group permissions
+            user.__dict__.pop('_perm_cache', None)
+            permissions = list(user.get_all_permissions()) if user.is_active else []
+            cached = {'groups': groups, 'permissions': permissions}
+            cache.set(cache_key, cached, ACCESS_CACHE_TIMEOUT)
+        return cls(cached['groups'], cached['permissions'])
+
+
+def get_user_access(request):
+    """Per-request access info; set by AccessMiddleware, loaded on demand otherwise"""
+    access = getattr(request, 'access', None)
+    if access is None:
+        access = request.access = UserAccess.for_user(request.user)
+    return access
+
+
+def has_group(request, name):
+    return get_user_access(request).in_group(name)
+
+
+class GroupRequiredMixin:
+    """
+    Deny access unless the user belongs to a group matching `group_required`.
+    Uses the cached access info, so the check costs no query on a cache hit.
+    """
+    group_required = ''
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.group_required and not has_group(request, self.group_required):
+            raise PermissionDenied
+        return super().dispatch(request, *args, **kwargs)
+
+
+# Membership and permission changes invalidate every cached entry
+m2m_changed.connect(UserAccess.invalidate, sender=User.groups.through, dispatch_uid='access_user_groups')
+m2m_changed.connect(UserAccess.invalidate, sender=User.user_permissions.through, dispatch_uid='access_user_permissions')
+m2m_changed.connect(UserAccess.invalidate, sender=Group.permissions.through, dispatch_uid='access_group_permissions')
+post_save.connect(UserAccess.invalidate, sender=Group, dispatch_uid='access_group_save')
+post_delete.connect(UserAccess.invalidate, sender=Group, dispatch_uid='access_group_delete')
+post_delete.connect(UserAccess.invalidate, sender=Permission, dispatch_uid='access_permission_delete')
@@ -1,6 +1,5 @@
 from django.apps import AppConfig
-import os
-from pathlib import Path
+from django.db.models.signals import post_migrate
 
 
 class CoreConfig(AppConfig):
@@ -8,33 +7,10 @@ class CoreConfig(AppConfig):
     name = 'engine'
 
     def ready(self):
-        from django.contrib.auth.models import Group, Permission
-        from django.contrib.contenttypes.models import ContentType
-        from .models import Module
+        # Connect the signals that invalidate cached user access
+        from . import access  # noqa: F401
+        from .permissions import sync_permissions_after_migrate
 
-        # Get content type for Module
-        content_type = ContentType.objects.get_for_model(Module)
-
-        # Scan modules directory
-        BASE_DIR = Path(__file__).resolve().parent.parent
-        modules_dir = BASE_DIR / 'modules'
-        if modules_dir.exists():
-            for module_name in os.listdir(modules_dir):
-                module_path = modules_dir / module_name
-                if os.path.isdir(module_path) and os.path.exists(module_path / '__init__.py'):
-                    # Create permission for accessing the module
-                    perm_codename = f'access_{module_name}'
-                    perm_name = f'Can access {module_name} module'
-                    permission, created = Permission.objects.get_or_create(
-                        codename=perm_codename,
-                        name=perm_name,
-                        content_type=content_type,
-                    )
-                    
-                    # Add grouping
-                    access_group, _ = Group.objects.get_or_create(name=f'group_access_{module_name}')
-                    access_group.permissions.add(permission.id)
-                    access_group.save()
-                    
-                    if created:
-                        print(f'Created permission: {perm_codename}')
+        # Permissions and groups are synced after migrate (or with
+        # `manage.py sync_permissions`), not in every process at startup
+        post_migrate.connect(sync_permissions_after_migrate, sender=self, dispatch_uid='engine_sync_permissions')
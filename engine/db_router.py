@@ -0,0 +1,90 @@
+from contextlib import ContextDecorator
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_ALIAS = 'replica'
+
+
+class RoutingState:
+    """Per-request routing flags, shared by reference with sync_to_async threads"""
+
+    def __init__(self):
+        self.replica_depth = 0
+        self.pinned = False
+
+
+_routing_state = ContextVar('db_routing_state', default=None)
+
+
+def begin_request():
+    """Fresh routing state for a request; returns the token for end_request"""
+    return _routing_state.set(RoutingState())
+
+
+def end_request(token):
+    _routing_state.reset(token)
+
+
+class use_replica(ContextDecorator):
+    """
+    Route reads inside the block (or decorated function) to the replica.
+
+    Only for read-only reporting: charts, totals, summaries, aging. Not for
+    actions that write, nor for results cached under a version stamp, since
+    a lagging replica would cache pre-write data under the new stamp. Reads
+    stay on the primary when no replica is configured, inside a transaction,
+    or once the current request has written anything.
+    """
+
+    def _recreate_cm(self):
+        # A fresh instance per call, the decorator is shared between threads
+        return type(self)()
+
+    def __enter__(self):
+        self._token = None
+        self._state = _routing_state.get()
+        if self._state is None:
+            # Outside a request (management commands, shell)
+            self._state = RoutingState()
+            self._token = _routing_state.set(self._state)
+        self._state.replica_depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._state.replica_depth -= 1
+        if self._token is not None:
+            _routing_state.reset(self._token)
+        return False
+
+
+class ReplicaRouter:
+    """
+    Writes go to the primary. Reads go to the replica only inside use_replica
+    blocks, and the request is pinned to the primary after its first write so
+    it always reads its own writes.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _routing_state.get()
+        if state is None or not state.replica_depth or state.pinned:
+            return None
+        if REPLICA_ALIAS not in settings.DATABASES:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return REPLICA_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _routing_state.get()
+        if state is not None:
+            state.pinned = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primary and replica hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica follows the primary through replication
+        return db != REPLICA_ALIAS
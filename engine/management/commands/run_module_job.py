@@ -0,0 +1,38 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from engine.models import ModuleJob
+from modules.updater import ModuleUpdater
+
+
+class Command(BaseCommand):
+    help = 'Run module install/upgrade jobs (migrations) outside the web workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('job_id', nargs='?', type=int, help='Job to run')
+        parser.add_argument('--pending', action='store_true', help='Run every queued job')
+        parser.add_argument('--loop', action='store_true', help='With --pending, keep polling for new jobs')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds between polls with --loop')
+
+    def run(self, job_id):
+        job = ModuleUpdater.run_job(job_id)
+        if job is None:
+            self.stdout.write(f'Job #{job_id} is not queued, skipping')
+        elif job.status == 'succeeded':
+            self.stdout.write(self.style.SUCCESS(f'Job #{job.id}: {job.action} {job.module_name} succeeded'))
+        else:
+            self.stdout.write(self.style.ERROR(f'Job #{job.id}: {job.action} {job.module_name} failed: {job.error}'))
+
+    def handle(self, *args, **options):
+        if options['job_id'] is None and not options['pending']:
+            raise CommandError('Give a job id or --pending')
+
+        if options['job_id'] is not None:
+            self.run(options['job_id'])
+            return
+
+        while True:
+            for job_id in ModuleJob.objects.filter(status='queued').order_by('id').values_list('id', flat=True):
+                self.run(job_id)
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
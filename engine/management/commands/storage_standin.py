@@ -0,0 +1,106 @@
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+from django.core.management.base import BaseCommand
+
+PREFIX = '/storage/v1/object/'
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    """In-memory subset of the Supabase Storage API: upload, sign, download, remove"""
+    objects = {}
+    delay = 0.0
+    fail_rate = 0.0
+
+    def log_message(self, format, *args):
+        print(f'[storage-standin] {self.command} {self.path} - {format % args}')
+
+    def _reply(self, status, body=None, content_type='application/json'):
+        data = body if isinstance(body, bytes) else json.dumps(body or {}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self):
+        return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+    def _simulate(self):
+        """Injected latency and failures; returns True when the request was failed"""
+        if self.delay:
+            time.sleep(self.delay)
+        if self.fail_rate and random.random() < self.fail_rate:
+            self._body()
+            self._reply(503, {'message': 'stand-in injected failure'})
+            return True
+        return False
+
+    def _path(self):
+        path = unquote(urlsplit(self.path).path)
+        return path[len(PREFIX):] if path.startswith(PREFIX) else None
+
+    def do_POST(self):
+        if self._simulate():
+            return
+        path = self._path()
+        if path is None:
+            return self._reply(404, {'message': 'Not found'})
+
+        if path.startswith('sign/'):
+            key = path[len('sign/'):]
+            self._body()
+            if key not in self.objects:
+                return self._reply(400, {'message': 'Object not found'})
+            return self._reply(200, {'signedURL': f'/object/sign/{key}?token=standin'})
+
+        self.objects[path] = (self._body(), self.headers.get('Content-Type', 'application/octet-stream'))
+        return self._reply(200, {'Key': path})
+
+    def do_GET(self):
+        if self._simulate():
+            return
+        path = self._path()
+        key = path[len('sign/'):] if path and path.startswith('sign/') else path
+        if key not in self.objects:
+            return self._reply(404, {'message': 'Object not found'})
+        content, content_type = self.objects[key]
+        return self._reply(200, content, content_type)
+
+    def do_DELETE(self):
+        if self._simulate():
+            return
+        bucket = self._path()
+        try:
+            prefixes = json.loads(self._body() or b'{}').get('prefixes', [])
+        except ValueError:
+            return self._reply(400, {'message': 'Invalid JSON'})
+        removed = [name for name in prefixes if self.objects.pop(f'{bucket}/{name}', None) is not None]
+        return self._reply(200, [{'name': name} for name in removed])
+
+
+class Command(BaseCommand):
+    help = 'Serve a local in-memory stand-in for Supabase Storage (set SUPABASE_URL to its address)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bind', default='127.0.0.1', help='Address to listen on')
+        parser.add_argument('--port', type=int, default=54321, help='Port to listen on')
+        parser.add_argument('--delay', type=float, default=0.0, help='Seconds of latency added to every request')
+        parser.add_argument('--fail-rate', type=float, default=0.0, help='Fraction of requests answered with 503')
+
+    def handle(self, *args, **options):
+        StandinHandler.delay = options['delay']
+        StandinHandler.fail_rate = options['fail_rate']
+        server = ThreadingHTTPServer((options['bind'], options['port']), StandinHandler)
+        self.stdout.write(self.style.SUCCESS(
+            f"Storage stand-in on http://{options['bind']}:{options['port']} "
+            f"(delay={options['delay']}s, fail-rate={options['fail_rate']})"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
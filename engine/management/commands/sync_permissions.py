@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from engine.permissions import PermissionBootstrap
+
+
+class Command(BaseCommand):
+    help = 'Create module access permissions, groups and group permissions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Sync even when the fingerprint is unchanged')
+        parser.add_argument('--database', default='default', help='Database alias to sync')
+
+    def handle(self, *args, **options):
+        result = PermissionBootstrap.sync(force=options['force'], verbosity=options['verbosity'], using=options['database'])
+        if result is None:
+            self.stdout.write(self.style.SUCCESS('Permissions already up to date'))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Created {result['permissions']} permissions, {result['groups']} groups, "
+                f"{result['group_permissions']} group permissions"
+            ))
@@ -0,0 +1,64 @@
+from .access import UserAccess
+from .db_router import begin_request, end_request
+from .registry import module_registry
+
+
+class AccessMiddleware:
+    """
+    Load the user's group names and permissions once per request from the
+    shared cache. Must come after AuthenticationMiddleware.
+
+    The permission set is also handed to the auth backend's per-user cache, so
+    `has_perm`/`PermissionRequiredMixin` checks run without queries as well.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        user = request.user
+        if user.is_authenticated:
+            request.access = UserAccess.for_user(user)
+            user._perm_cache = set(request.access.permissions)
+        else:
+            request.access = UserAccess([], [])
+        return self.get_response(request)
+
+
+class ModuleStateMiddleware:
+    """
+    Pick up module installs, uninstalls and upgrades done by other workers.
+    The Module table is read at most once per MODULE_STATE_CHECK_INTERVAL
+    seconds per process; changed modules are reloaded before the request is
+    resolved.
+
+    The module registry is refreshed here too, so URL resolution (which runs
+    in the event loop under ASGI) never has to query the database.
+    """
+
+    def __init__(self, get_response):
+        from modules.updater import ModuleStateWatcher
+        self.watcher = ModuleStateWatcher
+        self.get_response = get_response
+
+    def __call__(self, request):
+        self.watcher.check()
+        module_registry.all()
+        return self.get_response(request)
+
+
+class DatabaseRoutingMiddleware:
+    """
+    Give each request its own read-routing state, so pinning to the primary
+    after a write lasts for that request only.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = begin_request()
+        try:
+            return self.get_response(request)
+        finally:
+            end_request(token)
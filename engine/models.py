@@ -1,8 +1,11 @@
 from django.db import models
+from django.utils import timezone
 
 class Module(models.Model):
     name = models.CharField(max_length=100, unique=True)
     is_installed = models.BooleanField(default=False)
+    # Bumped on install/uninstall/upgrade; workers reload modules whose version moved
+    state_version = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return self.name
@@ -12,4 +15,45 @@ class MasterDatabase(models.Model):
     description = models.TextField(blank=True)
 
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+
+class ModuleJob(models.Model):
+    """Install/upgrade of a module, run in a separate process by `run_module_job`"""
+    ACTION_CHOICES = [
+        ('install', 'Install'),
+        ('upgrade', 'Upgrade'),
+    ]
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+    ACTIVE_STATUSES = ('queued', 'running')
+
+    module_name = models.CharField(max_length=100)
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    step = models.CharField(max_length=50, blank=True)
+    log = models.TextField(blank=True)
+    error = models.TextField(blank=True)
+    requested_by = models.CharField(max_length=150, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Stamped by the runner while it works, see ModuleUpdater.fail_stale_jobs
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['module_name', 'status'], name='engine_modjob_module_idx'),
+            models.Index(fields=['status', 'id'], name='engine_modjob_status_idx'),
+        ]
+
+    @property
+    def is_active(self):
+        return self.status in self.ACTIVE_STATUSES
+
+    def __str__(self):
+        return f"{self.action} {self.module_name} #{self.id} ({self.status})"
@@ -0,0 +1,157 @@
+import hashlib
+import json
+from django.apps import apps
+from django.core.cache import cache
+from django.db import transaction as db_transaction
+
+PERMISSIONS_FINGERPRINT_KEY = 'permission_bootstrap_fingerprint'
+MODULE_ACTIONS = ('view', 'add', 'change', 'delete')
+
+
+class PermissionBootstrap:
+    """
+    Creates the module access permissions and the groups that hold them.
+
+    Runs after `migrate` and from `manage.py sync_permissions` instead of in
+    every process at startup. Module apps declare what they need on their
+    AppConfig:
+
+        permission_model = 'Product'
+        group_permissions = {'manager': ['view', 'add', 'change', 'delete'], ...}
+
+    The sync is idempotent and only ever adds rows. A fingerprint of the spec
+    is kept in the cache so an unchanged spec costs a single query.
+    """
+
+    @staticmethod
+    def build_spec():
+        """
+        Return {'permissions': [(app_label, model, codename, name)],
+                'groups': {group_name: [(app_label, codename)]}}
+        """
+        from .registry import module_registry
+
+        permissions = []
+        groups = {}
+
+        # engine.access_<module> for every module directory, one group each
+        for module_name in module_registry.module_names():
+            codename = f'access_{module_name}'
+            permissions.append(('engine', 'module', codename, f'Can access {module_name} module'))
+            groups[f'group_access_{module_name}'] = [('engine', codename)]
+
+        for config in apps.get_app_configs():
+            model_name = getattr(config, 'permission_model', None)
+            group_permissions = getattr(config, 'group_permissions', None)
+            if not model_name or not group_permissions:
+                continue
+            model = config.get_model(model_name)
+            opts = model._meta
+            for action in MODULE_ACTIONS:
+                codename = f'{action}_{opts.model_name}'
+                permissions.append((opts.app_label, opts.model_name, codename, f'Can {action} {opts.verbose_name}'))
+            for group_name, actions in group_permissions.items():
+                groups.setdefault(group_name, []).extend(
+                    (opts.app_label, f'{action}_{opts.model_name}') for action in actions
+                )
+
+        return {'permissions': sorted(permissions), 'groups': {k: sorted(v) for k, v in sorted(groups.items())}}
+
+    @staticmethod
+    def fingerprint(spec):
+        return hashlib.sha1(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+    @staticmethod
+    def sync(force=False, verbosity=1, using='default'):
+        """
+        Create missing permissions, groups and group permissions in bulk.
+        Returns a dict with the number of rows created, or None when skipped.
+        """
+        from django.contrib.auth.models import Group, Permission
+        from django.contrib.contenttypes.models import ContentType
+        from .access import UserAccess
+
+        spec = PermissionBootstrap.build_spec()
+        fingerprint = PermissionBootstrap.fingerprint(spec)
+        group_names = list(spec['groups'])
+
+        # The cache may outlive the database, so also check the groups exist
+        if not force and cache.get(PERMISSIONS_FINGERPRINT_KEY) == fingerprint:
+            if Group.objects.using(using).filter(name__in=group_names).count() == len(group_names):
+                if verbosity >= 2:
+                    print('Permissions up to date, skipping bootstrap')
+                return None
+
+        with db_transaction.atomic(using=using):
+            # Content types, one query for every model involved
+            models = {
+                (app_label, model): apps.get_model(app_label, model)
+                for app_label, model, _, _ in spec['permissions']
+            }
+            content_types = ContentType.objects.db_manager(using).get_for_models(*models.values(), for_concrete_models=False)
+            ct_by_key = {key: content_types[model] for key, model in models.items()}
+
+            # Permissions
+            wanted = {
+                (ct_by_key[(app_label, model)].id, codename): name
+                for app_label, model, codename, name in spec['permissions']
+            }
+            existing = set(
+                Permission.objects.using(using)
+                .filter(content_type__in=[ct.id for ct in ct_by_key.values()], codename__in=[c for _, c in wanted])
+                .values_list('content_type_id', 'codename')
+            )
+            new_permissions = [
+                Permission(content_type_id=ct_id, codename=codename, name=name)
+                for (ct_id, codename), name in wanted.items()
+                if (ct_id, codename) not in existing
+            ]
+            Permission.objects.using(using).bulk_create(new_permissions, ignore_conflicts=True)
+
+            perm_ids = {
+                (app_label, codename): perm_id
+                for perm_id, app_label, codename in Permission.objects.using(using)
+                .filter(content_type__in=[ct.id for ct in ct_by_key.values()], codename__in=[c for _, c in wanted])
+                .values_list('id', 'content_type__app_label', 'codename')
+            }
+
+            # Groups
+            existing_groups = set(Group.objects.using(using).filter(name__in=group_names).values_list('name', flat=True))
+            new_groups = [Group(name=name) for name in group_names if name not in existing_groups]
+            Group.objects.using(using).bulk_create(new_groups, ignore_conflicts=True)
+            group_ids = dict(Group.objects.using(using).filter(name__in=group_names).values_list('name', 'id'))
+
+            # Group permissions, added but never removed
+            Through = Group.permissions.through
+            existing_links = set(
+                Through.objects.using(using)
+                .filter(group_id__in=group_ids.values())
+                .values_list('group_id', 'permission_id')
+            )
+            new_links = []
+            for group_name, keys in spec['groups'].items():
+                for key in keys:
+                    link = (group_ids[group_name], perm_ids.get(key))
+                    if link[1] is not None and link not in existing_links:
+                        existing_links.add(link)
+                        new_links.append(Through(group_id=link[0], permission_id=link[1]))
+            Through.objects.using(using).bulk_create(new_links, ignore_conflicts=True)
+
+            if new_links:
+                # bulk_create skips m2m_changed, so drop cached user access here
+                UserAccess.invalidate()
+
+            db_transaction.on_commit(lambda: cache.set(PERMISSIONS_FINGERPRINT_KEY, fingerprint, None), using=using)
+
+        created = {'permissions': len(new_permissions), 'groups': len(new_groups), 'group_permissions': len(new_links)}
+        if verbosity >= 1 and any(created.values()):
+            for permission in new_permissions:
+                print(f'Created permission: {permission.codename}')
+            print(f"Permission bootstrap: {created['permissions']} permissions, {created['groups']} groups, "
+                  f"{created['group_permissions']} group permissions created")
+        return created
+
+
+def sync_permissions_after_migrate(sender, using='default', verbosity=1, plan=None, **kwargs):
+    """post_migrate receiver, connected once for the engine app"""
+    PermissionBootstrap.sync(verbosity=verbosity, using=using)
@@ -0,0 +1,321 @@
+import asyncio
+import copy
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from django.core.cache import cache
+from django.db import transaction as db_transaction
+from django.db.models.signals import post_save, post_delete
+
+
+class MasterDataRegistry:
+    """
+    Process-local registry for small master-data tables (statuses, terms, ...).
+
+    Rows are loaded once and served from memory by name or id. Every save/delete
+    on the model bumps a version stamp in the shared cache; other processes see
+    the new stamp on their next check and reload the table.
+
+    Lookups return copies, so a caller changing a row cannot alter the cached one.
+    """
+
+    def __init__(self, model, key_field='name', check_interval=1.0):
+        self.model = model
+        self.key_field = key_field
+        self.check_interval = check_interval
+        self.version_key = f'master_data_version:{model._meta.label_lower}'
+        self._lock = threading.Lock()
+        self._by_key = {}
+        self._by_id = {}
+        self._version = None
+        self._loaded = False
+        self._checked_at = 0.0
+
+        post_save.connect(self._invalidate, sender=model, weak=False, dispatch_uid=self.version_key)
+        post_delete.connect(self._invalidate, sender=model, weak=False, dispatch_uid=self.version_key)
+
+    def _invalidate(self, **kwargs):
+        """
+        Signal handler - publish a new version so every process reloads.
+
+        The stamp moves only after the writer commits; bumped earlier, other
+        processes could reload the old rows and keep them under the new stamp.
+        """
+        db_transaction.on_commit(self._publish, using=kwargs.get('using'))
+
+    def _publish(self):
+        cache.set(self.version_key, uuid.uuid4().hex, None)
+        self._loaded = False
+
+    def _current_version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            # Stamp was never written or the cache was cleared
+            version = uuid.uuid4().hex
+            if not cache.add(self.version_key, version, None):
+                version = cache.get(self.version_key, version)
+        return version
+
+    def _ensure_loaded(self):
+        now = time.monotonic()
+        if self._loaded and now - self._checked_at < self.check_interval:
+            return
+
+        with self._lock:
+            version = self._current_version()
+            self._checked_at = now
+            if self._loaded and version == self._version:
+                return
+
+            rows = list(self.model.objects.all().order_by('id'))
+            self._by_key = {getattr(row, self.key_field): row for row in rows}
+            self._by_id = {row.id: row for row in rows}
+            self._version = version
+            self._loaded = True
+
+    @property
+    def version(self):
+        self._ensure_loaded()
+        return self._version
+
+    def all(self):
+        """Return every row ordered by id"""
+        self._ensure_loaded()
+        return [copy.copy(row) for row in self._by_id.values()]
+
+    def get(self, name=None, id=None):
+        """
+        Lookup a row by name or id.
+
+        Raises model.DoesNotExist like `objects.get` so callers keep their
+        existing error handling.
+        """
+        self._ensure_loaded()
+        if id is not None:
+            try:
+                row = self._by_id.get(int(id))
+            except (TypeError, ValueError):
+                row = None
+        else:
+            row = self._by_key.get(name)
+
+        if row is None:
+            raise self.model.DoesNotExist(
+                f'{self.model.__name__} matching {id if id is not None else name!r} does not exist.'
+            )
+        return copy.copy(row)
+
+    def get_or_none(self, name=None, id=None):
+        try:
+            return self.get(name=name, id=id)
+        except self.model.DoesNotExist:
+            return None
+
+    def reload(self):
+        """Force a reload on the next lookup in this process"""
+        self._loaded = False
+
+
+class MasterDataMapping:
+    """
+    Pre-computed mapping between two registries that share the same names,
+    e.g. product payment statuses to their accounting equivalents.
+    """
+
+    def __init__(self, source, target):
+        self.source = source
+        self.target = target
+        self._lock = threading.Lock()
+        self._versions = None
+        self._map = {}
+
+    def _ensure_built(self):
+        versions = (self.source.version, self.target.version)
+        if versions == self._versions:
+            return
+
+        with self._lock:
+            self._map = {
+                row.id: self.target.get_or_none(name=getattr(row, self.source.key_field))
+                for row in self.source.all()
+            }
+            self._versions = versions
+
+    def get(self, row):
+        """
+        Return the target row mapped from a source row (instance, id or name).
+
+        Raises target.model.DoesNotExist when no equivalent exists.
+        """
+        if row is None:
+            raise self.target.model.DoesNotExist('Cannot map an empty value.')
+
+        self._ensure_built()
+        if isinstance(row, str):
+            row = self.source.get(name=row)
+        row_id = row if isinstance(row, int) else row.id
+
+        mapped = self._map.get(row_id)
+        if mapped is None:
+            raise self.target.model.DoesNotExist(
+                f'No {self.target.model.__name__} mapped from {self.source.model.__name__} {row_id}.'
+            )
+        return copy.copy(mapped)
+
+
+class ModuleInfo:
+    """Snapshot of one module directory and its installed state"""
+
+    def __init__(self, name, is_installed=False, title='', description=''):
+        self.name = name
+        self.is_installed = is_installed
+        self.title = title or name.replace('_', ' ').title()
+        self.description = description
+
+    @property
+    def access_permission(self):
+        return f'engine.access_{self.name}'
+
+    def __str__(self):
+        return self.name
+
+
+class ModuleRegistry:
+    """
+    Process-local list of the modules under `modules/` with their metadata and
+    installed state, so the module list page does not scan the directory or
+    touch the Module table on every view.
+
+    The list is rebuilt when the directory's mtime changes (a module was added
+    or removed) or when ModuleUpdater bumps the shared version stamp after an
+    install, uninstall or upgrade.
+    """
+
+    version_key = 'module_registry_version'
+
+    def __init__(self, modules_dir, check_interval=1.0):
+        self.modules_dir = modules_dir
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._modules = []
+        self._version = None
+        self._mtime = None
+        self._loaded = False
+        self._checked_at = 0.0
+
+    def _current_version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            version = uuid.uuid4().hex
+            if not cache.add(self.version_key, version, None):
+                version = cache.get(self.version_key, version)
+        return version
+
+    def _dir_mtime(self):
+        try:
+            return os.stat(self.modules_dir).st_mtime_ns
+        except OSError:
+            return None
+
+    @staticmethod
+    def _read_metadata(module_path):
+        """Title and summary from the module README (first heading and paragraph)"""
+        title, description = '', ''
+        try:
+            with open(module_path / 'README.md', encoding='utf-8') as readme:
+                for line in readme:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    if line.startswith('#'):
+                        if not title:
+                            title = line.lstrip('#').strip()
+                        continue
+                    description = line
+                    break
+        except OSError:
+            pass
+        return title, description
+
+    def _scan(self):
+        if not self.modules_dir.exists():
+            return []
+        return sorted(
+            name for name in os.listdir(self.modules_dir)
+            if (self.modules_dir / name).is_dir() and (self.modules_dir / name / '__init__.py').exists()
+        )
+
+    def _build(self):
+        from .models import Module
+
+        names = self._scan()
+        installed = dict(Module.objects.filter(name__in=names).values_list('name', 'is_installed'))
+        missing = [name for name in names if name not in installed]
+        if missing:
+            # New module directories get their row once, not on every view
+            Module.objects.bulk_create([Module(name=name) for name in missing], ignore_conflicts=True)
+
+        modules = []
+        for name in names:
+            title, description = self._read_metadata(self.modules_dir / name)
+            modules.append(ModuleInfo(name, installed.get(name, False), title, description))
+        return modules
+
+    @staticmethod
+    def _in_event_loop():
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        return True
+
+    def _ensure_loaded(self):
+        now = time.monotonic()
+        if self._loaded and now - self._checked_at < self.check_interval:
+            return
+        if self._loaded and self._in_event_loop():
+            # URL resolution under ASGI: no queries from the loop, the snapshot
+            # was refreshed by ModuleStateMiddleware in its sync thread
+            return
+
+        with self._lock:
+            version = self._current_version()
+            mtime = self._dir_mtime()
+            self._checked_at = now
+            if self._loaded and version == self._version and mtime == self._mtime:
+                return
+
+            self._modules = self._build()
+            self._version = version
+            self._mtime = mtime
+            self._loaded = True
+
+    def module_names(self):
+        """Module directory names, read straight from disk"""
+        return self._scan()
+
+    def all(self):
+        """Every module ordered by name"""
+        self._ensure_loaded()
+        return list(self._modules)
+
+    def get(self, name):
+        self._ensure_loaded()
+        for module in self._modules:
+            if module.name == name:
+                return module
+        return None
+
+    def invalidate(self):
+        """Publish a new version so every process rebuilds on its next check"""
+        cache.set(self.version_key, uuid.uuid4().hex, None)
+        self._loaded = False
+
+    def reload(self):
+        """Force a rebuild on the next lookup in this process"""
+        self._loaded = False
+
+
+module_registry = ModuleRegistry(Path(__file__).resolve().parent.parent / 'modules')
@@ -0,0 +1,238 @@
+import asyncio
+import random
+import threading
+import time
+import weakref
+import httpx
+
+# Worth another attempt: timeouts, rate limiting and server-side failures
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+class StorageError(Exception):
+    """A storage request failed; status_code is None for transport errors"""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class StorageUnavailable(StorageError):
+    """The circuit breaker is open, the request was not sent"""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker shared by the sync and async clients.
+
+    After `failure_threshold` failed requests in a row the circuit opens and
+    calls fail fast for `reset_timeout` seconds. Then one trial request is let
+    through (half-open): success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return 'half-open'
+            return 'open'
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+    def release(self):
+        """Give up a half-open trial without an outcome (cancelled, or not a storage error)"""
+        with self._lock:
+            self._trial_running = False
+
+
+class StorageHTTPClient:
+    """
+    Pooled HTTP client for the storage API, with a sync and an async variant.
+
+    One keep-alive pool per process (sync) and per event loop (async), bounded
+    by `max_connections`. Every call has a timeout, retryable failures are
+    retried with full-jitter exponential backoff, and a circuit breaker stops
+    a dead storage node from tying up request workers.
+    """
+
+    def __init__(self, base_url, headers=None, timeout=10.0, connect_timeout=3.0,
+                 max_connections=20, max_keepalive_connections=10, keepalive_expiry=30.0,
+                 retries=2, backoff_base=0.2, backoff_max=2.0, breaker=None):
+        self.base_url = base_url.rstrip('/')
+        self.headers = headers or {}
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self._lock = threading.Lock()
+        self._client = None
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    def _sync_client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(
+                        base_url=self.base_url, headers=self.headers, timeout=self.timeout, limits=self.limits
+                    )
+        return self._client
+
+    async def _keep_open(self, client):
+        """
+        Holds a loop's client until the loop shuts down: asyncio.run() closes
+        suspended async generators before closing its loop, which runs the
+        finally. Under WSGI every async_to_sync call runs its own loop, so the
+        client would otherwise leak with each request.
+        """
+        try:
+            yield
+        finally:
+            # The generator references its loop, drop the entry so both can go
+            self._async_clients.pop(asyncio.get_running_loop(), None)
+            await client.aclose()
+
+    async def _async_client(self):
+        # An AsyncClient's connections belong to the loop that opened them
+        loop = asyncio.get_running_loop()
+        entry = self._async_clients.get(loop)
+        if entry is None:
+            client = httpx.AsyncClient(
+                base_url=self.base_url, headers=self.headers, timeout=self.timeout, limits=self.limits
+            )
+            holder = self._keep_open(client)
+            entry = self._async_clients[loop] = (client, holder)
+            await holder.__anext__()
+        return entry[0]
+
+    def _backoff(self, attempt, response=None):
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if response is not None:
+            # Honour a numeric Retry-After, within the backoff cap
+            try:
+                delay = max(delay, min(float(response.headers.get('Retry-After', 0)), self.backoff_max))
+            except ValueError:
+                pass
+        return delay
+
+    def _check(self, response):
+        if response.status_code >= 400:
+            try:
+                detail = response.json().get('message') or response.text
+            except (ValueError, AttributeError):
+                detail = response.text
+            raise StorageError(f'Storage returned {response.status_code}: {detail}', response.status_code)
+        return response
+
+    def request(self, method, path, timeout=None, **kwargs):
+        """Send a request with retries; returns the response or raises StorageError"""
+        if not self.breaker.allow():
+            raise StorageUnavailable('Storage circuit is open, request not sent')
+
+        client = self._sync_client()
+        recorded = False
+        try:
+            for attempt in range(self.retries + 1):
+                response = None
+                try:
+                    response = client.request(method, path, timeout=timeout or self.timeout, **kwargs)
+                except httpx.TransportError as e:
+                    error = StorageError(f'Storage request failed: {e}')
+                else:
+                    if response.status_code not in RETRY_STATUSES:
+                        # The node answered; a 4xx is the caller's problem, not an outage
+                        self.breaker.record_success()
+                        recorded = True
+                        return self._check(response)
+                    error = StorageError(f'Storage returned {response.status_code}', response.status_code)
+
+                if attempt < self.retries:
+                    time.sleep(self._backoff(attempt, response))
+
+            self.breaker.record_failure()
+            recorded = True
+            raise error
+        finally:
+            if not recorded:
+                # Cancelled or failed outside storage; never leave a half-open trial hanging
+                self.breaker.release()
+
+    async def arequest(self, method, path, timeout=None, **kwargs):
+        """Async request(); waits between retries without blocking the loop"""
+        if not self.breaker.allow():
+            raise StorageUnavailable('Storage circuit is open, request not sent')
+
+        client = await self._async_client()
+        recorded = False
+        try:
+            for attempt in range(self.retries + 1):
+                response = None
+                try:
+                    response = await client.request(method, path, timeout=timeout or self.timeout, **kwargs)
+                except httpx.TransportError as e:
+                    error = StorageError(f'Storage request failed: {e}')
+                else:
+                    if response.status_code not in RETRY_STATUSES:
+                        # The node answered; a 4xx is the caller's problem, not an outage
+                        self.breaker.record_success()
+                        recorded = True
+                        return self._check(response)
+                    error = StorageError(f'Storage returned {response.status_code}', response.status_code)
+
+                if attempt < self.retries:
+                    await asyncio.sleep(self._backoff(attempt, response))
+
+            self.breaker.record_failure()
+            recorded = True
+            raise error
+        finally:
+            if not recorded:
+                # Cancelled or failed outside storage; never leave a half-open trial hanging
+                self.breaker.release()
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    async def aclose(self):
+        entry = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if entry is not None:
+            # Closing the holder closes its client
+            await entry[1].aclose()
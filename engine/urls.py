@@ -9,4 +9,5 @@ urlpatterns = [
     path('install/<str:module_name>/', views.InstallModuleView.as_view(), name='install_module'),
     path('uninstall/<str:module_name>/', views.UninstallModuleView.as_view(), name='uninstall_module'),
     path('upgrade/<str:module_name>/', views.UpgradeModuleView.as_view(), name='upgrade_module'),
+    path('modules/jobs/<int:job_id>/', views.ModuleJobStatusView.as_view(), name='module_job_status'),
 ]
\ No newline at end of file
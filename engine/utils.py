@@ -28,12 +28,13 @@ def format_rupiah(amount):
 
 # Supabase Storage Service
 import os
+import threading
 import uuid
 from io import BytesIO
-from PIL import Image
+from urllib.parse import quote
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.core.files.uploadedfile import InMemoryUploadedFile
-from supabase import create_client, Client
 
 
 class SupabaseStorageService:
@@ -48,33 +49,62 @@ class SupabaseStorageService:
     """
 
     def __init__(self):
-        """Initialize Supabase Storage service"""
-        try:
-            # Get Supabase configuration from Django settings
-            self.supabase_url = getattr(settings, 'SUPABASE_URL', None)
-            self.supabase_key = getattr(settings, 'SUPABASE_SERVICE_KEY', None)
-            self.bucket_name = getattr(settings, 'SUPABASE_STORAGE_BUCKET', 'uploads')
-
-            if not all([self.supabase_url, self.supabase_key]):
-                print("Warning: Supabase configuration not found in settings.")
-                self.supabase: Client = None
-                self.initialized = False
-            else:
-                # Supabase SDK expects URL without trailing slash
-                self.supabase_url = self.supabase_url.rstrip('/')
-                print(f"Initializing Supabase with URL: {self.supabase_url}")
-                try:
-                    self.supabase: Client = create_client(self.supabase_url, self.supabase_key)
-                    self.initialized = True
-                    print("Supabase Storage initialized successfully")
-                except Exception as e:
-                    print(f"Failed to initialize Supabase client: {e}")
-                    self.supabase = None
-                    self.initialized = False
-        except Exception as e:
-            print(f"Warning: Supabase Storage initialization failed: {e}")
-            self.supabase = None
-            self.initialized = False
+        """
+        Initialize Supabase Storage service.
+
+        Talks to the Storage REST API through a pooled httpx client (see
+        engine.storage_client), created on first use so importing this module
+        stays cheap.
+        """
+        self.supabase_url = (getattr(settings, 'SUPABASE_URL', None) or '').rstrip('/') or None
+        self.supabase_key = getattr(settings, 'SUPABASE_SERVICE_KEY', None)
+        self.bucket_name = getattr(settings, 'SUPABASE_STORAGE_BUCKET', 'uploads')
+        self.signed_url_expires = 3600  # 1 hour
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _build_client(self):
+        from engine.storage_client import CircuitBreaker, StorageHTTPClient
+
+        print(f"Initializing Supabase Storage client for: {self.supabase_url}")
+        return StorageHTTPClient(
+            base_url=f'{self.supabase_url}/storage/v1',
+            headers={'Authorization': f'Bearer {self.supabase_key}', 'apikey': self.supabase_key},
+            timeout=getattr(settings, 'SUPABASE_STORAGE_TIMEOUT', 10.0),
+            connect_timeout=getattr(settings, 'SUPABASE_STORAGE_CONNECT_TIMEOUT', 3.0),
+            max_connections=getattr(settings, 'SUPABASE_STORAGE_MAX_CONNECTIONS', 20),
+            max_keepalive_connections=getattr(settings, 'SUPABASE_STORAGE_MAX_KEEPALIVE', 10),
+            retries=getattr(settings, 'SUPABASE_STORAGE_RETRIES', 2),
+            breaker=CircuitBreaker(
+                failure_threshold=getattr(settings, 'SUPABASE_STORAGE_BREAKER_THRESHOLD', 5),
+                reset_timeout=getattr(settings, 'SUPABASE_STORAGE_BREAKER_RESET', 30.0),
+            ),
+        )
+
+    @property
+    def client(self):
+        """Shared StorageHTTPClient, or None when storage is not configured"""
+        if not self.initialized:
+            return None
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._build_client()
+        return self._client
+
+    @property
+    def initialized(self):
+        return bool(self.supabase_url and self.supabase_key)
+
+    def _object_path(self, file_path):
+        return f'/object/{quote(self.bucket_name)}/{quote(file_path)}'
+
+    def _sign_path(self, file_path):
+        return f'/object/sign/{quote(self.bucket_name)}/{quote(file_path)}'
+
+    def _signed_url(self, response):
+        # API returns a path relative to /storage/v1
+        return f"{self.supabase_url}/storage/v1{response.json()['signedURL']}"
 
     def _compress_image(self, image_file, quality=85, max_size=(1920, 1080)):
         """
@@ -88,6 +118,8 @@ class SupabaseStorageService:
         Returns:
             BytesIO: Compressed image data
         """
+        from PIL import Image
+
         try:
             # Open image with PIL
             if isinstance(image_file, InMemoryUploadedFile):
@@ -147,6 +179,65 @@ class SupabaseStorageService:
         # Return full path
         return f"{directory}/{filename}"
 
+    def _prepare_upload(self, file_obj, directory, compress_image):
+        """Read (and compress) the file; returns (filename, content, content_type, compressed)"""
+        # Determine if file is an image
+        content_type = getattr(file_obj, 'content_type', '')
+        is_image = content_type.startswith('image/') or file_obj.name.lower().endswith(('.jpg', '.jpeg', '.png', '.bmp', '.webp'))
+
+        # Compress image if requested and it's an image
+        if compress_image and is_image:
+            file_data = self._compress_image(file_obj)
+            filename = self._generate_filename(file_obj.name, directory)
+            # Update content type for WebP
+            content_type = 'image/webp'
+        else:
+            # Use original file
+            if isinstance(file_obj, InMemoryUploadedFile):
+                file_obj.file.seek(0)
+                file_data = file_obj.file
+            else:
+                file_data = file_obj
+            filename = self._generate_filename(file_obj.name, directory)
+
+        # Prepare file content for upload
+        if hasattr(file_data, 'read'):
+            # For file-like objects (BytesIO, etc.)
+            file_data.seek(0)  # Ensure we're at the beginning
+            file_content = file_data.read()
+            if isinstance(file_content, str):
+                file_content = file_content.encode('utf-8')
+        else:
+            file_content = file_data
+
+        # Ensure file_content is bytes
+        if not isinstance(file_content, bytes):
+            file_content = bytes(str(file_content), 'utf-8')
+
+        return filename, file_content, content_type or 'application/octet-stream', compress_image and is_image
+
+    @staticmethod
+    def _upload_headers(content_type):
+        # Names are unique, so upsert makes a retried upload idempotent
+        return {'Content-Type': content_type, 'Cache-Control': 'max-age=3600', 'x-upsert': 'true'}
+
+    def _upload_result(self, file_obj, filename, content_type, compressed, signed_url):
+        if signed_url is None:
+            return {
+                'success': True,
+                'error': 'Upload succeeded but failed to get URL',
+                'url': None,
+                'filename': filename,
+            }
+        return {
+            'success': True,
+            'url': signed_url['url'],
+            'filename': filename,
+            'size': getattr(file_obj, 'size', 0),
+            'content_type': content_type,
+            'compressed': compressed
+        }
+
     def upload_file(self, file_obj, directory='uploads', compress_image=True):
         """
         Upload a file to Supabase Storage.
@@ -167,48 +258,12 @@ class SupabaseStorageService:
             }
 
         try:
-            # Determine if file is an image
-            content_type = getattr(file_obj, 'content_type', '')
-            is_image = content_type.startswith('image/') or file_obj.name.lower().endswith(('.jpg', '.jpeg', '.png', '.bmp', '.webp'))
-
-            # Compress image if requested and it's an image
-            if compress_image and is_image:
-                file_data = self._compress_image(file_obj)
-                filename = self._generate_filename(file_obj.name, directory)
-                # Update content type for WebP
-                content_type = 'image/webp'
-            else:
-                # Use original file
-                if isinstance(file_obj, InMemoryUploadedFile):
-                    file_obj.file.seek(0)
-                    file_data = file_obj.file
-                else:
-                    file_data = file_obj
-                filename = self._generate_filename(file_obj.name, directory)
-
-            # Prepare file content for upload
-            if hasattr(file_data, 'read'):
-                # For file-like objects (BytesIO, etc.)
-                file_data.seek(0)  # Ensure we're at the beginning
-                file_content = file_data.read()
-                if isinstance(file_content, str):
-                    file_content = file_content.encode('utf-8')
-            else:
-                file_content = file_data
+            filename, file_content, content_type, compressed = self._prepare_upload(file_obj, directory, compress_image)
 
-            # Ensure file_content is bytes
-            if not isinstance(file_content, bytes):
-                file_content = bytes(str(file_content), 'utf-8')
-
-            # Upload using Supabase SDK
             try:
-                response = self.supabase.storage.from_(self.bucket_name).upload(
-                    path=filename,
-                    file=file_content,
-                    file_options={
-                        "content-type": content_type,
-                        "cache-control": "3600"
-                    }
+                self.client.request(
+                    'POST', self._object_path(filename),
+                    content=file_content, headers=self._upload_headers(content_type),
                 )
             except Exception as upload_error:
                 print(f"Supabase upload error: {upload_error}")
@@ -217,36 +272,10 @@ class SupabaseStorageService:
                     'error': f'Upload failed: {str(upload_error)}',
                     'url': None
                 }
-                
-
-            if response.full_path:
-                try:
-                    # Generate signedUrl
-                    signed_url = self.get_signed_url(response.path)
-                    return {
-                        'success': True,
-                        'url': signed_url['url'],
-                        'filename': filename,
-                        'size': getattr(file_obj, 'size', 0),
-                        'content_type': content_type,
-                        'compressed': compress_image and is_image
-                    }
-                except Exception as err:
-                    print(f"Warning: Could not generate signed URL: {err}")
-                    return {
-                        'success': True,
-                        'error': f'Upload succeeded but failed to get URL: {str(err)}',
-                        'url': None,
-                        'filename': filename,
-                    }
-                    
-            else:
-                return {
-                    'success': False,
-                    'error': 'Upload failed: No path returned',
-                    'url': None
-                }
 
+            # Generate signedUrl
+            signed_url = self.get_signed_url(filename)
+            return self._upload_result(file_obj, filename, content_type, compressed, signed_url)
 
         except Exception as e:
             print(f"Warning: File upload failed: {e}")
@@ -298,6 +327,16 @@ class SupabaseStorageService:
         directory = f"documents/{category}"
         return self.upload_file(file_obj, directory, compress_image=False)
 
+    @staticmethod
+    def _needs_refresh(cached_url, last_update):
+        """Signed URLs are regenerated when missing or older than 1 hour"""
+        if cached_url is None or last_update is None:
+            return True
+        # Check if more than 1 hour (3600 seconds) has passed
+        from django.utils import timezone
+        time_diff = (timezone.now() - last_update).total_seconds()
+        return time_diff >= 3600  # 1 hour
+
     def get_signed_url(self, file_path, cached_url=None, last_update=None):
         """
         Get a signed URL for a file, with caching to avoid regeneration.
@@ -314,25 +353,14 @@ class SupabaseStorageService:
             return None
 
         # Check if we need to regenerate the signed URL
-        needs_refresh = False
-        if cached_url is None or last_update is None:
-            needs_refresh = True
-        else:
-            # Check if more than 1 hour (3600 seconds) has passed
-            from django.utils import timezone
-            time_diff = (timezone.now() - last_update).total_seconds()
-            if time_diff >= 3600:  # 1 hour
-                needs_refresh = True
-
-        if needs_refresh:
+        if self._needs_refresh(cached_url, last_update):
             try:
-                signed_url_data = self.supabase.storage.from_(self.bucket_name).create_signed_url(
-                    path=file_path,
-                    expires_in=3600  # 1 hour
+                response = self.client.request(
+                    'POST', self._sign_path(file_path), json={'expiresIn': self.signed_url_expires}
                 )
                 return {
                     'is_new': True,
-                    'url': signed_url_data['signedUrl']
+                    'url': self._signed_url(response)
                 }
             except Exception as e:
                 print(f"Warning: Could not generate signed URL: {e}")
@@ -374,8 +402,10 @@ class SupabaseStorageService:
 
             print(f"Attempting to delete file: {filename} from bucket: {self.bucket_name}")
 
-            # Delete using Supabase SDK
-            response = self.supabase.storage.from_(self.bucket_name).remove([filename])
+            # Delete through the Storage API (bulk remove by prefix list)
+            response = self.client.request(
+                'DELETE', f'/object/{quote(self.bucket_name)}', json={'prefixes': [filename]}
+            ).json()
             print(f"Delete response: {response}")
 
             # Check if deletion was successful
@@ -387,6 +417,74 @@ class SupabaseStorageService:
             print(f"Warning: File deletion failed: {e}")
             return False
 
+    # Async variants for the ASGI API views, on the same pooled client and
+    # circuit breaker. Image compression is CPU work and runs in a thread.
+
+    async def aget_signed_url(self, file_path, cached_url=None, last_update=None):
+        """Async get_signed_url"""
+        if not self.initialized:
+            return None
+
+        if not self._needs_refresh(cached_url, last_update):
+            return {
+                'is_new': False,
+                'url': cached_url
+            }
+
+        try:
+            response = await self.client.arequest(
+                'POST', self._sign_path(file_path), json={'expiresIn': self.signed_url_expires}
+            )
+            return {
+                'is_new': True,
+                'url': self._signed_url(response)
+            }
+        except Exception as e:
+            print(f"Warning: Could not generate signed URL: {e}")
+            return None
+
+    async def aupload_file(self, file_obj, directory='uploads', compress_image=True):
+        """Async upload_file"""
+        if not self.initialized:
+            return {
+                'success': False,
+                'error': 'Supabase Storage not initialized',
+                'url': None
+            }
+
+        try:
+            filename, file_content, content_type, compressed = await sync_to_async(
+                self._prepare_upload, thread_sensitive=False
+            )(file_obj, directory, compress_image)
+
+            try:
+                await self.client.arequest(
+                    'POST', self._object_path(filename),
+                    content=file_content, headers=self._upload_headers(content_type),
+                )
+            except Exception as upload_error:
+                print(f"Supabase upload error: {upload_error}")
+                return {
+                    'success': False,
+                    'error': f'Upload failed: {str(upload_error)}',
+                    'url': None
+                }
+
+            signed_url = await self.aget_signed_url(filename)
+            return self._upload_result(file_obj, filename, content_type, compressed, signed_url)
+
+        except Exception as e:
+            print(f"Warning: File upload failed: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'url': None
+            }
+
+    async def aupload_product_image(self, image_file, product_id=None):
+        """Async upload_product_image"""
+        directory = f"products/{product_id}" if product_id else "products"
+        return await self.aupload_file(image_file, directory, compress_image=True)
 
 # Global instance for easy import
 supabase_storage = SupabaseStorageService()
\ No newline at end of file
@@ -2,14 +2,12 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.views import View
-from .models import Module
-import os
-from pathlib import Path
+from django.http import JsonResponse
+from .access import get_user_access
+from .registry import module_registry
 from modules.updater import ModuleUpdater
 from django.core.exceptions import PermissionDenied
 
-BASE_DIR = Path(__file__).resolve().parent.parent
-
 class HomeView(View):
     def get(self, request):
         return render(request, 'home.html')
@@ -38,27 +36,24 @@ class LogoutView(View):
 
 class ModuleListView(View):
     def get(self, request):
-        modules = []
-        modules_dir = BASE_DIR / 'modules'
+        # Served from the in-process registry, no directory scan or Module queries
+        modules = module_registry.all()
 
-        if modules_dir.exists():
-            for module_name in os.listdir(modules_dir):
-                module_path = modules_dir / module_name
-                if os.path.isdir(module_path) and (module_path / '__init__.py').exists():
-                    module_obj, _ = Module.objects.get_or_create(name=module_name)
+        if request.user.is_authenticated:
+            # Jika user terotentikasi, cek izin akses dari satu set permission
+            user = request.user
+            permissions = get_user_access(request).permissions
+            if not (user.is_active and user.is_superuser):
+                modules = [module for module in modules if module.access_permission in permissions]
+        # Jika tidak terotentikasi, tampilkan semua modul
 
-                    if request.user.is_authenticated:
-                        # Jika user terotentikasi, cek izin akses
-                        if request.user.has_perm(f'engine.access_{module_name}'):
-                            modules.append(module_obj)
-                    else:
-                        # Jika tidak terotentikasi, tampilkan semua modul
-                        modules.append(module_obj)
+        # Install/upgrade jobs still running, polled by the page
+        jobs = ModuleUpdater.active_jobs() if request.user.is_superuser else []
 
-        return render(request, 'module_list.html', {'modules': modules})
+        return render(request, 'module_list.html', {'modules': modules, 'jobs': jobs})
 
 class InstallModuleView(View):
-    def get(self, request, module_name):
+    def post(self, request, module_name):
         if request.user.is_superuser:
             success = ModuleUpdater.install_module(module_name, request)
             return redirect('module_list')
@@ -66,7 +61,7 @@ class InstallModuleView(View):
             raise PermissionDenied
 
 class UninstallModuleView(View):
-    def get(self, request, module_name):
+    def post(self, request, module_name):
         if request.user.is_superuser:
             success = ModuleUpdater.uninstall_module(module_name, request)
             return redirect('module_list')
@@ -74,6 +69,18 @@ class UninstallModuleView(View):
             raise PermissionDenied
 
 class UpgradeModuleView(View):
-    def get(self, request, module_name):
-        success = ModuleUpdater.upgrade_module(module_name, request)
-        return redirect('module_list')
\ No newline at end of file
+    def post(self, request, module_name):
+        if request.user.is_superuser:
+            success = ModuleUpdater.upgrade_module(module_name, request)
+            return redirect('module_list')
+        else:
+            raise PermissionDenied
+
+class ModuleJobStatusView(View):
+    def get(self, request, job_id):
+        if not request.user.is_superuser:
+            return JsonResponse({'success': False, 'message': 'Permission denied'}, status=403)
+        data = ModuleUpdater.job_status(job_id)
+        if data is None:
+            return JsonResponse({'success': False, 'message': 'Job not found'}, status=404)
+        return JsonResponse({'success': True, 'message': 'Job status retrieved', 'data': data})
\ No newline at end of file
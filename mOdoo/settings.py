@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -54,6 +55,9 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'engine.middleware.AccessMiddleware',
+    'engine.middleware.ModuleStateMiddleware',
+    'engine.middleware.DatabaseRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -88,6 +92,59 @@ DATABASES = {
     }
 }
 
+# Production profile: DB_ENGINE=postgresql with DB_NAME, DB_USER, DB_PASSWORD,
+# DB_HOST, DB_PORT. Connections are kept for DB_CONN_MAX_AGE seconds and
+# health-checked before reuse. DB_REPLICA_HOST adds a 'replica' alias that
+# read-only reporting actions use (see engine.db_router); those reports
+# tolerate replica lag.
+if os.environ.get('DB_ENGINE', 'sqlite') in ('postgres', 'postgresql'):
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('DB_NAME', 'modoo'),
+        'USER': os.environ.get('DB_USER', 'modoo'),
+        'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+        'HOST': os.environ.get('DB_HOST', 'localhost'),
+        'PORT': os.environ.get('DB_PORT', '5432'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', '5')),
+            'sslmode': os.environ.get('DB_SSLMODE', 'prefer'),
+        },
+    }
+    if os.environ.get('DB_REPLICA_HOST'):
+        DATABASES['replica'] = {
+            **DATABASES['default'],
+            'HOST': os.environ['DB_REPLICA_HOST'],
+            'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+            'USER': os.environ.get('DB_REPLICA_USER', DATABASES['default']['USER']),
+            'PASSWORD': os.environ.get('DB_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+            'TEST': {'MIRROR': 'default'},
+        }
+
+DATABASE_ROUTERS = ['engine.db_router.ReplicaRouter']
+
+
+# Cache
+# Version stamps (master data, access, module registry, ...) only reach the
+# processes that share this cache. CACHE_BACKEND=file (default) covers the
+# workers of one host; deployments on several hosts, like the PostgreSQL
+# profile above, use redis or memcached with CACHE_LOCATION pointing at it.
+# locmem is for single-process development only.
+CACHE_BACKENDS = {
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', str(BASE_DIR / '.cache')),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/1'),
+    'memcached': ('django.core.cache.backends.memcached.PyMemcacheCache', '127.0.0.1:11211'),
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'modoo'),
+}
+_cache_backend, _cache_location = CACHE_BACKENDS[os.environ.get('CACHE_BACKEND', 'file')]
+CACHES = {
+    'default': {
+        'BACKEND': _cache_backend,
+        'LOCATION': os.environ.get('CACHE_LOCATION', _cache_location),
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -139,6 +196,16 @@ USE_I18N = False
 USE_L10N = False
 USE_TZ = False  
 
+# Payment webhooks (QRIS / virtual account): HMAC-SHA256 secret shared with the provider
+PAYMENT_WEBHOOK_SECRET = os.environ.get('PAYMENT_WEBHOOK_SECRET', '')
+
+# Module install/upgrade: migrations run in a spawned `run_module_job` process;
+# each worker re-reads module state at most once per interval (seconds).
+# Jobs whose runner stops responding are marked failed after MODULE_JOB_STALE_AFTER seconds
+MODULE_JOBS_SPAWN = True
+MODULE_STATE_CHECK_INTERVAL = 1.0
+MODULE_JOB_STALE_AFTER = 300
+
 CSRF_TRUSTED_ORIGINS = [
     'https://yummypiv.com',
     'https://.yummypiv.com',
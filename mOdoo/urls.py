@@ -1,38 +1,65 @@
-
+from importlib import import_module
 from django.contrib import admin
+from django.db.utils import OperationalError, ProgrammingError
 from django.urls import path, include
-from django.apps import apps
-from django.conf import settings
-import os
-from pathlib import Path
+from django.urls.resolvers import RoutePattern, URLResolver
+
+
+class LazyModuleURLConf:
+    """
+    URLconf of one module, imported on the first request under its prefix.
+
+    Only installed modules expose their patterns. If the Module table does not
+    exist yet, the module is served, like the old directory-scan fallback, but
+    that answer is not kept.
+    """
+
+    def __init__(self, module_name):
+        self.module_name = module_name
+        self._urlpatterns = None
+
+    def is_installed(self):
+        """True or False from the module registry, None when the table is missing"""
+        from engine.registry import module_registry
+        try:
+            module = module_registry.get(self.module_name)
+        except (OperationalError, ProgrammingError):
+            # Module table not created yet
+            return None
+        return module is not None and module.is_installed
+
+    @property
+    def urlpatterns(self):
+        if self._urlpatterns is not None:
+            return self._urlpatterns
+
+        installed = self.is_installed()
+        if installed is False:
+            self._urlpatterns = []
+            return self._urlpatterns
+        try:
+            urlpatterns = import_module(f'modules.{self.module_name}.urls').urlpatterns
+        except ImportError:
+            urlpatterns = []
+        if installed:
+            self._urlpatterns = urlpatterns
+        return urlpatterns
+
+    def __repr__(self):
+        return f'<LazyModuleURLConf {self.module_name}>'
+
 
 def get_dynamic_urlpatterns():
+    from engine.registry import module_registry
+
     urlpatterns = [
         path('admin/', admin.site.urls),
         path('', include('engine.urls')),
     ]
 
-    if apps.is_installed('engine') and 'engine' in settings.INSTALLED_APPS:
-        try:
-            from engine.models import Module
-            installed_modules = Module.objects.filter(is_installed=True)
-            for module in installed_modules:
-                try:
-                    urlpatterns.append(path(f'{module.name}/', include(f'modules.{module.name}.urls')))
-                except ImportError:
-                    pass
-        except:
-            # Database not ready yet, scan modules directory
-            BASE_DIR = Path(__file__).resolve().parent.parent
-            modules_dir = BASE_DIR / 'modules'
-            if modules_dir.exists():
-                for module_name in os.listdir(modules_dir):
-                    module_path = modules_dir / module_name
-                    if os.path.isdir(module_path) and os.path.exists(module_path / '__init__.py'):
-                        try:
-                            urlpatterns.append(path(f'{module_name}/', include(f'modules.{module_name}.urls')))
-                        except ImportError:
-                            pass
+    # Module directories only; no database query and no module import here
+    for module_name in module_registry.module_names():
+        urlpatterns.append(URLResolver(RoutePattern(f'{module_name}/'), LazyModuleURLConf(module_name)))
 
     return urlpatterns
 
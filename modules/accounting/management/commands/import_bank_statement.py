@@ -0,0 +1,32 @@
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from modules.accounting.services import BankStatementImporter
+
+
+class Command(BaseCommand):
+    help = 'Reconcile a bank statement CSV against open receivables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('statement', help='Path to the bank statement CSV file')
+        parser.add_argument('--bank-name', default='', help='Bank name stored on the transfer records')
+        parser.add_argument('--unmatched', default=None, help='Write unmatched lines to this CSV file (default: stdout)')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Matches written per DB transaction')
+        parser.add_argument('--encoding', default='utf-8-sig')
+
+    def handle(self, *args, **options):
+        importer = BankStatementImporter(bank_name=options['bank_name'], chunk_size=options['chunk_size'])
+
+        unmatched_out = open(options['unmatched'], 'w', newline='', encoding='utf-8') if options['unmatched'] else sys.stdout
+        try:
+            with open(options['statement'], newline='', encoding=options['encoding']) as statement:
+                summary = importer.run(statement, unmatched_out)
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        finally:
+            if unmatched_out is not sys.stdout:
+                unmatched_out.close()
+
+        self.stderr.write(self.style.SUCCESS(
+            f"{summary['lines']} lines: {summary['matched']} matched ({summary['matched_amount']}), "
+            f"{summary['unmatched']} unmatched, batch {summary['batch_number'] or '-'}"
+        ))
@@ -0,0 +1,30 @@
+import time
+from django.core.management.base import BaseCommand
+from modules.accounting.services import PaymentNotificationService
+
+
+class Command(BaseCommand):
+    help = 'Settle receivables from queued QRIS / virtual account payment notifications'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--loop', action='store_true', help='Keep processing until interrupted')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to sleep when the queue is empty')
+
+    def handle(self, *args, **options):
+        while True:
+            summary = PaymentNotificationService.process_batch(batch_size=options['batch_size'])
+            processed = sum(summary.values())
+            if processed:
+                self.stdout.write(
+                    f"settled {summary['settled']}, unmatched {summary['unmatched']}, invalid {summary['invalid']}"
+                )
+
+            if not options['loop']:
+                # Single run empties the queue
+                if processed < options['batch_size']:
+                    break
+                continue
+
+            if not processed:
+                time.sleep(options['interval'])
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction as db_transaction
+from modules.accounting.models import AccountingPaymentRecordIndex
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the unified payment record index from the four payment record tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        with db_transaction.atomic():
+            AccountingPaymentRecordIndex.objects.all().delete()
+            for record_model in AccountingPaymentRecordIndex.SOURCES:
+                count = 0
+                chunk = []
+                for record in record_model.objects.order_by('id').iterator(chunk_size=chunk_size):
+                    chunk.append(record)
+                    if len(chunk) >= chunk_size:
+                        AccountingPaymentRecordIndex.index_records(chunk)
+                        count += len(chunk)
+                        chunk = []
+                if chunk:
+                    AccountingPaymentRecordIndex.index_records(chunk)
+                    count += len(chunk)
+                self.stdout.write(f'{record_model.__name__}: {count} records indexed')
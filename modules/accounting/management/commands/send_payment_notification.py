@@ -0,0 +1,68 @@
+import json
+import urllib.error
+import urllib.request
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from modules.accounting.models import AccountingReceivablePayment
+from modules.accounting.registry import payment_status_registry
+from modules.accounting.services import PaymentNotificationService
+
+
+class Command(BaseCommand):
+    help = 'Local stand-in for a payment provider: send signed QRIS / VA notifications to the webhook'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://localhost:8000/accounting/webhook/payment/{provider}/')
+        parser.add_argument('--provider', choices=['qr', 'va'], default='qr')
+        parser.add_argument('--reference', action='append', default=[], help='Receivable reference, e.g. TR-12 (repeatable)')
+        parser.add_argument('--amount', default=None, help='Amount to send (default: the receivable amount)')
+        parser.add_argument('--open', type=int, default=0, help='Also pay the first N open receivables')
+        parser.add_argument('--secret', default=None, help='Signing secret (default: PAYMENT_WEBHOOK_SECRET)')
+
+    def _targets(self, options):
+        targets = []
+        for reference in options['reference']:
+            source, _, reference_id = reference.partition('-')
+            receivable = AccountingReceivablePayment.objects.for_source(source.lower(), reference_id).first()
+            amount = options['amount'] or (receivable.amount if receivable else None)
+            if amount is None:
+                raise CommandError(f'Unknown receivable {reference}, pass --amount')
+            targets.append((reference, amount))
+
+        if options['open']:
+            unpaid = payment_status_registry.get(name='unpaid')
+            for receivable in AccountingReceivablePayment.objects.filter(status_id=unpaid.id).order_by('id')[:options['open']]:
+                targets.append((receivable.get_display_name(), options['amount'] or receivable.amount))
+        return targets
+
+    def handle(self, *args, **options):
+        secret = options['secret'] if options['secret'] is not None else getattr(settings, 'PAYMENT_WEBHOOK_SECRET', '')
+        if not secret:
+            raise CommandError('No signing secret: set PAYMENT_WEBHOOK_SECRET or pass --secret')
+
+        url = options['url'].format(provider=options['provider'])
+        sent = 0
+        for i, (reference, amount) in enumerate(self._targets(options)):
+            payload = {
+                'reference': reference,
+                'amount': str(amount),
+                'transaction_id': f"SIM-{options['provider'].upper()}-{i + 1}",
+                'qris_code': 'SIMULATED',
+                'bank_name': 'SIMULATED',
+                'virtual_account_number': '0000000000',
+            }
+            body = json.dumps(payload).encode('utf-8')
+            request = urllib.request.Request(url, data=body, method='POST', headers={
+                'Content-Type': 'application/json',
+                PaymentNotificationService.SIGNATURE_HEADER: PaymentNotificationService.sign(body, secret),
+            })
+            try:
+                with urllib.request.urlopen(request, timeout=10) as response:
+                    self.stdout.write(f'{reference}: {response.status}')
+                    sent += 1
+            except urllib.error.HTTPError as e:
+                self.stderr.write(f'{reference}: {e.code} {e.read().decode("utf-8", "replace")}')
+            except urllib.error.URLError as e:
+                raise CommandError(f'Cannot reach {url}: {e.reason}')
+
+        self.stdout.write(self.style.SUCCESS(f'{sent} notifications sent to {url}'))
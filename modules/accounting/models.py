@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.signals import post_save, post_delete
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -59,6 +60,16 @@ class AccountingPaymentTerm(models.Model):
         return self.display_name
 
 
+class AccountingReceivablePaymentQuerySet(models.QuerySet):
+
+    def for_source(self, receivable_from, reference_id):
+        """Receivables of one source document, served by the (receivable_from, reference_id) index"""
+        return self.filter(receivable_from=receivable_from, reference_id=str(reference_id))
+
+    def for_transaction(self, transaction_id):
+        return self.for_source('tr', transaction_id)
+
+
 # Record for receivable payments (invoice payments)
 class AccountingReceivablePayment(models.Model):
     INCOME_VARIANT = [
@@ -71,6 +82,17 @@ class AccountingReceivablePayment(models.Model):
     due_date = models.DateField(null=True, blank=True)
     status = models.ForeignKey(AccountingPaymentStatus, on_delete=models.SET_NULL, null=True)
     term = models.ForeignKey(AccountingPaymentTerm, on_delete=models.SET_NULL, null=True)
+    created_at = models.DateTimeField(auto_now_add=True, null=True, blank=True)
+
+    objects = AccountingReceivablePaymentQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Open receivable listing: filter by status, keyset on (due_date, id)
+            models.Index(fields=['status', 'due_date', 'id'], name='acc_recv_status_due_idx'),
+            # Lookup and join from the source document (e.g. TR + transaction id)
+            models.Index(fields=['receivable_from', 'reference_id'], name='acc_recv_source_ref_idx'),
+        ]
 
     def get_display_name(self):
         if self.receivable_from == 'tr':
@@ -152,4 +174,220 @@ class AccountingVirtualAccountPaymentRecord(models.Model):
     reference_number = models.CharField(max_length=100)
 
     def __str__(self):
-        return f"Virtual Account Payment of {self.payment_amount} on {self.payment_date}"
\ No newline at end of file
+        return f"Virtual Account Payment of {self.payment_amount} on {self.payment_date}"
+
+# Unified, indexed lookup over the four payment record tables, kept in sync on write
+class AccountingPaymentRecordIndex(models.Model):
+    # Record model -> (payment method, amount field, date field)
+    SOURCES = {
+        AccountingBankTransferRecord: ('bt', 'transfer_amount', 'transfer_date'),
+        AccountingQRISPaymentRecord: ('qr', 'payment_amount', 'payment_date'),
+        AccountingCashPaymentRecord: ('cs', 'payment_amount', 'payment_date'),
+        AccountingVirtualAccountPaymentRecord: ('va', 'payment_amount', 'payment_date'),
+    }
+    payment_method = models.CharField(max_length=2, choices=AccountingBatchPayment.PAYMENT_METHOD_CHOICES)
+    record_id = models.BigIntegerField()
+    batch_payment = models.CharField(max_length=100)
+    reference_number = models.CharField(max_length=100)
+    amount = models.DecimalField(max_digits=15, decimal_places=2)
+    payment_date = models.DateField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['payment_method', 'record_id'], name='acc_payidx_record_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['reference_number'], name='acc_payidx_reference_idx'),
+            models.Index(fields=['batch_payment'], name='acc_payidx_batch_idx'),
+            models.Index(fields=['payment_date', 'amount'], name='acc_payidx_date_amount_idx'),
+        ]
+
+    @classmethod
+    def from_record(cls, record):
+        payment_method, amount_field, date_field = cls.SOURCES[type(record)]
+        return cls(
+            payment_method=payment_method,
+            record_id=record.id,
+            batch_payment=record.batch_payment,
+            reference_number=record.reference_number,
+            amount=getattr(record, amount_field),
+            payment_date=getattr(record, date_field),
+        )
+
+    @classmethod
+    def index_records(cls, records):
+        """Index saved records in bulk; needed after bulk_create, which sends no signals"""
+        cls.objects.bulk_create(
+            [cls.from_record(record) for record in records],
+            update_conflicts=True,
+            unique_fields=['payment_method', 'record_id'],
+            update_fields=['batch_payment', 'reference_number', 'amount', 'payment_date'],
+        )
+
+    def __str__(self):
+        return f"{self.payment_method}#{self.record_id} {self.reference_number}"
+
+
+def _index_payment_record(sender, instance, **kwargs):
+    AccountingPaymentRecordIndex.index_records([instance])
+
+
+def _unindex_payment_record(sender, instance, **kwargs):
+    AccountingPaymentRecordIndex.objects.filter(
+        payment_method=AccountingPaymentRecordIndex.SOURCES[sender][0],
+        record_id=instance.id,
+    ).delete()
+
+
+for _record_model in AccountingPaymentRecordIndex.SOURCES:
+    post_save.connect(_index_payment_record, sender=_record_model, dispatch_uid=f'payment_index_save:{_record_model.__name__}')
+    post_delete.connect(_unindex_payment_record, sender=_record_model, dispatch_uid=f'payment_index_delete:{_record_model.__name__}')
+
+
+# Receivables settled by a batch payment
+class AccountingPaymentAllocation(models.Model):
+    batch_payment = models.ForeignKey(AccountingBatchPayment, on_delete=models.CASCADE, related_name='allocations')
+    receivable = models.ForeignKey(AccountingReceivablePayment, on_delete=models.CASCADE, related_name='allocations')
+    amount = models.DecimalField(max_digits=15, decimal_places=2)
+
+    def __str__(self):
+        return f"Allocation of {self.amount} from {self.batch_payment.batch_number} to {self.receivable}"
+
+
+# Raw payment notification from a QRIS / virtual account provider, queued for the batch worker
+class AccountingPaymentNotification(models.Model):
+    PROVIDER_CHOICES = [
+        ('qr', 'QRIS'),
+        ('va', 'Virtual Account'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('settled', 'Settled'),
+        ('unmatched', 'Unmatched'),
+        ('invalid', 'Invalid'),
+    ]
+    provider = models.CharField(max_length=2, choices=PROVIDER_CHOICES)
+    body = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    error = models.CharField(max_length=200, blank=True)
+    batch_payment = models.CharField(max_length=100, blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='acc_paynotif_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_provider_display()} notification #{self.id} ({self.status})"
+
+
+# Chart of accounts for the general ledger
+class LedgerAccount(models.Model):
+    ACCOUNT_TYPE_CHOICES = [
+        ('asset', 'Asset'),
+        ('liability', 'Liability'),
+        ('equity', 'Equity'),
+        ('income', 'Income'),
+        ('expense', 'Expense'),
+    ]
+    code = models.CharField(max_length=20, unique=True)
+    name = models.CharField(max_length=100)
+    account_type = models.CharField(max_length=10, choices=ACCOUNT_TYPE_CHOICES)
+    bank_account = models.OneToOneField(BankAccount, on_delete=models.SET_NULL, null=True, blank=True, related_name='ledger_account')
+
+    def is_debit_normal(self):
+        return self.account_type in ('asset', 'expense')
+
+    def __str__(self):
+        return f"{self.code} - {self.name}"
+
+
+# Materialized running balance per ledger account, updated with every posting
+class LedgerBalance(models.Model):
+    account = models.OneToOneField(LedgerAccount, on_delete=models.CASCADE, related_name='running_balance')
+    debit_total = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    credit_total = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    balance = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True, null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.account.code}: {self.balance}"
+
+
+# Journal entry header, always balanced
+class JournalEntry(models.Model):
+    SOURCE_CHOICES = [
+        ('sale', 'Sale'),
+        ('settlement', 'Receivable Settlement'),
+        ('bank', 'Bank Movement'),
+        ('manual', 'Manual'),
+    ]
+    entry_date = models.DateField()
+    description = models.CharField(max_length=200, blank=True)
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES, default='manual')
+    reference = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['source', 'reference'], name='acc_journal_src_ref_idx'),
+            models.Index(fields=['entry_date'], name='acc_journal_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"JE-{self.id} {self.entry_date} {self.description}"
+
+
+class JournalLine(models.Model):
+    entry = models.ForeignKey(JournalEntry, on_delete=models.CASCADE, related_name='lines')
+    account = models.ForeignKey(LedgerAccount, on_delete=models.PROTECT, related_name='journal_lines')
+    debit = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    credit = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.account.code} D {self.debit} / C {self.credit}"
+
+
+# Closed accounting month; totals are frozen at close time for reporting
+class AccountingPeriod(models.Model):
+    year = models.PositiveIntegerField()
+    month = models.PositiveSmallIntegerField()
+    closed_at = models.DateTimeField(auto_now_add=True)
+    closed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    receivables_opened_count = models.PositiveIntegerField(default=0)
+    receivables_opened_amount = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    receivables_settled_count = models.PositiveIntegerField(default=0)
+    receivables_settled_amount = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['year', 'month'], name='acc_period_year_month_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.year}-{self.month:02d}"
+
+
+# Sales of a closed period by payment term and status
+class PeriodSalesSnapshot(models.Model):
+    period = models.ForeignKey(AccountingPeriod, on_delete=models.CASCADE, related_name='sales')
+    term_name = models.CharField(max_length=20, blank=True)
+    status_name = models.CharField(max_length=20, blank=True)
+    transaction_count = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.period} {self.term_name}/{self.status_name}: {self.total_amount}"
+
+
+# Bank account balance at the end of a closed period
+class PeriodBankSnapshot(models.Model):
+    period = models.ForeignKey(AccountingPeriod, on_delete=models.CASCADE, related_name='bank_balances')
+    bank_account = models.ForeignKey(BankAccount, on_delete=models.CASCADE)
+    movement = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    closing_balance = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.period} {self.bank_account}: {self.closing_balance}"
@@ -0,0 +1,8 @@
+from engine.registry import MasterDataRegistry
+from .models import AccountingPaymentStatus, AccountingPaymentTerm, LedgerAccount
+
+
+# In-memory lookups for accounting master data
+payment_status_registry = MasterDataRegistry(AccountingPaymentStatus)
+payment_term_registry = MasterDataRegistry(AccountingPaymentTerm)
+ledger_account_registry = MasterDataRegistry(LedgerAccount, key_field='code')
@@ -1,12 +1,45 @@
+import csv
+import hashlib
+import hmac
+import io
 import json
+import uuid
+from decimal import Decimal, InvalidOperation
 from django.http import JsonResponse
 from django.core.exceptions import ValidationError
 from django.contrib import messages
-from django.db.models import Sum
+from django.db.models import Sum, Count, Q, F, Case, When, Value, DecimalField, CharField, DateField, DateTimeField, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Cast, Coalesce, Concat, TruncMonth, TruncWeek
+from django.db.models.signals import post_save, post_delete
+from django.core.cache import cache
+from django.conf import settings
+from django.db import transaction as db_transaction
 from django.utils import timezone
+from datetime import date, datetime, time, timedelta
 from .models import *
 from django.contrib.auth.models import User
 from engine.utils import format_rupiah
+from engine.db_router import use_replica
+from .registry import payment_status_registry, payment_term_registry, ledger_account_registry
+
+# Product transactions are the main source of receivables
+try:
+    from modules.product.models import Transaction
+    from modules.product.registry import payment_status_registry as product_status_registry
+    from modules.product.registry import accounting_status_map, accounting_term_map
+except ImportError:
+    # Handle case where product module is not available
+    Transaction = None
+    product_status_registry = None
+    accounting_status_map = None
+    accounting_term_map = None
+
+# Default aging bucket bounds in days past due: current, 1-30, 31-60, 61-90, 91+
+AGING_BUCKETS = [0, 30, 60, 90]
+
+# Cashflow forecast horizon per granularity (number of periods)
+FORECAST_PERIODS = {'week': 8, 'month': 6}
+RECEIVABLES_VERSION_KEY = 'accounting:receivables_version'
 
 
 # Class Service for Account Receivable
@@ -16,9 +49,29 @@ class AccountReceivable:
     def process_post(request, json_request):
         action = json_request.get('action')
         if action == 'list':
-            return AccountReceivable.list_receivables(request)
+            # Extract filters and cursor parameters
+            filters = {
+                'due_date_from': str(json_request.get('filter_due_date_from', '')).strip(),
+                'due_date_to': str(json_request.get('filter_due_date_to', '')).strip(),
+                'term': str(json_request.get('filter_term', '')).strip(),
+                'source': str(json_request.get('filter_source', '')).strip(),
+            }
+            # Remove empty filters
+            filters = {k: v for k, v in filters.items() if v}
+
+            cursor = json_request.get('cursor') or None
+            try:
+                per_page = int(json_request.get('per_page') or 25)
+            except (TypeError, ValueError):
+                return JsonResponse({'success': False, 'message': 'per_page must be a whole number'}, status=400)
+
+            return AccountReceivable.list_receivables(request, filters, cursor, per_page)
         elif action == 'create':
             return AccountReceivable.create_receivable(request, json_request)
+        elif action == 'aging':
+            return AccountReceivable.aging_report(request, json_request)
+        elif action == 'cashflow_forecast':
+            return AccountReceivable.cashflow_forecast(request, json_request)
         else:
             return JsonResponse({'success': False, 'message': f'Unknown action: {action}'}, status=400)
 
@@ -34,8 +87,8 @@ class AccountReceivable:
 
         try:
             from .models import AccountingPaymentStatus, AccountingPaymentTerm
-            status = AccountingPaymentStatus.objects.get(id=status_id)
-            term = AccountingPaymentTerm.objects.get(id=term_id)
+            status = payment_status_registry.get(id=status_id)
+            term = payment_term_registry.get(id=term_id)
 
             payment = AccountingReceivablePayment(
                 amount=amount,
@@ -67,9 +120,69 @@ class AccountReceivable:
             return JsonResponse({'success': False, 'message': str(e)}, status=400)
 
     @staticmethod
-    def list_receivables(request):
-        from .models import AccountingReceivablePayment
-        receivables = AccountingReceivablePayment.objects.filter(status__name='unpaid')
+    def _encode_cursor(receivable):
+        due_date = receivable.due_date.isoformat() if receivable.due_date else ''
+        return f"{due_date}:{receivable.id}"
+
+    @staticmethod
+    def _decode_cursor(cursor):
+        """Return (due_date or None, id) from a cursor string"""
+        due_date, _, last_id = str(cursor).rpartition(':')
+        if not last_id.isdigit():
+            raise ValueError(f'Invalid cursor: {cursor}')
+        try:
+            return (date.fromisoformat(due_date) if due_date else None), int(last_id)
+        except ValueError:
+            raise ValueError(f'Invalid cursor: {cursor}')
+
+    @staticmethod
+    def list_receivables(request, filters=None, cursor=None, per_page=25):
+        """List unpaid receivables ordered by due date, using cursor pagination"""
+        per_page = max(1, min(per_page, 100))
+
+        unpaid = payment_status_registry.get_or_none(name='unpaid')
+        if unpaid is None:
+            return JsonResponse({'success': False, 'message': 'Payment status unpaid is not configured'}, status=500)
+
+        receivables_query = AccountingReceivablePayment.objects.filter(status_id=unpaid.id)
+
+        # Apply filters if provided
+        if filters:
+            for key, lookup in (('due_date_from', 'due_date__gte'), ('due_date_to', 'due_date__lte')):
+                if filters.get(key):
+                    try:
+                        receivables_query = receivables_query.filter(**{lookup: date.fromisoformat(filters[key])})
+                    except ValueError:
+                        return JsonResponse({'success': False, 'message': f'{key} must be a YYYY-MM-DD date'}, status=400)
+            if filters.get('term'):
+                term = payment_term_registry.get_or_none(name=filters['term'])
+                if term is None:
+                    return JsonResponse({'success': False, 'message': f"Unknown payment term: {filters['term']}"}, status=400)
+                receivables_query = receivables_query.filter(term_id=term.id)
+            if filters.get('source'):
+                receivables_query = receivables_query.filter(receivable_from=filters['source'])
+
+        # Keyset pagination on (due_date, id); receivables without due date come last
+        page_query = receivables_query.select_related('status', 'term')
+        if cursor:
+            try:
+                last_due_date, last_id = AccountReceivable._decode_cursor(cursor)
+            except ValueError as e:
+                return JsonResponse({'success': False, 'message': str(e)}, status=400)
+            if last_due_date is None:
+                page_query = page_query.filter(due_date__isnull=True, id__gt=last_id)
+            else:
+                page_query = page_query.filter(
+                    Q(due_date__gt=last_due_date) |
+                    Q(due_date=last_due_date, id__gt=last_id) |
+                    Q(due_date__isnull=True)
+                )
+
+        page_query = page_query.order_by(F('due_date').asc(nulls_last=True), 'id')
+        receivables = list(page_query[:per_page + 1])
+        has_next = len(receivables) > per_page
+        receivables = receivables[:per_page]
+
         data = []
         for r in receivables:
             data.append({
@@ -82,17 +195,1604 @@ class AccountReceivable:
                 'term': r.term.display_name if r.term else 'N/A'
             })
             
-        # Calculate totals
-        total_pending = sum(float(r['amount']) for r in data if 'unpaid' in r['status'].lower())
+        # Calculate totals in one aggregate query over the filtered set
+        totals = receivables_query.aggregate(total=Sum('amount'), count=Count('id'))
         return JsonResponse({
             'success': True,
             'data': {
                 'receivables': data,
-                'total_pending': format_rupiah(total_pending),
-                'count': len(data)
+                'total_pending': format_rupiah(totals['total'] or 0),
+                'count': totals['count'],
+                'pagination': {
+                    'per_page': per_page,
+                    'has_next': has_next,
+                    'next_cursor': AccountReceivable._encode_cursor(receivables[-1]) if has_next else None
+                }
+            }
+        })
+
+
+    @staticmethod
+    def _aging_buckets(bounds):
+        """Turn sorted day bounds into (key, low, high) buckets, high=None for the last one"""
+        buckets = [('current', None, 0)]
+        for low, high in zip(bounds, bounds[1:]):
+            buckets.append((f'{low + 1}-{high}', low + 1, high))
+        buckets.append((f'{bounds[-1] + 1}+', bounds[-1] + 1, None))
+        return buckets
+
+    @staticmethod
+    def _aging_condition(today, low, high):
+        """Q matching receivables whose days past due fall in [low, high]"""
+        if low is None:
+            # Not yet due, or no due date at all
+            return Q(due_date__gte=today - timedelta(days=high)) | Q(due_date__isnull=True)
+        condition = Q(due_date__lte=today - timedelta(days=low))
+        if high is not None:
+            condition &= Q(due_date__gte=today - timedelta(days=high))
+        return condition
+
+    @staticmethod
+    def get_aging(bounds=None, by_customer=False, refresh=False):
+        """
+        Outstanding receivables grouped into aging buckets, computed with one
+        Case/When aggregation query and cached until the end of the day or the
+        next receivable change, whichever comes first.
+        """
+        bounds = sorted({int(b) for b in (bounds or AGING_BUCKETS) if int(b) >= 0}) or AGING_BUCKETS
+        if bounds[0] != 0:
+            bounds = [0] + bounds
+
+        today = timezone.now().date()
+        cache_key = (
+            f"accounting:aging:{AccountReceivable.receivables_version()}:{today.isoformat()}:"
+            f"{','.join(map(str, bounds))}:{int(by_customer)}"
+        )
+        if not refresh:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        unpaid = payment_status_registry.get_or_none(name='unpaid')
+        if unpaid is None:
+            # Without the status nothing counts as outstanding, not the rows with no status
+            receivables_query = AccountingReceivablePayment.objects.none()
+        else:
+            receivables_query = AccountingReceivablePayment.objects.filter(status_id=unpaid.id)
+
+        buckets = AccountReceivable._aging_buckets(bounds)
+        aggregates = {'total': Sum('amount'), 'count': Count('id')}
+        for key, low, high in buckets:
+            aggregates[key] = Sum(Case(
+                When(AccountReceivable._aging_condition(today, low, high), then='amount'),
+                default=Value(0),
+                output_field=DecimalField(max_digits=15, decimal_places=2),
+            ))
+
+        def _bucket_row(row):
+            return {
+                'buckets': [{'bucket': key, 'amount': float(row[key] or 0)} for key, _, _ in buckets],
+                'total': float(row['total'] or 0),
+                'count': row['count'],
+            }
+
+        report = {
+            'as_of': today.isoformat(),
+            'bucket_bounds': bounds,
+        }
+
+        if by_customer:
+            # Customer comes from the source transaction, other receivables group by their reference
+            fallback_name = Concat('receivable_from', Value('-'), 'reference_id', output_field=CharField())
+            if Transaction is not None:
+                customer = Case(
+                    When(receivable_from='tr', then=Subquery(
+                        Transaction.objects.filter(
+                            id=Cast(OuterRef('reference_id'), IntegerField())
+                        ).values('customer_name')[:1]
+                    )),
+                    default=fallback_name,
+                    output_field=CharField(),
+                )
+            else:
+                customer = fallback_name
+
+            rows = receivables_query.annotate(customer=customer).values('customer').annotate(**aggregates).order_by('-total')
+            report['customers'] = [dict(customer=row['customer'] or 'N/A', **_bucket_row(row)) for row in rows]
+            totals = {key: sum(c['buckets'][i]['amount'] for c in report['customers']) for i, (key, _, _) in enumerate(buckets)}
+            report['buckets'] = [{'bucket': key, 'amount': totals[key]} for key, _, _ in buckets]
+            report['total'] = sum(c['total'] for c in report['customers'])
+            report['count'] = sum(c['count'] for c in report['customers'])
+        else:
+            report.update(_bucket_row(receivables_query.aggregate(**aggregates)))
+
+        # Cache until midnight; a receivable change moves the version and skips this entry
+        end_of_day = datetime.combine(today + timedelta(days=1), time.min)
+        timeout = max(60, int((end_of_day - timezone.now().replace(tzinfo=None)).total_seconds()))
+        cache.set(cache_key, report, timeout)
+        return report
+
+    @staticmethod
+    def aging_report(request, json_request):
+        """Return the receivable aging report as JSON response"""
+        try:
+            bounds = json_request.get('buckets') or None
+            by_customer = json_request.get('by_customer') in ['true', 'True', True, 1, '1']
+            refresh = json_request.get('refresh') in ['true', 'True', True, 1, '1']
+            report = AccountReceivable.get_aging(bounds, by_customer, refresh)
+        except (TypeError, ValueError):
+            return JsonResponse({'success': False, 'message': 'Buckets must be a list of day counts'}, status=400)
+
+        return JsonResponse({'success': True, 'data': report})
+
+    @staticmethod
+    def receivables_version():
+        """Version stamp bumped whenever receivables or their allocations change"""
+        version = cache.get(RECEIVABLES_VERSION_KEY)
+        if version is None:
+            version = uuid.uuid4().hex
+            if not cache.add(RECEIVABLES_VERSION_KEY, version, None):
+                version = cache.get(RECEIVABLES_VERSION_KEY, version)
+        return version
+
+    @staticmethod
+    def touch_receivables(**kwargs):
+        """Invalidate receivable-derived caches; also used as a signal handler"""
+        # After commit, so no other process caches pre-commit data under the new stamp
+        db_transaction.on_commit(lambda: cache.set(RECEIVABLES_VERSION_KEY, uuid.uuid4().hex, None))
+
+    @staticmethod
+    def _on_time_rates():
+        """Amount-weighted share of settled receivables paid by their due date, per term id"""
+        rows = AccountingPaymentAllocation.objects.filter(
+            receivable__due_date__isnull=False,
+            batch_payment__payment_date__isnull=False,
+        ).values('receivable__term_id').annotate(
+            total=Sum('amount'),
+            on_time=Sum(Case(
+                When(batch_payment__payment_date__lte=F('receivable__due_date'), then='amount'),
+                default=Value(0),
+                output_field=DecimalField(max_digits=15, decimal_places=2),
+            )),
+        ).order_by()
+        return {
+            row['receivable__term_id']: (row['on_time'] or Decimal('0')) / row['total']
+            for row in rows if row['total']
+        }
+
+    @staticmethod
+    def get_cashflow_forecast(granularity='week', periods=None, refresh=False):
+        """
+        Expected incoming cash from open receivables per week or month.
+
+        Open receivables are grouped by (expected period, term) in one query;
+        overdue ones are expected in the current period. Each group is scaled by
+        its term's historical on-time rate and the late share is moved to the
+        following period. Cached until receivables change or the day ends.
+        """
+        if granularity not in FORECAST_PERIODS:
+            raise ValueError(f'Granularity must be one of: {", ".join(FORECAST_PERIODS)}')
+        periods = max(1, min(int(periods or FORECAST_PERIODS[granularity]), 52))
+
+        today = timezone.now().date()
+        cache_key = f'accounting:cashflow:{AccountReceivable.receivables_version()}:{today.isoformat()}:{granularity}:{periods}'
+        if not refresh:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        # Period starts of the forecast horizon
+        if granularity == 'week':
+            current = today - timedelta(days=today.weekday())
+            starts = [current + timedelta(weeks=i) for i in range(periods)]
+        else:
+            starts = [date(today.year + (today.month - 1 + i) // 12, (today.month - 1 + i) % 12 + 1, 1) for i in range(periods)]
+        index = {start: i for i, start in enumerate(starts)}
+
+        unpaid = payment_status_registry.get_or_none(name='unpaid')
+        expected_date = Case(
+            When(due_date__lt=today, then=Value(today)),
+            default=F('due_date'),
+            output_field=DateField(),
+        )
+        trunc = TruncWeek if granularity == 'week' else TruncMonth
+        if unpaid is None:
+            # Without the status nothing is open, not the rows with no status
+            receivables = AccountingReceivablePayment.objects.none()
+        else:
+            receivables = AccountingReceivablePayment.objects.filter(status_id=unpaid.id)
+        rows = receivables.annotate(period=trunc(expected_date, output_field=DateField())).values('period', 'term_id').annotate(
+            amount=Sum('amount'), count=Count('id')
+        ).order_by()
+
+        rates = AccountReceivable._on_time_rates()
+        zero = Decimal('0')
+        buckets = [{'due': zero, 'expected': zero, 'count': 0} for _ in starts]
+        later = {'due': zero, 'expected': zero, 'count': 0}
+        unscheduled = {'due': zero, 'count': 0}
+
+        for row in rows:
+            amount = row['amount'] or zero
+            if row['period'] is None:
+                unscheduled['due'] += amount
+                unscheduled['count'] += row['count']
+                continue
+
+            period = row['period'].date() if isinstance(row['period'], datetime) else row['period']
+            i = index.get(period)
+            if i is None:
+                later['due'] += amount
+                later['expected'] += amount
+                later['count'] += row['count']
+                continue
+
+            on_time = amount * rates.get(row['term_id'], Decimal('1'))
+            buckets[i]['due'] += amount
+            buckets[i]['count'] += row['count']
+            buckets[i]['expected'] += on_time
+            (buckets[i + 1] if i + 1 < len(buckets) else later)['expected'] += amount - on_time
+
+        def money(value):
+            return float(value.quantize(Decimal('0.01')))
+
+        report = {
+            'as_of': today.isoformat(),
+            'granularity': granularity,
+            'buckets': [{
+                'period_start': start.isoformat(),
+                'due_amount': money(bucket['due']),
+                'expected_amount': money(bucket['expected']),
+                'count': bucket['count'],
+            } for start, bucket in zip(starts, buckets)],
+            'later': {'due_amount': money(later['due']), 'expected_amount': money(later['expected']), 'count': later['count']},
+            'unscheduled': {'due_amount': money(unscheduled['due']), 'count': unscheduled['count']},
+            'on_time_rates': {
+                (term.name if term else 'none'): round(float(rate), 4)
+                for term_id, rate in rates.items()
+                for term in [payment_term_registry.get_or_none(id=term_id) if term_id else None]
+            },
+        }
+        report['total_due'] = money(sum((b['due'] for b in buckets), zero) + later['due'] + unscheduled['due'])
+
+        cache.set(cache_key, report, 24 * 60 * 60)
+        return report
+
+    @staticmethod
+    def cashflow_forecast(request, json_request):
+        """Return the cashflow forecast as JSON response"""
+        try:
+            refresh = json_request.get('refresh') in ['true', 'True', True, 1, '1']
+            report = AccountReceivable.get_cashflow_forecast(
+                granularity=json_request.get('granularity') or 'week',
+                periods=json_request.get('periods') or None,
+                refresh=refresh,
+            )
+        except (TypeError, ValueError) as e:
+            return JsonResponse({'success': False, 'message': str(e)}, status=400)
+
+        return JsonResponse({'success': True, 'data': report})
+
+
+# Receivable changes made through save()/delete() invalidate the forecast; bulk updates call touch_receivables()
+post_save.connect(AccountReceivable.touch_receivables, sender=AccountingReceivablePayment, dispatch_uid='receivables_version_save')
+post_delete.connect(AccountReceivable.touch_receivables, sender=AccountingReceivablePayment, dispatch_uid='receivables_version_delete')
+
+
+# Per-method payment record: (model, amount field, date field, detail fields)
+PAYMENT_RECORD_MODELS = {
+    'bt': (AccountingBankTransferRecord, 'transfer_amount', 'transfer_date', ['bank_name', 'bank_account_number', 'bank_account_name']),
+    'qr': (AccountingQRISPaymentRecord, 'payment_amount', 'payment_date', ['qris_code']),
+    'cs': (AccountingCashPaymentRecord, 'payment_amount', 'payment_date', ['cash_received_by']),
+    'va': (AccountingVirtualAccountPaymentRecord, 'payment_amount', 'payment_date', ['bank_name', 'virtual_account_number']),
+}
+
+
+# Class Service for applying incoming payments to receivables
+class PaymentAllocationService:
+
+    @staticmethod
+    def process_post(request, json_request):
+        action = json_request.get('action')
+        if action == 'allocate':
+            return PaymentAllocationService.allocate(request, json_request)
+        elif action == 'search':
+            return PaymentAllocationService.search(request, json_request)
+        else:
+            return JsonResponse({'success': False, 'message': f'Unknown action: {action}'}, status=400)
+
+    @staticmethod
+    def _generate_batch_number(payment_method):
+        return f"AR-{payment_method.upper()}-{timezone.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+    @staticmethod
+    def record_amount(amount):
+        """
+        Amount for the whole-number columns of the payment record models.
+        Raises ValueError for fractional amounts instead of dropping the cents.
+        """
+        amount = Decimal(str(amount))
+        if not amount.is_finite():
+            raise ValueError(f'Invalid payment amount: {amount}')
+        if amount != amount.to_integral_value():
+            raise ValueError(f'Payment amount {amount} has cents; payment records hold whole amounts only')
+        return int(amount)
+
+    @staticmethod
+    def allocate_payment(amount, payment_method, payment_date=None, reference_number='', details=None, receivable_ids=None):
+        """
+        Spread one incoming payment over open receivables.
+
+        Receivables are settled in full, oldest due date first or in the order of
+        `receivable_ids`, until the next one no longer fits the remaining amount.
+        The batch, the method record, the allocations and every status change
+        are written with bulk queries in a single DB transaction.
+
+        Raises ValueError on invalid input.
+        """
+        try:
+            amount = Decimal(str(amount))
+        except (InvalidOperation, TypeError):
+            raise ValueError('Invalid payment amount')
+        if not amount.is_finite():
+            raise ValueError('Invalid payment amount')
+        if amount <= 0:
+            raise ValueError('Payment amount must be greater than zero')
+        record_amount = PaymentAllocationService.record_amount(amount)
+        if payment_method not in PAYMENT_RECORD_MODELS:
+            raise ValueError(f'Invalid payment method: {payment_method}')
+
+        unpaid = payment_status_registry.get(name='unpaid')
+        payment_date = payment_date or timezone.now().date()
+        details = details or {}
+
+        with db_transaction.atomic():
+            # Lock open receivables so two payments cannot settle the same invoice
+            receivables_query = AccountingReceivablePayment.objects.select_for_update().filter(status_id=unpaid.id)
+            if receivable_ids:
+                # Each receivable once, in the order given
+                receivable_ids = list(dict.fromkeys(int(i) for i in receivable_ids))
+                by_id = {r.id: r for r in receivables_query.filter(id__in=receivable_ids)}
+                missing = [i for i in receivable_ids if i not in by_id]
+                if missing:
+                    raise ValueError(f'Receivables not found or already paid: {missing}')
+                candidates = [by_id[i] for i in receivable_ids]
+            else:
+                candidates = receivables_query.order_by(F('due_date').asc(nulls_last=True), 'id').iterator(chunk_size=500)
+
+            settled = []
+            remaining = amount
+            for receivable in candidates:
+                if receivable.amount > remaining:
+                    break
+                settled.append(receivable)
+                remaining -= receivable.amount
+
+            if not settled:
+                raise ValueError('Payment amount does not cover any open receivable')
+
+            batch = AccountingBatchPayment.objects.create(
+                batch_number=PaymentAllocationService._generate_batch_number(payment_method),
+                total_amount=amount,
+                payment_type='ar',
+                payment_date=payment_date,
+                payment_method=payment_method,
+            )
+
+            record_model, amount_field, date_field, detail_fields = PAYMENT_RECORD_MODELS[payment_method]
+            record_model.objects.create(
+                batch_payment=batch.batch_number,
+                reference_number=reference_number or batch.batch_number,
+                **{amount_field: record_amount, date_field: payment_date},
+                **{field: details.get(field, '') for field in detail_fields},
+            )
+
+            PaymentAllocationService.settle_receivables(batch, settled)
+            LedgerService.post_settlement(batch, amount - remaining)
+            settled_ids = [r.id for r in settled]
+
+        return {
+            'batch_number': batch.batch_number,
+            'batch_id': batch.id,
+            'allocated_amount': amount - remaining,
+            'unallocated_amount': remaining,
+            'settled_receivables': settled_ids,
+        }
+
+    @staticmethod
+    def settle_receivables(batch, receivables):
+        """
+        Mark receivables as fully paid by a batch: allocation rows, status change
+        and source transaction status, all with bulk queries. Call inside a DB transaction.
+        """
+        paid = payment_status_registry.get(name='paid')
+
+        AccountingPaymentAllocation.objects.bulk_create([
+            AccountingPaymentAllocation(batch_payment=batch, receivable_id=r.id, amount=r.amount) for r in receivables
+        ], batch_size=500)
+
+        AccountingReceivablePayment.objects.filter(id__in=[r.id for r in receivables]).update(status_id=paid.id)
+        AccountReceivable.touch_receivables()
+
+        # Keep source transactions in sync with their receivables
+        transaction_ids = [int(r.reference_id) for r in receivables if r.receivable_from == 'tr' and str(r.reference_id).isdigit()]
+        if transaction_ids and Transaction is not None:
+            Transaction.objects.filter(id__in=transaction_ids).update(
+                tmp_status=product_status_registry.get(name='paid'),
+                paid_date=timezone.now(),
+            )
+
+    @staticmethod
+    def import_bank_statement(request):
+        """Reconcile an uploaded bank statement CSV against open receivables"""
+        if 'statement' not in request.FILES:
+            return JsonResponse({'success': False, 'message': 'No statement file provided'}, status=400)
+
+        statement = request.FILES['statement']
+        importer = BankStatementImporter(bank_name=request.POST.get('bank_name', ''))
+        try:
+            lines = io.TextIOWrapper(statement.file, encoding='utf-8-sig', newline='')
+            summary = importer.run(lines)
+        except (ValueError, UnicodeDecodeError, AccountingPaymentStatus.DoesNotExist) as e:
+            return JsonResponse({'success': False, 'message': str(e)}, status=400)
+
+        return JsonResponse({
+            'success': True,
+            'message': f"Matched {summary['matched']} of {summary['lines']} statement lines",
+            'data': {
+                'batch_number': summary['batch_number'],
+                'lines': summary['lines'],
+                'matched': summary['matched'],
+                'matched_amount': format_rupiah(summary['matched_amount']),
+                'unmatched': summary['unmatched'],
+                'unmatched_preview': importer.unmatched_preview,
             }
         })
 
+    @staticmethod
+    def allocate(request, data):
+        """Apply one incoming payment to open receivables"""
+        try:
+            result = PaymentAllocationService.allocate_payment(
+                amount=data.get('amount'),
+                payment_method=data.get('payment_method'),
+                payment_date=data.get('payment_date') or None,
+                reference_number=data.get('reference_number', ''),
+                details=data.get('details') or {},
+                receivable_ids=data.get('receivable_ids') or None,
+            )
+        except (AccountingPaymentStatus.DoesNotExist, ValueError) as e:
+            return JsonResponse({'success': False, 'message': str(e)}, status=400)
+
+        return JsonResponse({
+            'success': True,
+            'message': f"Settled {len(result['settled_receivables'])} receivables",
+            'data': {
+                'batch_number': result['batch_number'],
+                'allocated_amount': format_rupiah(result['allocated_amount']),
+                'unallocated_amount': format_rupiah(result['unallocated_amount']),
+                'settled_receivables': result['settled_receivables'],
+            }
+        })
+
+    @staticmethod
+    def search_payments(filters, limit=50):
+        """Search incoming payments of every method through the unified record index"""
+        query = AccountingPaymentRecordIndex.objects.all()
+        if filters.get('reference'):
+            query = query.filter(reference_number=filters['reference'])
+        if filters.get('batch'):
+            query = query.filter(batch_payment=filters['batch'])
+        if filters.get('payment_method'):
+            query = query.filter(payment_method=filters['payment_method'])
+        if filters.get('amount') not in (None, ''):
+            query = query.filter(amount=Decimal(str(filters['amount'])))
+        if filters.get('date_from'):
+            query = query.filter(payment_date__gte=datetime.strptime(filters['date_from'], '%Y-%m-%d').date())
+        if filters.get('date_to'):
+            query = query.filter(payment_date__lte=datetime.strptime(filters['date_to'], '%Y-%m-%d').date())
+        return list(query.order_by('-payment_date', '-id')[:limit])
+
+    @staticmethod
+    def search(request, data):
+        filters = {
+            key: str(data.get(key, '')).strip()
+            for key in ('reference', 'batch', 'payment_method', 'amount', 'date_from', 'date_to')
+        }
+        try:
+            limit = max(1, min(int(data.get('limit') or 50), 200))
+        except (TypeError, ValueError):
+            return JsonResponse({'success': False, 'message': 'limit must be a whole number'}, status=400)
+        try:
+            rows = PaymentAllocationService.search_payments(filters, limit)
+        except (InvalidOperation, ValueError) as e:
+            return JsonResponse({'success': False, 'message': f'Invalid filter: {e}'}, status=400)
+
+        methods = dict(AccountingBatchPayment.PAYMENT_METHOD_CHOICES)
+        data = [{
+            'payment_method': row.payment_method,
+            'payment_method_display': methods.get(row.payment_method, row.payment_method),
+            'record_id': row.record_id,
+            'batch_payment': row.batch_payment,
+            'reference_number': row.reference_number,
+            'amount': float(row.amount),
+            'amount_display': format_rupiah(row.amount),
+            'payment_date': row.payment_date.isoformat() if row.payment_date else None,
+        } for row in rows]
+        return JsonResponse({'success': True, 'data': {'payments': data, 'count': len(data)}})
+
+
+# Class Service for reconciling bank statements against open receivables
+class BankStatementImporter:
+    """
+    Stream-parse a bank statement CSV and settle the open receivables it pays.
+
+    Open receivables are held in a hash index on (amount, reference); statement
+    lines are read one at a time and matches are written per chunk, so memory is
+    bounded by the number of open receivables and the chunk size, not by the
+    statement length. Unmatched lines are written to `unmatched_out`.
+    """
+
+    # Accepted header names per column (lowercase)
+    COLUMN_ALIASES = {
+        'date': ['date', 'transaction_date', 'tanggal'],
+        'amount': ['amount', 'credit', 'kredit', 'nominal'],
+        'reference': ['reference', 'reference_number', 'ref', 'berita'],
+        'account_number': ['account_number', 'no_rekening'],
+        'account_name': ['account_name', 'nama'],
+    }
+    DATE_FORMATS = ['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d/%m/%y']
+    PREVIEW_SIZE = 100
+
+    def __init__(self, bank_name='', chunk_size=1000):
+        self.bank_name = bank_name
+        self.chunk_size = chunk_size
+        self.batch = None
+        self.index = {}
+        self.summary = {'lines': 0, 'matched': 0, 'unmatched': 0, 'matched_amount': Decimal('0')}
+        self.unmatched_preview = []
+        # Statement dates repeat a lot; strptime is the hot spot on long files
+        self._dates = {}
+
+    @staticmethod
+    def _normalize_reference(value):
+        return ''.join(str(value or '').split()).upper()
+
+    @staticmethod
+    def _parse_amount(value):
+        """Parse '1.250.000,00', '1,250,000.00', 'Rp 1250000' ... into Decimal"""
+        value = str(value or '').upper().replace('RP', '').replace(' ', '').strip()
+        if ',' in value and '.' in value:
+            # Whichever separator comes last is the decimal separator
+            if value.rfind(',') > value.rfind('.'):
+                value = value.replace('.', '').replace(',', '.')
+            else:
+                value = value.replace(',', '')
+        elif ',' in value:
+            head, _, tail = value.rpartition(',')
+            value = f'{head}.{tail}' if len(tail) == 2 else value.replace(',', '')
+        elif value.count('.') > 1 or (value.count('.') == 1 and len(value.rpartition('.')[2]) == 3):
+            value = value.replace('.', '')
+        try:
+            return Decimal(value).quantize(Decimal('0.01'))
+        except InvalidOperation:
+            raise ValueError(f'Invalid amount: {value}')
+
+    def _parse_date(self, value):
+        value = str(value or '').strip()
+        if not value:
+            return None
+        if value in self._dates:
+            return self._dates[value]
+
+        for fmt in self.DATE_FORMATS:
+            try:
+                parsed = datetime.strptime(value, fmt).date()
+            except ValueError:
+                continue
+            if len(self._dates) >= 10000:
+                self._dates.clear()
+            self._dates[value] = parsed
+            return parsed
+        raise ValueError(f'Invalid date: {value}')
+
+    @classmethod
+    def _resolve_columns(cls, header):
+        """Map column keys to their position in the CSV header"""
+        normalized = [h.strip().lower() for h in header]
+        columns = {}
+        for key, aliases in cls.COLUMN_ALIASES.items():
+            for alias in aliases:
+                if alias in normalized:
+                    columns[key] = normalized.index(alias)
+                    break
+        missing = [key for key in ('amount', 'reference') if key not in columns]
+        if missing:
+            raise ValueError(f"Statement is missing required columns: {', '.join(missing)}")
+        return columns
+
+    def _build_index(self):
+        """Hash index of open receivables keyed on (amount, reference)"""
+        unpaid = payment_status_registry.get(name='unpaid')
+        rows = AccountingReceivablePayment.objects.filter(status_id=unpaid.id).values_list(
+            'id', 'amount', 'receivable_from', 'reference_id'
+        ).order_by(F('due_date').asc(nulls_last=True), 'id')
+
+        for receivable_id, amount, receivable_from, reference_id in rows.iterator(chunk_size=2000):
+            if not reference_id:
+                continue
+            receivable = AccountingReceivablePayment(
+                id=receivable_id, amount=amount, receivable_from=receivable_from, reference_id=reference_id
+            )
+            amount = Decimal(amount).quantize(Decimal('0.01'))
+            # A statement may quote either the raw reference or the display name (e.g. TR-12)
+            for reference in {self._normalize_reference(reference_id), self._normalize_reference(receivable.get_display_name())}:
+                self.index.setdefault((amount, reference), []).append(receivable)
+
+    def _take(self, amount, reference):
+        """Pop the oldest open receivable for a key, dropping it from every key it is indexed under"""
+        candidates = self.index.get((amount, reference))
+        if not candidates:
+            return None
+        receivable = candidates.pop(0)
+        for other in {self._normalize_reference(receivable.reference_id), self._normalize_reference(receivable.get_display_name())}:
+            others = self.index.get((amount, other))
+            if others and receivable in others:
+                others.remove(receivable)
+        return receivable
+
+    def _write_unmatched(self, writer, row, reason):
+        self.summary['unmatched'] += 1
+        if writer is not None:
+            writer.writerow(list(row) + [reason])
+        if len(self.unmatched_preview) < self.PREVIEW_SIZE:
+            self.unmatched_preview.append({'line': list(row), 'reason': reason})
+
+    def _flush(self, matches, writer):
+        """Write one chunk of matches: transfer records, allocations and status changes"""
+        if not matches:
+            return
+
+        unpaid = payment_status_registry.get(name='unpaid')
+        with db_transaction.atomic():
+            # Receivables settled elsewhere since the index was built are no longer open
+            still_open = set(AccountingReceivablePayment.objects.select_for_update().filter(
+                id__in=[receivable.id for receivable, _, _ in matches], status_id=unpaid.id
+            ).values_list('id', flat=True))
+
+            settled = []
+            records = []
+            for receivable, row, line in matches:
+                if receivable.id not in still_open:
+                    self._write_unmatched(writer, row, 'receivable already settled')
+                    continue
+
+                if self.batch is None:
+                    self.batch = AccountingBatchPayment.objects.create(
+                        batch_number=f"BS-{timezone.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:6]}",
+                        total_amount=0,
+                        payment_type='ar',
+                        payment_date=timezone.now().date(),
+                        payment_method='bt',
+                    )
+
+                settled.append(receivable)
+                records.append(AccountingBankTransferRecord(
+                    batch_payment=self.batch.batch_number,
+                    bank_name=self.bank_name,
+                    bank_account_number=line['account_number'],
+                    bank_account_name=line['account_name'],
+                    transfer_amount=line['record_amount'],
+                    transfer_date=line['date'],
+                    reference_number=line['reference'],
+                ))
+
+            if settled:
+                AccountingBankTransferRecord.objects.bulk_create(records, batch_size=500)
+                AccountingPaymentRecordIndex.index_records(records)
+                PaymentAllocationService.settle_receivables(self.batch, settled)
+                LedgerService.post_settlement(self.batch, sum(r.amount for r in settled))
+                self.summary['matched'] += len(settled)
+                self.summary['matched_amount'] += sum(r.amount for r in settled)
+
+        matches.clear()
+
+    def run(self, lines, unmatched_out=None):
+        """
+        Import a statement from an iterable of CSV text lines.
+
+        Returns a summary dict; unmatched lines are written to `unmatched_out`
+        (a text stream) with the original columns plus a reason column.
+        """
+        reader = csv.reader(lines)
+        try:
+            header = next(reader)
+        except StopIteration:
+            raise ValueError('Statement is empty')
+        columns = self._resolve_columns(header)
+
+        writer = csv.writer(unmatched_out) if unmatched_out is not None else None
+        if writer is not None:
+            writer.writerow(list(header) + ['reason'])
+
+        self._build_index()
+
+        def column(row, key):
+            position = columns.get(key)
+            return row[position].strip() if position is not None and position < len(row) else ''
+
+        matches = []
+        for row in reader:
+            if not any(cell.strip() for cell in row):
+                continue
+            self.summary['lines'] += 1
+
+            try:
+                line = {
+                    'amount': self._parse_amount(column(row, 'amount')),
+                    'date': self._parse_date(column(row, 'date')),
+                    'reference': column(row, 'reference')[:100],
+                    'account_number': column(row, 'account_number')[:100],
+                    'account_name': column(row, 'account_name')[:100],
+                }
+                # Transfer records hold whole amounts; never settle on a truncated one
+                line['record_amount'] = PaymentAllocationService.record_amount(line['amount'])
+            except ValueError as e:
+                self._write_unmatched(writer, row, str(e))
+                continue
+
+            receivable = self._take(line['amount'], self._normalize_reference(line['reference']))
+            if receivable is None:
+                self._write_unmatched(writer, row, 'no open receivable')
+                continue
+
+            matches.append((receivable, row, line))
+            if len(matches) >= self.chunk_size:
+                self._flush(matches, writer)
+
+        self._flush(matches, writer)
+
+        if self.batch is not None:
+            AccountingBatchPayment.objects.filter(id=self.batch.id).update(total_amount=self.summary['matched_amount'])
+
+        return dict(self.summary, batch_number=self.batch.batch_number if self.batch else None)
+
+
+# Default ledger accounts: key -> (code, name, account type)
+LEDGER_ACCOUNTS = {
+    'cash': ('1000', 'Cash', 'asset'),
+    'bank': ('1100', 'Bank', 'asset'),
+    'receivable': ('1200', 'Accounts Receivable', 'asset'),
+    'sales': ('4000', 'Sales Revenue', 'income'),
+}
+
+# Batch payment method -> ledger account key receiving the money
+PAYMENT_METHOD_ACCOUNTS = {'cs': 'cash', 'bt': 'bank', 'qr': 'bank', 'va': 'bank'}
+
+
+# Class Service for QRIS / virtual account payment notifications (webhooks)
+class PaymentNotificationService:
+    """
+    Webhook ingestion queue for provider payment notifications.
+
+    `ingest` only verifies the HMAC signature and appends the raw body to
+    AccountingPaymentNotification, so a burst of callbacks costs one insert each.
+    `process_batch` (run by the `process_payment_notifications` command) parses
+    queued notifications, writes the QRIS / VA payment records and settles the
+    matching receivables with bulk queries.
+
+    Expected JSON body: {"reference": "TR-12", "amount": 15000, "paid_at":
+    "2024-01-31T10:00:00", "transaction_id": "<provider id>"} plus "qris_code"
+    (QRIS) or "bank_name" and "virtual_account_number" (VA).
+    """
+
+    SIGNATURE_HEADER = 'X-Signature'
+
+    @staticmethod
+    def sign(body, secret=None):
+        """Hex HMAC-SHA256 of a raw request body"""
+        secret = secret if secret is not None else getattr(settings, 'PAYMENT_WEBHOOK_SECRET', '')
+        return hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+
+    @staticmethod
+    def ingest(request, provider):
+        """Verify and queue one notification; parsing is left to the batch worker"""
+        if provider not in dict(AccountingPaymentNotification.PROVIDER_CHOICES):
+            return JsonResponse({'success': False, 'message': f'Unknown provider: {provider}'}, status=404)
+        if not getattr(settings, 'PAYMENT_WEBHOOK_SECRET', ''):
+            return JsonResponse({'success': False, 'message': 'Payment webhook is not configured'}, status=503)
+
+        body = request.body
+        signature = request.headers.get(PaymentNotificationService.SIGNATURE_HEADER, '')
+        if not hmac.compare_digest(signature, PaymentNotificationService.sign(body)):
+            return JsonResponse({'success': False, 'message': 'Invalid signature'}, status=401)
+
+        AccountingPaymentNotification.objects.create(provider=provider, body=body.decode('utf-8', 'replace'))
+        return JsonResponse({'success': True})
+
+    @staticmethod
+    def _parse(notification):
+        """Return (source, reference_id, amount, payment_date, payload) or raise ValueError"""
+        try:
+            payload = json.loads(notification.body)
+        except json.JSONDecodeError as e:
+            raise ValueError(f'Invalid JSON: {e}')
+        if not isinstance(payload, dict):
+            raise ValueError('Body must be a JSON object')
+
+        reference = str(payload.get('reference', '')).strip()
+        source, _, reference_id = reference.partition('-')
+        if not reference_id or source.lower() not in dict(AccountingReceivablePayment.INCOME_VARIANT):
+            raise ValueError(f'Invalid reference: {reference!r}')
+
+        try:
+            amount = Decimal(str(payload.get('amount')))
+        except InvalidOperation:
+            raise ValueError(f"Invalid amount: {payload.get('amount')!r}")
+        if not amount.is_finite():
+            raise ValueError(f"Invalid amount: {payload.get('amount')!r}")
+        # Fail the notification rather than record a truncated amount
+        PaymentAllocationService.record_amount(amount)
+
+        paid_at = payload.get('paid_at')
+        payment_date = datetime.fromisoformat(str(paid_at)).date() if paid_at else timezone.now().date()
+        return source.lower(), reference_id, amount, payment_date, payload
+
+    @staticmethod
+    def _record(provider, batch, payload, amount, payment_date):
+        reference_number = str(payload.get('transaction_id') or payload.get('reference'))[:100]
+        if provider == 'qr':
+            return AccountingQRISPaymentRecord(
+                batch_payment=batch.batch_number,
+                qris_code=str(payload.get('qris_code', ''))[:100],
+                payment_amount=PaymentAllocationService.record_amount(amount),
+                payment_date=payment_date,
+                reference_number=reference_number,
+            )
+        return AccountingVirtualAccountPaymentRecord(
+            batch_payment=batch.batch_number,
+            bank_name=str(payload.get('bank_name', ''))[:100],
+            virtual_account_number=str(payload.get('virtual_account_number', ''))[:100],
+            payment_amount=PaymentAllocationService.record_amount(amount),
+            payment_date=payment_date,
+            reference_number=reference_number,
+        )
+
+    @staticmethod
+    def process_batch(batch_size=200):
+        """
+        Settle one batch of queued notifications in a single DB transaction.
+
+        Each notification must pay one open receivable in full; anything else is
+        marked unmatched (or invalid when it cannot be parsed) with the reason.
+        """
+        unpaid = payment_status_registry.get(name='unpaid')
+        summary = {'settled': 0, 'unmatched': 0, 'invalid': 0}
+
+        with db_transaction.atomic():
+            notifications = list(AccountingPaymentNotification.objects.select_for_update(skip_locked=True).filter(
+                status='pending'
+            ).order_by('id')[:batch_size])
+            if not notifications:
+                return summary
+
+            now = timezone.now()
+            parsed = {}
+            for notification in notifications:
+                notification.processed_at = now
+                try:
+                    parsed[notification.id] = PaymentNotificationService._parse(notification)
+                except ValueError as e:
+                    notification.status = 'invalid'
+                    notification.error = str(e)[:200]
+
+            # One locked lookup for every referenced receivable that is still open
+            lookup = Q(pk__in=[])
+            for source, reference_id, _, _, _ in parsed.values():
+                lookup |= Q(receivable_from=source, reference_id=reference_id)
+            open_receivables = {
+                (r.receivable_from, r.reference_id): r
+                for r in AccountingReceivablePayment.objects.select_for_update().filter(lookup, status_id=unpaid.id)
+            }
+
+            batches = {}
+            settled = {}
+            records = {}
+            for notification in notifications:
+                if notification.id not in parsed:
+                    continue
+                source, reference_id, amount, payment_date, payload = parsed[notification.id]
+                receivable = open_receivables.pop((source, reference_id), None)
+                if receivable is None:
+                    notification.status = 'unmatched'
+                    notification.error = 'No open receivable for reference'
+                    continue
+                if receivable.amount != amount:
+                    open_receivables[(source, reference_id)] = receivable
+                    notification.status = 'unmatched'
+                    notification.error = f'Amount {amount} does not match receivable amount {receivable.amount}'
+                    continue
+
+                provider = notification.provider
+                if provider not in batches:
+                    batches[provider] = AccountingBatchPayment.objects.create(
+                        batch_number=PaymentAllocationService._generate_batch_number(provider),
+                        total_amount=0,
+                        payment_type='ar',
+                        payment_date=now.date(),
+                        payment_method=provider,
+                    )
+                    settled[provider] = []
+                    records[provider] = []
+                batch = batches[provider]
+                settled[provider].append(receivable)
+                records[provider].append(PaymentNotificationService._record(provider, batch, payload, amount, payment_date))
+                notification.status = 'settled'
+                notification.batch_payment = batch.batch_number
+
+            for provider, batch in batches.items():
+                record_model = PAYMENT_RECORD_MODELS[provider][0]
+                record_model.objects.bulk_create(records[provider], batch_size=500)
+                AccountingPaymentRecordIndex.index_records(records[provider])
+
+                batch.total_amount = sum(r.amount for r in settled[provider])
+                batch.save(update_fields=['total_amount'])
+                PaymentAllocationService.settle_receivables(batch, settled[provider])
+                LedgerService.post_settlement(batch, batch.total_amount)
+
+            AccountingPaymentNotification.objects.bulk_update(
+                notifications, ['status', 'error', 'batch_payment', 'processed_at'], batch_size=500
+            )
+
+        for notification in notifications:
+            summary[notification.status] += 1
+        return summary
+
+
+# Class Service for the double-entry general ledger
+class LedgerService:
+
+    @staticmethod
+    def process_post(request, json_request):
+        action = json_request.get('action')
+        if action == 'balances':
+            return LedgerService.list_balances(request)
+        elif action == 'trial_balance':
+            return LedgerService.trial_balance(request)
+        elif action == 'bank_movement':
+            return LedgerService.bank_movement(request, json_request)
+        else:
+            return JsonResponse({'success': False, 'message': f'Unknown action: {action}'}, status=400)
+
+    @staticmethod
+    def get_account(key):
+        """Return a default ledger account by key ('cash', 'bank', ...), creating it on first use"""
+        code, name, account_type = LEDGER_ACCOUNTS[key]
+        account = ledger_account_registry.get_or_none(name=code)
+        if account is None:
+            account, _ = LedgerAccount.objects.get_or_create(code=code, defaults={'name': name, 'account_type': account_type})
+            LedgerBalance.objects.get_or_create(account=account)
+        return account
+
+    @staticmethod
+    def get_bank_ledger_account(bank_account):
+        """Return the ledger account tracking a bank account, creating it on first use"""
+        account = ledger_account_registry.get_or_none(name=f'1100-{bank_account.id}')
+        if account is None:
+            account, _ = LedgerAccount.objects.get_or_create(
+                code=f'1100-{bank_account.id}',
+                defaults={'name': str(bank_account)[:100], 'account_type': 'asset', 'bank_account': bank_account}
+            )
+            LedgerBalance.objects.get_or_create(account=account)
+        return account
+
+    @staticmethod
+    def post_entry(entry_date, description, lines, source='manual', reference=''):
+        """
+        Post a balanced journal entry.
+
+        `lines` is a list of (LedgerAccount, debit, credit). Journal lines are
+        bulk-created and each account's materialized balance (and the linked
+        BankAccount.balance) is incremented in the same DB transaction.
+
+        Raises ValueError when the entry is empty or unbalanced.
+        """
+        lines = [(account, Decimal(str(debit or 0)), Decimal(str(credit or 0))) for account, debit, credit in lines]
+        total_debit = sum(debit for _, debit, _ in lines)
+        total_credit = sum(credit for _, _, credit in lines)
+        if any(debit < 0 or credit < 0 for _, debit, credit in lines):
+            raise ValueError('Journal lines cannot have negative amounts')
+        if total_debit <= 0 or total_debit != total_credit:
+            raise ValueError(f'Unbalanced journal entry: debit {total_debit}, credit {total_credit}')
+
+        # Net movement per account
+        deltas = {}
+        for account, debit, credit in lines:
+            account_debit, account_credit, _ = deltas.get(account.id, (Decimal('0'), Decimal('0'), account))
+            deltas[account.id] = (account_debit + debit, account_credit + credit, account)
+
+        with db_transaction.atomic():
+            entry = JournalEntry.objects.create(
+                entry_date=entry_date,
+                description=description[:200],
+                source=source,
+                reference=str(reference)[:100],
+            )
+            JournalLine.objects.bulk_create([
+                JournalLine(entry=entry, account_id=account.id, debit=debit, credit=credit)
+                for account, debit, credit in lines
+            ])
+
+            for account_id, (debit, credit, account) in deltas.items():
+                movement = debit - credit if account.is_debit_normal() else credit - debit
+                increments = {
+                    'debit_total': F('debit_total') + debit,
+                    'credit_total': F('credit_total') + credit,
+                    'balance': F('balance') + movement,
+                }
+                if not LedgerBalance.objects.filter(account_id=account_id).update(**increments):
+                    # Account created after the balances were built: add its row first
+                    LedgerBalance.objects.bulk_create([LedgerBalance(account_id=account_id)], ignore_conflicts=True)
+                    LedgerBalance.objects.filter(account_id=account_id).update(**increments)
+                if account.bank_account_id:
+                    BankAccount.objects.filter(id=account.bank_account_id).update(balance=F('balance') + movement)
+
+        return entry
+
+    @staticmethod
+    def post_sale(transaction, paid=False):
+        """Sale: debit cash (paid) or receivable (credit sale), credit sales revenue"""
+        amount = transaction.total_price or 0
+        if not amount:
+            return None
+        debit_account = LedgerService.get_account('cash' if paid else 'receivable')
+        transaction_date = transaction.transaction_date or timezone.now()
+        return LedgerService.post_entry(
+            entry_date=transaction_date.date(),
+            description=f'Sale TR-{transaction.id} {transaction.customer_name or ""}'.strip(),
+            lines=[(debit_account, amount, 0), (LedgerService.get_account('sales'), 0, amount)],
+            source='sale',
+            reference=f'TR-{transaction.id}',
+        )
+
+    @staticmethod
+    def post_payment_status_change(transaction, paid):
+        """Transaction marked paid: debit cash, credit receivable (reversed when marked unpaid)"""
+        amount = transaction.total_price or 0
+        if not amount:
+            return None
+        cash = LedgerService.get_account('cash')
+        receivable = LedgerService.get_account('receivable')
+        lines = [(cash, amount, 0), (receivable, 0, amount)] if paid else [(receivable, amount, 0), (cash, 0, amount)]
+        return LedgerService.post_entry(
+            entry_date=timezone.now().date(),
+            description=f"TR-{transaction.id} marked {'paid' if paid else 'unpaid'}",
+            lines=lines,
+            source='settlement',
+            reference=f'TR-{transaction.id}',
+        )
+
+    @staticmethod
+    def post_settlement(batch, amount):
+        """Batch payment settling receivables: debit cash/bank, credit receivable"""
+        if not amount:
+            return None
+        debit_account = LedgerService.get_account(PAYMENT_METHOD_ACCOUNTS.get(batch.payment_method, 'bank'))
+        return LedgerService.post_entry(
+            entry_date=batch.payment_date or timezone.now().date(),
+            description=f'Receivable settlement {batch.batch_number}',
+            lines=[(debit_account, amount, 0), (LedgerService.get_account('receivable'), 0, amount)],
+            source='settlement',
+            reference=batch.batch_number,
+        )
+
+    @staticmethod
+    def post_bank_movement(bank_account, amount, direction, description='', counter_key='cash', entry_date=None):
+        """Money moving in or out of a bank account against a counter account (cash by default)"""
+        bank = LedgerService.get_bank_ledger_account(bank_account)
+        counter = LedgerService.get_account(counter_key)
+        lines = [(bank, amount, 0), (counter, 0, amount)] if direction == 'in' else [(counter, amount, 0), (bank, 0, amount)]
+        return LedgerService.post_entry(
+            entry_date=entry_date or timezone.now().date(),
+            description=description or f"Bank {'deposit' if direction == 'in' else 'withdrawal'} {bank_account.account_number}",
+            lines=lines,
+            source='bank',
+            reference=bank_account.account_number,
+        )
+
+    @staticmethod
+    def bank_movement(request, data):
+        """Record a deposit to or withdrawal from a bank account"""
+        bank_account_id = data.get('bank_account_id')
+        direction = data.get('direction')
+        counter_key = data.get('counter_account', 'cash')
+
+        if not bank_account_id or direction not in ('in', 'out') or counter_key not in LEDGER_ACCOUNTS:
+            return JsonResponse({'success': False, 'message': 'Bank account, direction (in/out) and a valid counter account are required'}, status=400)
+
+        try:
+            bank_account = BankAccount.objects.select_related('bank').get(id=bank_account_id)
+            entry = LedgerService.post_bank_movement(
+                bank_account,
+                Decimal(str(data.get('amount'))),
+                direction,
+                description=data.get('description', ''),
+                counter_key=counter_key,
+                entry_date=data.get('date') or None,
+            )
+        except BankAccount.DoesNotExist:
+            return JsonResponse({'success': False, 'message': 'Bank account not found'}, status=404)
+        except (InvalidOperation, ValueError) as e:
+            return JsonResponse({'success': False, 'message': f'Invalid amount: {e}'}, status=400)
+
+        bank_account.refresh_from_db(fields=['balance'])
+        return JsonResponse({
+            'success': True,
+            'message': 'Bank movement recorded',
+            'data': {'entry_id': entry.id, 'balance': format_rupiah(bank_account.balance)}
+        })
+
+    @staticmethod
+    @use_replica()
+    def list_balances(request):
+        """Return materialized balances for every ledger account"""
+        balances = LedgerBalance.objects.select_related('account').order_by('account__code')
+        data = [{
+            'code': b.account.code,
+            'name': b.account.name,
+            'account_type': b.account.account_type,
+            'balance': float(b.balance),
+            'balance_display': format_rupiah(b.balance),
+        } for b in balances]
+        return JsonResponse({'success': True, 'data': {'balances': data}})
+
+    @staticmethod
+    @use_replica()
+    def trial_balance(request):
+        """Trial balance from the materialized balance rows, without scanning the journal"""
+        balances = LedgerBalance.objects.select_related('account').order_by('account__code')
+        rows = []
+        total_debit = Decimal('0')
+        total_credit = Decimal('0')
+        for b in balances:
+            net = b.debit_total - b.credit_total
+            debit = net if net > 0 else Decimal('0')
+            credit = -net if net < 0 else Decimal('0')
+            total_debit += debit
+            total_credit += credit
+            rows.append({
+                'code': b.account.code,
+                'name': b.account.name,
+                'debit': float(debit),
+                'credit': float(credit),
+            })
+        return JsonResponse({
+            'success': True,
+            'data': {
+                'accounts': rows,
+                'total_debit': float(total_debit),
+                'total_credit': float(total_credit),
+                'balanced': total_debit == total_credit,
+            }
+        })
+
+
+class PeriodCloseService:
+    """
+    Month-end close for financial reporting.
+
+    Closing a month freezes its sales (by term and status), receivables
+    opened/settled and bank balances into snapshot rows. Reports read closed
+    months from the snapshots and aggregate live rows only for open months, so
+    their cost stays flat as history grows. Months are closed in sequence and
+    only the latest closed month can be reopened.
+    """
+
+    MAX_REPORT_MONTHS = 240
+
+    @staticmethod
+    def process_post(request, json_request):
+        action = json_request.get('action')
+        if action == 'close':
+            return PeriodCloseService.close(request, json_request)
+        elif action == 'reopen':
+            return PeriodCloseService.reopen(request, json_request)
+        elif action == 'report':
+            return PeriodCloseService.report(request, json_request)
+        else:
+            return JsonResponse({'success': False, 'message': f'Unknown action: {action}'}, status=400)
+
+    @staticmethod
+    def _parse_period(value):
+        """'YYYY-MM' -> (year, month)"""
+        year, month = str(value).strip().split('-')[:2]
+        year, month = int(year), int(month)
+        if not 1 <= month <= 12:
+            raise ValueError(f'Invalid month: {value}')
+        return year, month
+
+    @staticmethod
+    def _next_month(year, month):
+        return (year + 1, 1) if month == 12 else (year, month + 1)
+
+    @staticmethod
+    def _bounds(year, month):
+        """First day of the month and first day of the next month"""
+        return date(year, month, 1), date(*PeriodCloseService._next_month(year, month), 1)
+
+    @staticmethod
+    def _as_datetime(day):
+        value = datetime.combine(day, time.min)
+        return timezone.make_aware(value) if settings.USE_TZ else value
+
+    @staticmethod
+    def _month_key(value):
+        return (value.year, value.month)
+
+    @staticmethod
+    def _live_months(start, end):
+        """Aggregate live rows in [start, end) per month, one query per figure"""
+        months = {}
+
+        def month(key):
+            return months.setdefault(key, {
+                'sales': [],
+                'receivables': {'opened_count': 0, 'opened_amount': Decimal('0'), 'settled_count': 0, 'settled_amount': Decimal('0')},
+                'bank_movement': {},
+            })
+
+        if Transaction is not None:
+            sales = Transaction.objects.filter(
+                transaction_date__gte=PeriodCloseService._as_datetime(start),
+                transaction_date__lt=PeriodCloseService._as_datetime(end),
+            ).annotate(period=TruncMonth('transaction_date')).values(
+                'period', 'payment_term__name', 'tmp_status__name'
+            ).annotate(count=Count('id'), total=Sum('total_price')).order_by()
+            for row in sales:
+                month(PeriodCloseService._month_key(row['period']))['sales'].append({
+                    'term': row['payment_term__name'] or '',
+                    'status': row['tmp_status__name'] or '',
+                    'count': row['count'],
+                    'total': row['total'] or Decimal('0'),
+                })
+
+        # Receivables from before created_at existed are dated by their source transaction
+        opened_at = F('created_at')
+        if Transaction is not None:
+            opened_at = Coalesce('created_at', Case(
+                When(receivable_from='tr', then=Subquery(
+                    Transaction.objects.filter(
+                        id=Cast(OuterRef('reference_id'), IntegerField())
+                    ).values('transaction_date')[:1]
+                )),
+                default=None,
+                output_field=DateTimeField(),
+            ), output_field=DateTimeField())
+        opened = AccountingReceivablePayment.objects.annotate(opened_at=opened_at).filter(
+            opened_at__gte=PeriodCloseService._as_datetime(start),
+            opened_at__lt=PeriodCloseService._as_datetime(end),
+        ).annotate(period=TruncMonth('opened_at')).values('period').annotate(
+            count=Count('id'), total=Sum('amount')
+        ).order_by()
+        for row in opened:
+            receivables = month(PeriodCloseService._month_key(row['period']))['receivables']
+            receivables['opened_count'] = row['count']
+            receivables['opened_amount'] = row['total'] or Decimal('0')
+
+        settled = AccountingPaymentAllocation.objects.filter(
+            batch_payment__payment_date__gte=start,
+            batch_payment__payment_date__lt=end,
+        ).annotate(period=TruncMonth('batch_payment__payment_date')).values('period').annotate(
+            count=Count('receivable', distinct=True), total=Sum('amount')
+        ).order_by()
+        for row in settled:
+            receivables = month(PeriodCloseService._month_key(row['period']))['receivables']
+            receivables['settled_count'] += row['count']
+            receivables['settled_amount'] += row['total'] or Decimal('0')
+
+        # POS paid/unpaid toggles settle without allocations; their ledger entries
+        # (reference TR-<id>) credit the receivable, a toggle back debits it
+        toggles = JournalLine.objects.filter(
+            account__code=LEDGER_ACCOUNTS['receivable'][0],
+            entry__source='settlement',
+            entry__reference__startswith='TR-',
+            entry__entry_date__gte=start,
+            entry__entry_date__lt=end,
+        ).annotate(period=TruncMonth('entry__entry_date')).values('period', 'entry__reference').annotate(
+            credit=Sum('credit'), debit=Sum('debit')
+        ).order_by()
+        for row in toggles:
+            receivables = month(PeriodCloseService._month_key(row['period']))['receivables']
+            net = (row['credit'] or Decimal('0')) - (row['debit'] or Decimal('0'))
+            receivables['settled_amount'] += net
+            if net > 0:
+                receivables['settled_count'] += 1
+
+        movements = JournalLine.objects.filter(
+            account__bank_account__isnull=False,
+            entry__entry_date__gte=start,
+            entry__entry_date__lt=end,
+        ).annotate(period=TruncMonth('entry__entry_date')).values(
+            'period', 'account__bank_account_id'
+        ).annotate(debit=Sum('debit'), credit=Sum('credit')).order_by()
+        for row in movements:
+            month(PeriodCloseService._month_key(row['period']))['bank_movement'][row['account__bank_account_id']] = (
+                (row['debit'] or Decimal('0')) - (row['credit'] or Decimal('0'))
+            )
+
+        return months
+
+    @staticmethod
+    def _bank_balances_before(day):
+        """Bank balances from the journal up to (not including) a day"""
+        rows = JournalLine.objects.filter(
+            account__bank_account__isnull=False,
+            entry__entry_date__lt=day,
+        ).values('account__bank_account_id').annotate(debit=Sum('debit'), credit=Sum('credit')).order_by()
+        return {
+            row['account__bank_account_id']: (row['debit'] or Decimal('0')) - (row['credit'] or Decimal('0'))
+            for row in rows
+        }
+
+    @staticmethod
+    def close_period(year, month, user=None):
+        """Freeze one month into snapshot rows and return the AccountingPeriod"""
+        start, end = PeriodCloseService._bounds(year, month)
+        if end > timezone.now().date():
+            raise ValidationError('Only months that have already ended can be closed')
+
+        with db_transaction.atomic():
+            last = AccountingPeriod.objects.select_for_update().order_by('-year', '-month').first()
+            if last and (last.year, last.month) >= (year, month):
+                raise ValidationError(f'{year}-{month:02d} is already closed or precedes the last closed period {last}')
+            if last and (year, month) != PeriodCloseService._next_month(last.year, last.month):
+                expected = PeriodCloseService._next_month(last.year, last.month)
+                raise ValidationError(f'Periods are closed in sequence, close {expected[0]}-{expected[1]:02d} first')
+
+            live = PeriodCloseService._live_months(start, end).get((year, month), {})
+            receivables = live.get('receivables', {})
+            movement = live.get('bank_movement', {})
+            if last:
+                opening = {b.bank_account_id: b.closing_balance for b in last.bank_balances.all()}
+            else:
+                opening = PeriodCloseService._bank_balances_before(start)
+
+            period = AccountingPeriod.objects.create(
+                year=year,
+                month=month,
+                closed_by=user if user is not None and user.is_authenticated else None,
+                receivables_opened_count=receivables.get('opened_count', 0),
+                receivables_opened_amount=receivables.get('opened_amount', 0),
+                receivables_settled_count=receivables.get('settled_count', 0),
+                receivables_settled_amount=receivables.get('settled_amount', 0),
+            )
+            PeriodSalesSnapshot.objects.bulk_create([
+                PeriodSalesSnapshot(
+                    period=period,
+                    term_name=row['term'],
+                    status_name=row['status'],
+                    transaction_count=row['count'],
+                    total_amount=row['total'],
+                ) for row in live.get('sales', [])
+            ])
+            PeriodBankSnapshot.objects.bulk_create([
+                PeriodBankSnapshot(
+                    period=period,
+                    bank_account_id=bank_account_id,
+                    movement=movement.get(bank_account_id, Decimal('0')),
+                    closing_balance=opening.get(bank_account_id, Decimal('0')) + movement.get(bank_account_id, Decimal('0')),
+                ) for bank_account_id in sorted(set(opening) | set(movement))
+            ])
+
+        print(f"Closed accounting period {period}")
+        return period
+
+    @staticmethod
+    def close(request, data):
+        try:
+            year, month = PeriodCloseService._parse_period(data.get('period', ''))
+            period = PeriodCloseService.close_period(year, month, user=request.user)
+        except ValueError as e:
+            return JsonResponse({'success': False, 'message': f'Invalid period: {e}'}, status=400)
+        except ValidationError as e:
+            return JsonResponse({'success': False, 'message': e.messages[0]}, status=400)
+
+        return JsonResponse({
+            'success': True,
+            'message': f'Period {period} closed',
+            'data': {'period': str(period), 'closed_at': period.closed_at.isoformat()}
+        })
+
+    @staticmethod
+    def reopen(request, data):
+        """Drop the snapshot of the latest closed period so it can be corrected and closed again"""
+        try:
+            year, month = PeriodCloseService._parse_period(data.get('period', ''))
+        except ValueError as e:
+            return JsonResponse({'success': False, 'message': f'Invalid period: {e}'}, status=400)
+
+        with db_transaction.atomic():
+            last = AccountingPeriod.objects.select_for_update().order_by('-year', '-month').first()
+            if last is None or (last.year, last.month) != (year, month):
+                return JsonResponse({'success': False, 'message': 'Only the latest closed period can be reopened'}, status=400)
+            last.delete()
+
+        print(f"Reopened accounting period {year}-{month:02d}")
+        return JsonResponse({'success': True, 'message': f'Period {year}-{month:02d} reopened'})
+
+    @staticmethod
+    @use_replica()
+    def build_report(start_period, end_period):
+        """
+        Monthly sales, receivables and bank balances for an inclusive range of
+        (year, month) tuples: snapshots for closed months, live rows otherwise.
+        """
+        months = [start_period]
+        while months[-1] < end_period:
+            months.append(PeriodCloseService._next_month(*months[-1]))
+            if len(months) > PeriodCloseService.MAX_REPORT_MONTHS:
+                raise ValueError(f'Report range is limited to {PeriodCloseService.MAX_REPORT_MONTHS} months')
+
+        start_date = PeriodCloseService._bounds(*start_period)[0]
+        end_date = PeriodCloseService._bounds(*end_period)[1]
+
+        bounds = AccountingPeriod.objects.order_by('year', 'month')
+        first_closed = bounds.values_list('year', 'month').first()
+        last_closed = bounds.reverse().values_list('year', 'month').first()
+
+        closed = {}
+        live_ranges = [(start_date, end_date)]
+        if first_closed:
+            closed = {
+                (p.year, p.month): p for p in AccountingPeriod.objects.filter(
+                    Q(year__gt=start_period[0]) | Q(year=start_period[0], month__gte=start_period[1]),
+                    Q(year__lt=end_period[0]) | Q(year=end_period[0], month__lte=end_period[1]),
+                ).prefetch_related('sales', 'bank_balances')
+            }
+            # Closed periods are contiguous, so open months sit before or after them
+            live_ranges = []
+            if start_period < first_closed:
+                live_ranges.append((start_date, min(end_date, PeriodCloseService._bounds(*first_closed)[0])))
+            if end_period > last_closed:
+                live_ranges.append((max(start_date, PeriodCloseService._bounds(*last_closed)[1]), end_date))
+
+        live = {}
+        for range_start, range_end in live_ranges:
+            live.update(PeriodCloseService._live_months(range_start, range_end))
+
+        bank_names = {b.id: str(b) for b in BankAccount.objects.select_related('bank')}
+        report = []
+        totals = {'sales': Decimal('0'), 'receivables_opened': Decimal('0'), 'receivables_settled': Decimal('0')}
+        running = None
+
+        for key in months:
+            period = closed.get(key)
+            if period is not None:
+                sales = [{
+                    'term': s.term_name,
+                    'status': s.status_name,
+                    'count': s.transaction_count,
+                    'total': s.total_amount,
+                } for s in period.sales.all()]
+                receivables = {
+                    'opened_count': period.receivables_opened_count,
+                    'opened_amount': period.receivables_opened_amount,
+                    'settled_count': period.receivables_settled_count,
+                    'settled_amount': period.receivables_settled_amount,
+                }
+                movement = {b.bank_account_id: b.movement for b in period.bank_balances.all()}
+                running = {b.bank_account_id: b.closing_balance for b in period.bank_balances.all()}
+            else:
+                month = live.get(key, {})
+                sales = month.get('sales', [])
+                receivables = month.get('receivables', {
+                    'opened_count': 0, 'opened_amount': Decimal('0'), 'settled_count': 0, 'settled_amount': Decimal('0'),
+                })
+                movement = month.get('bank_movement', {})
+                if running is None:
+                    if last_closed and key > last_closed:
+                        last = AccountingPeriod.objects.get(year=last_closed[0], month=last_closed[1])
+                        running = {b.bank_account_id: b.closing_balance for b in last.bank_balances.all()}
+                    else:
+                        running = PeriodCloseService._bank_balances_before(PeriodCloseService._bounds(*key)[0])
+                running = dict(running)
+                for bank_account_id, amount in movement.items():
+                    running[bank_account_id] = running.get(bank_account_id, Decimal('0')) + amount
+
+            sales_total = sum((row['total'] for row in sales), Decimal('0'))
+            totals['sales'] += sales_total
+            totals['receivables_opened'] += receivables['opened_amount']
+            totals['receivables_settled'] += receivables['settled_amount']
+
+            report.append({
+                'period': f'{key[0]}-{key[1]:02d}',
+                'closed': period is not None,
+                'sales': [dict(row, total=float(row['total'])) for row in sales],
+                'sales_total': float(sales_total),
+                'receivables': {
+                    'opened_count': receivables['opened_count'],
+                    'opened_amount': float(receivables['opened_amount']),
+                    'settled_count': receivables['settled_count'],
+                    'settled_amount': float(receivables['settled_amount']),
+                },
+                'bank_balances': [{
+                    'bank_account_id': bank_account_id,
+                    'bank_account': bank_names.get(bank_account_id, ''),
+                    'movement': float(movement.get(bank_account_id, 0)),
+                    'closing_balance': float(balance),
+                } for bank_account_id, balance in sorted(running.items())],
+            })
+
+        return {
+            'months': report,
+            'totals': {k: float(v) for k, v in totals.items()},
+        }
+
+    @staticmethod
+    def report(request, data):
+        try:
+            start_period = PeriodCloseService._parse_period(data.get('from', ''))
+            end_period = PeriodCloseService._parse_period(data.get('to', '') or data.get('from', ''))
+            if end_period < start_period:
+                raise ValueError('"to" must not be before "from"')
+            report = PeriodCloseService.build_report(start_period, end_period)
+        except ValueError as e:
+            return JsonResponse({'success': False, 'message': f'Invalid period: {e}'}, status=400)
+
+        return JsonResponse({'success': True, 'data': report})
+
+
+class TransactionSyncService:
+    """
+    Applies product transaction events from the product outbox.
+
+    Handlers are idempotent: the receivable is looked up by its source link and
+    the sale is only posted when no ledger entry exists for it yet.
+    """
+
+    @staticmethod
+    def transaction_created(transaction_id):
+        """Create the receivable and post the sale for a product transaction"""
+        transaction = Transaction.objects.select_related('tmp_status', 'payment_term').get(id=transaction_id)
+
+        if not AccountingReceivablePayment.objects.for_transaction(transaction.id).exists():
+            receivable = AccountingReceivablePayment.objects.create(
+                receivable_from='tr',  # 'tr' for Transaction
+                reference_id=str(transaction.id),
+                amount=transaction.total_price,
+                due_date=transaction.due_date,
+                status=accounting_status_map.get(transaction.tmp_status),
+                term=accounting_term_map.get(transaction.payment_term)
+            )
+            print(f"Created receivable record {receivable.id} for transaction {transaction.id}")
+
+        if not JournalEntry.objects.filter(source='sale', reference=f'TR-{transaction.id}').exists():
+            LedgerService.post_sale(transaction, paid=transaction.tmp_status.name == 'paid')
+
+    @staticmethod
+    def transaction_status_changed(transaction_id, paid=None):
+        """
+        Mirror a paid/unpaid toggle onto the receivable and the ledger.
+
+        Events can run out of order (retries, rows skipped while locked), so
+        the transaction's current status is applied, not the `paid` flag the
+        event was queued with. A stale event then finds nothing to change.
+        """
+        receivable = AccountingReceivablePayment.objects.select_for_update().for_transaction(transaction_id).first()
+        if receivable is None:
+            # Created before the sale reached accounting - catch up instead
+            TransactionSyncService.transaction_created(transaction_id)
+            return
+
+        # Read under the receivable lock, after any toggle handled before this one
+        transaction = Transaction.objects.select_for_update(of=('self',)).select_related('tmp_status', 'payment_term').get(id=transaction_id)
+        paid = transaction.tmp_status.name == 'paid'
+        status = accounting_status_map.get('paid' if paid else 'unpaid')
+        if receivable.status_id == status.id:
+            return
+        receivable.status = status
+        receivable.save(update_fields=['status'])
+        LedgerService.post_payment_status_change(transaction, paid=paid)
+
 
 class MasterDataService:
 
@@ -108,14 +1808,12 @@ class MasterDataService:
 
     @staticmethod
     def get_payment_statuses(request):
-        from .models import AccountingPaymentStatus
-        statuses = AccountingPaymentStatus.objects.all()
+        statuses = payment_status_registry.all()
         data = [{'id': s.id, 'name': s.name, 'display_name': s.display_name} for s in statuses]
         return JsonResponse({'success': True, 'data': data})
 
     @staticmethod
     def get_payment_terms(request):
-        from .models import AccountingPaymentTerm
-        terms = AccountingPaymentTerm.objects.all()
+        terms = payment_term_registry.all()
         data = [{'id': t.id, 'name': t.name, 'display_name': t.display_name} for t in terms]
         return JsonResponse({'success': True, 'data': data})
\ No newline at end of file
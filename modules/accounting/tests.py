@@ -0,0 +1,223 @@
+import json
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase, RequestFactory, override_settings
+
+from .models import (
+    AccountingPaymentStatus, AccountingPaymentTerm, AccountingReceivablePayment, AccountingBatchPayment,
+    AccountingPaymentAllocation, AccountingCashPaymentRecord, AccountingQRISPaymentRecord, AccountingPaymentNotification,
+)
+from .registry import payment_status_registry, payment_term_registry, ledger_account_registry
+from .services import PaymentAllocationService, PaymentNotificationService
+
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+WEBHOOK_SECRET = 'test-secret'
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class AccountingTestCase(TestCase):
+    """Payment statuses and a term, with the master data registries reset for each test"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.paid = AccountingPaymentStatus.objects.create(name='paid', display_name='Paid')
+        cls.unpaid = AccountingPaymentStatus.objects.create(name='unpaid', display_name='Unpaid')
+        cls.term = AccountingPaymentTerm.objects.create(name='cash', display_name='Cash')
+
+    def setUp(self):
+        # Registry version stamps only move on commit, which never happens inside a TestCase
+        cache.clear()
+        for registry in (payment_status_registry, payment_term_registry, ledger_account_registry):
+            registry.reload()
+
+    def create_receivable(self, amount, days_overdue=0, reference_id='', receivable_from='etc', status=None):
+        return AccountingReceivablePayment.objects.create(
+            receivable_from=receivable_from,
+            reference_id=reference_id,
+            amount=Decimal(amount),
+            due_date=date.today() - timedelta(days=days_overdue),
+            status=status or self.unpaid,
+            term=self.term,
+        )
+
+
+class PaymentAllocationTests(AccountingTestCase):
+
+    def test_settles_oldest_due_date_first(self):
+        oldest = self.create_receivable(100, days_overdue=10)
+        older = self.create_receivable(50, days_overdue=5)
+        newest = self.create_receivable(70, days_overdue=1)
+
+        result = PaymentAllocationService.allocate_payment(160, 'cs', details={'cash_received_by': 'admin'})
+
+        self.assertEqual(result['settled_receivables'], [oldest.id, older.id])
+        self.assertEqual(result['allocated_amount'], Decimal('150'))
+        self.assertEqual(result['unallocated_amount'], Decimal('10'))
+        self.assertEqual(
+            set(AccountingReceivablePayment.objects.filter(status=self.paid).values_list('id', flat=True)),
+            {oldest.id, older.id}
+        )
+        newest.refresh_from_db()
+        self.assertEqual(newest.status_id, self.unpaid.id)
+
+        batch = AccountingBatchPayment.objects.get(id=result['batch_id'])
+        self.assertEqual(batch.allocations.count(), 2)
+        record = AccountingCashPaymentRecord.objects.get(batch_payment=batch.batch_number)
+        self.assertEqual(record.payment_amount, 160)
+        self.assertEqual(record.cash_received_by, 'admin')
+
+    def test_receivable_ids_keep_order_and_skip_duplicates(self):
+        first = self.create_receivable(100, days_overdue=10)
+        second = self.create_receivable(70, days_overdue=1)
+
+        result = PaymentAllocationService.allocate_payment(170, 'cs', receivable_ids=[second.id, str(second.id), first.id])
+
+        self.assertEqual(result['settled_receivables'], [second.id, first.id])
+        self.assertEqual(result['unallocated_amount'], Decimal('0'))
+        self.assertEqual(AccountingPaymentAllocation.objects.filter(receivable=second).count(), 1)
+
+    def test_rejects_paid_or_unknown_receivables(self):
+        settled = self.create_receivable(100, status=self.paid)
+
+        with self.assertRaises(ValueError):
+            PaymentAllocationService.allocate_payment(100, 'cs', receivable_ids=[settled.id])
+        with self.assertRaises(ValueError):
+            PaymentAllocationService.allocate_payment(100, 'cs', receivable_ids=[settled.id + 1000])
+
+    def test_rejects_invalid_amounts(self):
+        self.create_receivable(100)
+
+        for amount in ('NaN', 'Infinity', '-100', '0', '100.50', 'abc', None):
+            with self.subTest(amount=amount), self.assertRaises(ValueError):
+                PaymentAllocationService.allocate_payment(amount, 'cs')
+
+        self.assertFalse(AccountingBatchPayment.objects.exists())
+        self.assertFalse(AccountingReceivablePayment.objects.filter(status=self.paid).exists())
+
+    def test_rejects_amount_below_every_receivable(self):
+        self.create_receivable(100)
+
+        with self.assertRaises(ValueError):
+            PaymentAllocationService.allocate_payment(99, 'cs')
+        self.assertFalse(AccountingBatchPayment.objects.exists())
+
+    def test_rejects_unknown_payment_method(self):
+        self.create_receivable(100)
+
+        with self.assertRaises(ValueError):
+            PaymentAllocationService.allocate_payment(100, 'xx')
+
+    def test_allocate_returns_400_on_invalid_input(self):
+        self.create_receivable(100)
+        request = RequestFactory().post('/accounting/api/payment/')
+
+        for data in ({'amount': 'NaN', 'payment_method': 'cs'}, {'amount': '100.50', 'payment_method': 'cs'}):
+            with self.subTest(data=data):
+                response = PaymentAllocationService.allocate(request, data)
+                self.assertEqual(response.status_code, 400)
+                self.assertFalse(json.loads(response.content)['success'])
+
+        response = PaymentAllocationService.allocate(request, {'amount': '100', 'payment_method': 'cs'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(json.loads(response.content)['success'])
+
+
+@override_settings(PAYMENT_WEBHOOK_SECRET=WEBHOOK_SECRET)
+class PaymentNotificationTests(AccountingTestCase):
+
+    def ingest(self, provider, payload, signature=None):
+        body = json.dumps(payload).encode('utf-8')
+        request = RequestFactory().post(
+            f'/accounting/webhook/payment/{provider}/', data=body, content_type='application/json',
+            HTTP_X_SIGNATURE=signature if signature is not None else PaymentNotificationService.sign(body),
+        )
+        return PaymentNotificationService.ingest(request, provider)
+
+    def queue(self, provider, payload):
+        return AccountingPaymentNotification.objects.create(provider=provider, body=json.dumps(payload))
+
+    def test_ingest_queues_signed_notification(self):
+        response = self.ingest('qr', {'reference': 'ETC-1', 'amount': 100})
+
+        self.assertEqual(response.status_code, 200)
+        notification = AccountingPaymentNotification.objects.get()
+        self.assertEqual(notification.provider, 'qr')
+        self.assertEqual(notification.status, 'pending')
+
+    def test_ingest_rejects_bad_signature(self):
+        response = self.ingest('qr', {'reference': 'ETC-1', 'amount': 100}, signature='0' * 64)
+
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(AccountingPaymentNotification.objects.exists())
+
+    def test_ingest_rejects_unknown_provider(self):
+        self.assertEqual(self.ingest('xx', {'reference': 'ETC-1', 'amount': 100}).status_code, 404)
+
+    @override_settings(PAYMENT_WEBHOOK_SECRET='')
+    def test_ingest_requires_secret(self):
+        self.assertEqual(self.ingest('qr', {'reference': 'ETC-1', 'amount': 100}, signature='').status_code, 503)
+
+    def test_process_batch_settles_matching_receivable(self):
+        receivable = self.create_receivable(15000, reference_id='7')
+        notification = self.queue('qr', {'reference': 'ETC-7', 'amount': 15000, 'transaction_id': 'PRV-1', 'qris_code': 'Q1'})
+
+        summary = PaymentNotificationService.process_batch()
+
+        self.assertEqual(summary, {'settled': 1, 'unmatched': 0, 'invalid': 0})
+        receivable.refresh_from_db()
+        notification.refresh_from_db()
+        self.assertEqual(receivable.status_id, self.paid.id)
+        self.assertEqual(notification.status, 'settled')
+        record = AccountingQRISPaymentRecord.objects.get(batch_payment=notification.batch_payment)
+        self.assertEqual(record.payment_amount, 15000)
+        self.assertEqual(record.reference_number, 'PRV-1')
+        self.assertEqual(AccountingBatchPayment.objects.get(batch_number=notification.batch_payment).total_amount, Decimal('15000'))
+
+    def test_process_batch_settles_duplicate_notification_once(self):
+        receivable = self.create_receivable(15000, reference_id='7')
+        first = self.queue('qr', {'reference': 'ETC-7', 'amount': 15000})
+        duplicate = self.queue('qr', {'reference': 'ETC-7', 'amount': 15000})
+
+        summary = PaymentNotificationService.process_batch()
+
+        self.assertEqual(summary, {'settled': 1, 'unmatched': 1, 'invalid': 0})
+        first.refresh_from_db()
+        duplicate.refresh_from_db()
+        self.assertEqual(first.status, 'settled')
+        self.assertEqual(duplicate.status, 'unmatched')
+        self.assertEqual(AccountingPaymentAllocation.objects.filter(receivable=receivable).count(), 1)
+
+        # Processed notifications are not picked up again
+        self.assertEqual(PaymentNotificationService.process_batch(), {'settled': 0, 'unmatched': 0, 'invalid': 0})
+
+    def test_process_batch_leaves_receivable_open_on_amount_mismatch(self):
+        receivable = self.create_receivable(15000, reference_id='7')
+        notification = self.queue('va', {'reference': 'ETC-7', 'amount': 14000})
+
+        self.assertEqual(PaymentNotificationService.process_batch(), {'settled': 0, 'unmatched': 1, 'invalid': 0})
+        receivable.refresh_from_db()
+        notification.refresh_from_db()
+        self.assertEqual(receivable.status_id, self.unpaid.id)
+        self.assertIn('does not match', notification.error)
+
+    def test_process_batch_marks_unparseable_notifications_invalid(self):
+        self.create_receivable(15000, reference_id='7')
+        bodies = [
+            {'reference': 'ETC-7', 'amount': 'NaN'},
+            {'reference': 'ETC-7', 'amount': '15000.50'},
+            {'reference': 'ETC-7', 'amount': 'abc'},
+            {'reference': 'XX-7', 'amount': 15000},
+            ['not', 'an', 'object'],
+        ]
+        for body in bodies:
+            self.queue('qr', body)
+        AccountingPaymentNotification.objects.create(provider='qr', body='{not json')
+
+        summary = PaymentNotificationService.process_batch()
+
+        self.assertEqual(summary, {'settled': 0, 'unmatched': 0, 'invalid': len(bodies) + 1})
+        self.assertFalse(AccountingReceivablePayment.objects.filter(status=self.paid).exists())
+        self.assertFalse(AccountingBatchPayment.objects.exists())
@@ -10,5 +10,10 @@ urlpatterns = [
     path('create-ar/', views.AccountingCreateARPageView.as_view(), name='accounting_create_ar_page'),
     # API endpoints
     path('api/master-data/', views.APIView.as_view(context='master_data_api'), name='master_data_api'),
-    path('api/receivable/', views.APIView.as_view(context='receivable_api'), name='receivable_api')
+    path('api/receivable/', views.APIView.as_view(context='receivable_api'), name='receivable_api'),
+    path('api/payment/', views.APIView.as_view(context='payment_api'), name='payment_api'),
+    path('api/ledger/', views.APIView.as_view(context='ledger_api'), name='ledger_api'),
+    path('api/period/', views.APIView.as_view(context='period_api'), name='period_api'),
+    # Provider callbacks (signature-authenticated, no session)
+    path('webhook/payment/<str:provider>/', views.PaymentWebhookView.as_view(), name='payment_webhook'),
 ]
\ No newline at end of file
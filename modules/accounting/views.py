@@ -1,86 +1,90 @@
 import json
+from asgiref.sync import sync_to_async
 from django.shortcuts import render
 from django.views import View
 from django.http import JsonResponse
 from django.contrib.auth.mixins import PermissionRequiredMixin
-from django.core.exceptions import PermissionDenied
-from .services import AccountReceivable, MasterDataService
+from engine.access import GroupRequiredMixin
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt
+from .services import AccountReceivable, MasterDataService, PaymentAllocationService, LedgerService, PeriodCloseService, PaymentNotificationService
   
   
 # View for accounting index page  (home)
-class AccountingPageView(PermissionRequiredMixin, View):
+class AccountingPageView(GroupRequiredMixin, PermissionRequiredMixin, View):
     """
     View for rendering accounting management page
     """
     group_required = 'group_access_accounting'
     permission_required = 'accounting.view_accounting'
 
-    def dispatch(self, request, *args, **kwargs):
-        if not request.user.groups.filter(name__icontains=self.group_required).exists():
-            raise PermissionDenied
-        return super().dispatch(request, *args, **kwargs)
-
     def get(self, request):
         """Render the main accounting management page"""
-        return render(request, 'accounting_index.html')
+        # Aging is cached per day, so this is a cache hit on most views
+        aging = AccountReceivable.get_aging()
+        # Forecast is cached until receivables change
+        forecast = AccountReceivable.get_cashflow_forecast()
+        return render(request, 'accounting_index.html', {'aging': aging, 'forecast': forecast})
     
     
 # View for accounts payable report page
-class AccountingPayablePage(PermissionRequiredMixin, View):
+class AccountingPayablePage(GroupRequiredMixin, PermissionRequiredMixin, View):
     """
     View for rendering accounts payable report page
     """
     group_required = 'group_access_accounting'
     permission_required = 'accounting.view_accounting'
 
-    def dispatch(self, request, *args, **kwargs):
-        if not request.user.groups.filter(name__icontains=self.group_required).exists():
-            raise PermissionDenied
-        return super().dispatch(request, *args, **kwargs)
-
     def get(self, request):
         """Render the accounts payable report page"""
         return render(request, 'accounting_payable.html')
     
 
 # View for accounts receivable report page
-class AccountingReceivablePage(PermissionRequiredMixin, View):
+class AccountingReceivablePage(GroupRequiredMixin, PermissionRequiredMixin, View):
     """
     View for rendering accounts receivable report page
     """
     group_required = 'group_access_accounting'
     permission_required = 'accounting.view_accounting'
 
-    def dispatch(self, request, *args, **kwargs):
-        if not request.user.groups.filter(name__icontains=self.group_required).exists():
-            raise PermissionDenied
-        return super().dispatch(request, *args, **kwargs)
-
     def get(self, request):
         """Render the accounts receivable report page"""
         return render(request, 'accounting_receivable.html')
 
 
-class APIView(View):
+class APIView(GroupRequiredMixin, View):
     """
-    Unified API view for handling accounting operations
+    Unified API view for handling accounting operations.
+
+    Async for the ASGI deployment; the services are transactional ORM code,
+    so each action runs in a thread via sync_to_async.
     """
     group_required = 'group_access_accounting'
     context = ''
 
-    def dispatch(self, request, *args, **kwargs):
-        if not request.user.groups.filter(name__icontains=self.group_required).exists():
-            raise PermissionDenied
-        return super().dispatch(request, *args, **kwargs)
-
-    def post(self, request):
+    async def post(self, request):
         try:
+            # Check if this is a file upload request (multipart/form-data)
+            if request.FILES:
+                action = request.POST.get('action')
+                if action == 'import_bank_statement' and self.context == 'payment_api':
+                    return await sync_to_async(PaymentAllocationService.import_bank_statement)(request)
+                else:
+                    return JsonResponse({'success': False, 'message': 'Invalid file upload action'}, status=400)
+
             json_request = json.loads(request.body.decode('utf-8'))
 
             if self.context == 'receivable_api':
-                return AccountReceivable.process_post(request, json_request)
+                return await sync_to_async(AccountReceivable.process_post)(request, json_request)
             elif self.context == 'master_data_api':
-                return MasterDataService.process_post(request, json_request)
+                return await sync_to_async(MasterDataService.process_post)(request, json_request)
+            elif self.context == 'payment_api':
+                return await sync_to_async(PaymentAllocationService.process_post)(request, json_request)
+            elif self.context == 'ledger_api':
+                return await sync_to_async(LedgerService.process_post)(request, json_request)
+            elif self.context == 'period_api':
+                return await sync_to_async(PeriodCloseService.process_post)(request, json_request)
             else:
                 return JsonResponse({'success': False, 'message': 'Invalid API context'}, status=400)
 
@@ -90,18 +94,24 @@ class APIView(View):
             return JsonResponse({'success': False, 'message': str(e)}, status=500)
 
 
-class AccountingCreateARPageView(PermissionRequiredMixin, View):
+
+@method_decorator(csrf_exempt, name='dispatch')
+class PaymentWebhookView(View):
+    """
+    Ingest endpoint for QRIS / virtual account payment notifications.
+    Authenticated by HMAC signature instead of a session; only queues the body.
+    """
+
+    def post(self, request, provider):
+        return PaymentNotificationService.ingest(request, provider)
+
+class AccountingCreateARPageView(GroupRequiredMixin, PermissionRequiredMixin, View):
     """
     View for creating new receivable payments
     """
     group_required = 'group_access_accounting'
     permission_required = 'accounting.view_accounting'
 
-    def dispatch(self, request, *args, **kwargs):
-        if not request.user.groups.filter(name__icontains=self.group_required).exists():
-            raise PermissionDenied
-        return super().dispatch(request, *args, **kwargs)
-
     def get(self, request):
         """Render the create receivable page"""
         return render(request, 'accounting_create_ar.html')
\ No newline at end of file
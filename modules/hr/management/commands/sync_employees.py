@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from modules.hr.models import MasterPosition
+from modules.hr.services import EmployeeService
+
+
+class Command(BaseCommand):
+    help = 'Create employees for users that have none and sync employee names from their users'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--include-inactive', action='store_true', help='Also create employees for inactive users')
+        parser.add_argument('--position', default=None, help='Position name for newly created employees')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would change')
+
+    def handle(self, *args, **options):
+        position = None
+        if options['position']:
+            try:
+                position = MasterPosition.objects.get(name=options['position'])
+            except MasterPosition.DoesNotExist:
+                raise CommandError(f"Position {options['position']!r} not found")
+
+        result = EmployeeService.sync_users(
+            include_inactive=options['include_inactive'],
+            position=position,
+            dry_run=options['dry_run'],
+        )
+        prefix = 'Would create' if result['dry_run'] else 'Created'
+        self.stdout.write(self.style.SUCCESS(f"{prefix} {result['created']} employees, {result['updated']} name updates"))
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.models import User
 
 
@@ -18,5 +19,14 @@ class Employee(models.Model):
     position = models.ForeignKey(MasterPosition, on_delete=models.CASCADE, null=True, blank=True)
     hire_date = models.DateField()
 
+    class Meta:
+        indexes = [
+            # Directory listing: keyset on (lastname, id)
+            models.Index(fields=['lastname', 'id'], name='hr_emp_lastname_id_idx'),
+            # Case-insensitive prefix search on names
+            models.Index(Lower('firstname'), name='hr_emp_firstname_lower_idx'),
+            models.Index(Lower('lastname'), name='hr_emp_lastname_lower_idx'),
+        ]
+
     def __str__(self):
         return f"{self.firstname} {self.lastname} - {self.position.name if self.position else 'No Position'}"
\ No newline at end of file
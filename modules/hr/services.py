@@ -1,11 +1,29 @@
+import csv
+import io
+import itertools
 import json
+import uuid
+from datetime import date
 from django.http import JsonResponse
 from django.core.exceptions import ValidationError
 from django.contrib import messages
+from django.db import transaction as db_transaction
+from django.core.cache import cache
+from django.db.models import Case, Count, F, Q, When
+from django.db.models.functions import Lower, Substr, TruncMonth
+from django.db.models.signals import post_save, post_delete
 from .models import Employee, MasterPosition
 from django.contrib.auth.models import User
 from django.contrib.auth.mixins import PermissionRequiredMixin
 
+# Maximum rows accepted by one bulk import request
+IMPORT_MAX_ROWS = 5000
+
+# Tenure buckets in years: (key, from, to)
+TENURE_BUCKETS = [('<1y', 0, 1), ('1-3y', 1, 3), ('3-5y', 3, 5), ('5y+', 5, None)]
+STATS_CACHE_TIMEOUT = 300
+STATS_VERSION_KEY = 'hr:stats_version'
+
 
 class EmployeeService:
 
@@ -29,12 +47,20 @@ class EmployeeService:
 
         if action == 'list_employee':
             return EmployeeService.list_employees(request, json_request)
+        elif action == 'get_employee':
+            return EmployeeService.get_employee(request, json_request)
         elif action == 'create_employee':
             return EmployeeService.create_employee(request, json_request)
+        elif action == 'import_employees':
+            return EmployeeService.import_employees(request, json_request)
         elif action == 'update_employee':
             return EmployeeService.update_employee(request, json_request)
         elif action == 'delete_employee':
             return EmployeeService.delete_employee(request, json_request)
+        elif action == 'sync_employees':
+            return EmployeeService.sync_employees(request, json_request)
+        elif action == 'stats':
+            return EmployeeService.stats(request, json_request)
         elif action == 'get_positions':
             return EmployeeService.get_positions(request, json_request)
         elif action == 'create_position':
@@ -47,64 +73,403 @@ class EmployeeService:
             return JsonResponse({'success': False, 'message': f'Unknown POST action: {action}'}, status=400)
 
     @staticmethod
-    def list_employees(request, data):
-        """List all employees with user information and pagination support"""
-        from django.core.paginator import Paginator
+    def _encode_cursor(employee):
+        if employee['lastname'] is None:
+            return str(employee['id'])
+        return f"{employee['lastname']}:{employee['id']}"
+
+    @staticmethod
+    def _decode_cursor(cursor):
+        """Return (lastname or None, id) from a cursor string"""
+        lastname, separator, last_id = str(cursor).rpartition(':')
+        if not last_id.isdigit():
+            raise ValueError(f'Invalid cursor: {cursor}')
+        return (lastname if separator else None), int(last_id)
 
-        # Get pagination parameters infomation
-        page = int(data.get('page', 1))
+    @staticmethod
+    def _search_filter(search):
+        """
+        Every search word must prefix-match the first name, last name or position.
+        Names are compared as LOWER(...) ranges so the expression indexes apply.
+        """
+        condition = Q()
+        for word in search.lower().split()[:5]:
+            word_condition = (
+                Q(firstname_lower__gte=word, firstname_lower__lt=word + '\uffff') |
+                Q(lastname_lower__gte=word, lastname_lower__lt=word + '\uffff')
+            )
+            # Positions are a small master table, resolve them to ids first
+            position_ids = list(MasterPosition.objects.filter(name__istartswith=word).values_list('id', flat=True))
+            if position_ids:
+                word_condition |= Q(position_id__in=position_ids)
+            condition &= word_condition
+        return condition
+
+    @staticmethod
+    def list_employees(request, data=None):
+        """List employees ordered by last name, with search and cursor pagination"""
+        data = data or {}
         page_size = int(data.get('page_size', 10))
 
         # Validate page_size
-        if page_size not in [5, 10, 25, 50]:
+        if page_size not in [5, 10, 25, 50, 100]:
             page_size = 10
 
-        employees = Employee.objects.select_related('position').all().order_by('id')
-        paginator = Paginator(employees, page_size)
+        employees = Employee.objects.alias(firstname_lower=Lower('firstname'), lastname_lower=Lower('lastname'))
+
+        search = str(data.get('search', '')).strip()
+        if search:
+            employees = employees.filter(EmployeeService._search_filter(search))
+        if data.get('position_id'):
+            employees = employees.filter(position_id=data.get('position_id'))
+
+        # Keyset pagination on (lastname, id); employees without last name come last
+        cursor = data.get('cursor')
+        if cursor:
+            try:
+                last_lastname, last_id = EmployeeService._decode_cursor(cursor)
+            except ValueError as e:
+                return JsonResponse({'success': False, 'message': str(e)}, status=400)
+            if last_lastname is None:
+                employees = employees.filter(lastname__isnull=True, id__gt=last_id)
+            else:
+                employees = employees.filter(
+                    Q(lastname__gt=last_lastname) |
+                    Q(lastname=last_lastname, id__gt=last_id) |
+                    Q(lastname__isnull=True)
+                )
+
+        rows = list(employees.order_by(F('lastname').asc(nulls_last=True), 'id').values(
+            'id', 'firstname', 'lastname', 'hire_date', 'position_id', 'position__name', 'position__description'
+        )[:page_size + 1])
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
 
         try:
-            page_obj = paginator.page(page)
-        except:
-            page_obj = paginator.page(1)
-            page = 1
-
-        try:
-            employee_data = []
-
-            for employee in page_obj:
-                employee_data.append({
-                    'id': employee.id,
-                    'firstname': employee.firstname,
-                    'lastname': employee.lastname,
-                    'fullname': f"{employee.firstname} {employee.lastname}",
-                    'position': {
-                        'id': employee.position.id if employee.position else None,
-                        'name': employee.position.name if employee.position else 'No Position',
-                        'description': employee.position.description if employee.position else None
-                    } if employee.position else None,
-                    'hire_date': str(employee.hire_date)
-                })
+            employee_data = [EmployeeService._employee_row(row) for row in rows]
 
             return JsonResponse({
                 'success': True,
                 'data': {
                     'employees': employee_data,
                     'pagination': {
-                        'current_page': page,
-                        'total_pages': paginator.num_pages,
-                        'total_items': paginator.count,
                         'page_size': page_size,
-                        'has_next': page_obj.has_next(),
-                        'has_previous': page_obj.has_previous(),
-                        'start_index': page_obj.start_index(),
-                        'end_index': page_obj.end_index()
+                        'has_next': has_next,
+                        'next_cursor': EmployeeService._encode_cursor(rows[-1]) if has_next else None,
                     }
                 }
-                
+
             })
         except Exception as e:
             return JsonResponse({'success': False, 'message': str(e)}, status=500)
 
+    @staticmethod
+    def _employee_row(row):
+        """Response dict from a projected employee values() row"""
+        return {
+            'id': row['id'],
+            'firstname': row['firstname'],
+            'lastname': row['lastname'],
+            'fullname': f"{row['firstname']} {row['lastname']}",
+            'position': {
+                'id': row['position_id'],
+                'name': row['position__name'],
+                'description': row['position__description']
+            } if row['position_id'] else None,
+            'hire_date': str(row['hire_date'])
+        }
+
+    @staticmethod
+    def get_employee(request, data):
+        """Get a single employee by id"""
+        row = Employee.objects.filter(id=data.get('id')).values(
+            'id', 'firstname', 'lastname', 'hire_date', 'position_id', 'position__name', 'position__description'
+        ).first()
+        if row is None:
+            return JsonResponse({'success': False, 'message': 'Employee not found'}, status=404)
+        return JsonResponse({'success': True, 'data': EmployeeService._employee_row(row)})
+
+    @staticmethod
+    def sync_users(include_inactive=False, position=None, dry_run=False):
+        """
+        Mirror auth users into employees with set-based queries: users without
+        an employee are created with bulk_create, employees whose names no
+        longer match their user are fixed with bulk_update.
+        """
+        users = User.objects.filter(employee__isnull=True)
+        if not include_inactive:
+            users = users.filter(is_active=True)
+        missing = list(users.values('id', 'username', 'first_name', 'last_name', 'date_joined').order_by('id'))
+
+        # User names can be longer than the employee columns (bulk queries skip validation)
+        firstname_length = Employee._meta.get_field('firstname').max_length
+        lastname_length = Employee._meta.get_field('lastname').max_length
+
+        # Employee names follow the user; username stands in for an empty first name
+        expected_firstname = Case(
+            When(user__first_name='', then=F('user__username')),
+            default=F('user__first_name'),
+        )
+        changed = list(Employee.objects.filter(user__isnull=False).annotate(
+            expected_firstname=Substr(expected_firstname, 1, firstname_length),
+            expected_lastname=Substr(F('user__last_name'), 1, lastname_length),
+        ).filter(
+            ~Q(firstname=F('expected_firstname')) | Q(firstname__isnull=True) |
+            ~Q(lastname=F('expected_lastname')) | Q(lastname__isnull=True)
+        ).only('id', 'firstname', 'lastname'))
+
+        result = {'created': len(missing), 'updated': len(changed), 'dry_run': dry_run}
+        if dry_run:
+            return result
+
+        with db_transaction.atomic():
+            Employee.objects.bulk_create([
+                Employee(
+                    user_id=user['id'],
+                    firstname=(user['first_name'] or user['username'])[:firstname_length],
+                    lastname=user['last_name'][:lastname_length],
+                    position=position,
+                    hire_date=user['date_joined'].date(),
+                ) for user in missing
+            ], batch_size=500)
+
+            for employee in changed:
+                employee.firstname = employee.expected_firstname
+                employee.lastname = employee.expected_lastname
+            Employee.objects.bulk_update(changed, ['firstname', 'lastname'], batch_size=500)
+
+            # Bulk queries send no signals
+            EmployeeService.touch_stats()
+
+        print(f"Synced employees from users: {result['created']} created, {result['updated']} updated")
+        return result
+
+    @staticmethod
+    def sync_employees(request, data):
+        """Create or update employees from existing user accounts"""
+        if not request.user.has_perm('hr.add_employee'):
+            return JsonResponse({'success': False, 'message': 'You do not have permission to create an employee.'}, status=403)
+
+        position = None
+        if data.get('position_id'):
+            try:
+                position = MasterPosition.objects.get(id=data.get('position_id'))
+            except MasterPosition.DoesNotExist:
+                return JsonResponse({'success': False, 'message': 'Position not found'}, status=404)
+
+        result = EmployeeService.sync_users(
+            include_inactive=data.get('include_inactive') in ['true', 'True', True, 1, '1'],
+            position=position,
+            dry_run=data.get('dry_run') in ['true', 'True', True, 1, '1'],
+        )
+        return JsonResponse({
+            'success': True,
+            'message': f"{result['created']} employees created, {result['updated']} updated",
+            'data': result
+        })
+
+    @staticmethod
+    def stats_version():
+        """Version stamp bumped on every Employee / MasterPosition write"""
+        version = cache.get(STATS_VERSION_KEY)
+        if version is None:
+            version = uuid.uuid4().hex
+            if not cache.add(STATS_VERSION_KEY, version, None):
+                version = cache.get(STATS_VERSION_KEY, version)
+        return version
+
+    @staticmethod
+    def touch_stats(**kwargs):
+        """Invalidate cached HR statistics; also used as a signal handler"""
+        db_transaction.on_commit(lambda: cache.set(STATS_VERSION_KEY, uuid.uuid4().hex, None))
+
+    @staticmethod
+    def _years_ago(day, years):
+        try:
+            return day.replace(year=day.year - years)
+        except ValueError:
+            # 29 February
+            return day.replace(year=day.year - years, day=28)
+
+    @staticmethod
+    def get_stats(refresh=False):
+        """
+        Headcount per position, hires per month (last 12 months) and tenure
+        distribution, from three grouped queries and cached for a few minutes.
+        """
+        today = date.today()
+        cache_key = f'hr:stats:{EmployeeService.stats_version()}:{today.isoformat()}'
+        if not refresh:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        # Totals and tenure buckets in one aggregate
+        aggregates = {
+            'headcount': Count('id'),
+            'unassigned': Count('id', filter=Q(position__isnull=True)),
+        }
+        for key, low, high in TENURE_BUCKETS:
+            condition = Q(hire_date__lte=EmployeeService._years_ago(today, low))
+            if high is not None:
+                condition &= Q(hire_date__gt=EmployeeService._years_ago(today, high))
+            aggregates[key] = Count('id', filter=condition)
+        totals = Employee.objects.aggregate(**aggregates)
+
+        positions = MasterPosition.objects.annotate(headcount=Count('employee')).values('id', 'name', 'headcount').order_by('-headcount', 'name')
+
+        # Current month and the 11 before it
+        first_index = today.year * 12 + today.month - 1 - 11
+        first_month = date(first_index // 12, first_index % 12 + 1, 1)
+        hires = Employee.objects.filter(hire_date__gte=first_month).annotate(
+            month=TruncMonth('hire_date')
+        ).values('month').annotate(count=Count('id')).order_by('month')
+        hires_by_month = {row['month'].strftime('%Y-%m'): row['count'] for row in hires}
+        months = [date(first_month.year + (first_month.month - 1 + i) // 12, (first_month.month - 1 + i) % 12 + 1, 1) for i in range(12)]
+
+        stats = {
+            'as_of': today.isoformat(),
+            'headcount': totals['headcount'],
+            'unassigned': totals['unassigned'],
+            'positions': [{'id': p['id'], 'name': p['name'], 'headcount': p['headcount']} for p in positions],
+            'hires_per_month': [{'month': m.strftime('%Y-%m'), 'count': hires_by_month.get(m.strftime('%Y-%m'), 0)} for m in months],
+            'tenure': [{'bucket': key, 'count': totals[key]} for key, _, _ in TENURE_BUCKETS],
+        }
+        cache.set(cache_key, stats, STATS_CACHE_TIMEOUT)
+        return stats
+
+    @staticmethod
+    def stats(request, data):
+        """Return HR dashboard statistics as JSON response"""
+        refresh = data.get('refresh') in ['true', 'True', True, 1, '1']
+        return JsonResponse({'success': True, 'data': EmployeeService.get_stats(refresh)})
+
+    @staticmethod
+    def _read_import_rows(data, upload=None):
+        """
+        Rows to import from an uploaded CSV file, a CSV string or a JSON list.
+        CSV input is read up to one row past IMPORT_MAX_ROWS, enough to reject it.
+        """
+        if upload is not None:
+            reader = csv.DictReader(io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline=''))
+            return list(itertools.islice(reader, IMPORT_MAX_ROWS + 1))
+        if data.get('csv'):
+            return list(itertools.islice(csv.DictReader(io.StringIO(str(data['csv']))), IMPORT_MAX_ROWS + 1))
+        rows = data.get('employees') or []
+        if not isinstance(rows, list):
+            raise ValueError('employees must be a list')
+        return rows
+
+    @staticmethod
+    def import_employees(request, data, upload=None):
+        """
+        Bulk import employees from CSV or JSON rows (firstname, lastname,
+        position or position_id, hire_date).
+
+        Positions are resolved through one lookup map and missing ones are
+        created; rows are validated in memory and inserted with bulk_create.
+        Valid rows are imported, invalid ones are reported by row number.
+        """
+        if not request.user.has_perm('hr.add_employee'):
+            return JsonResponse({'success': False, 'message': 'You do not have permission to create an employee.'}, status=403)
+
+        try:
+            rows = EmployeeService._read_import_rows(data, upload)
+        except (ValueError, UnicodeDecodeError, csv.Error) as e:
+            return JsonResponse({'success': False, 'message': f'Invalid import data: {e}'}, status=400)
+        if not rows:
+            return JsonResponse({'success': False, 'message': 'No employees to import'}, status=400)
+        if len(rows) > IMPORT_MAX_ROWS:
+            return JsonResponse({'success': False, 'message': f'Import is limited to {IMPORT_MAX_ROWS} rows per request'}, status=400)
+
+        dry_run = data.get('dry_run') in ['true', 'True', True, 1, '1']
+
+        # One lookup for every position, by lowercase name and by id
+        positions = list(MasterPosition.objects.all())
+        by_name = {p.name.lower(): p for p in positions if p.name}
+        by_id = {p.id: p for p in positions}
+        max_name_length = MasterPosition._meta.get_field('name').max_length
+
+        errors = []
+        valid = []
+        missing = {}
+        for number, row in enumerate(rows, start=1):
+            if not isinstance(row, dict):
+                errors.append({'row': number, 'errors': ['Row must be an object']})
+                continue
+            row = {k.strip().lower(): (v.strip() if isinstance(v, str) else v) for k, v in row.items() if k}
+            row_errors = []
+
+            position = None
+            if row.get('position_id'):
+                try:
+                    position = by_id.get(int(row['position_id']))
+                except (TypeError, ValueError):
+                    pass
+                if position is None:
+                    row_errors.append(f"Position {row['position_id']} not found")
+            elif row.get('position'):
+                name = str(row['position'])
+                position = by_name.get(name.lower())
+                if position is None:
+                    if len(name) > max_name_length:
+                        row_errors.append(f'Position name longer than {max_name_length} characters')
+                    else:
+                        position = missing.setdefault(name.lower(), MasterPosition(name=name))
+            else:
+                row_errors.append('Position is required')
+
+            employee = Employee(
+                firstname=row.get('firstname'),
+                lastname=row.get('lastname'),
+                hire_date=row.get('hire_date'),
+            )
+            if not employee.firstname or not employee.lastname or not employee.hire_date:
+                row_errors.append('First name, last name and hire date are required')
+            else:
+                try:
+                    # Field validation only; position is resolved above, so no per-row queries
+                    employee.full_clean(exclude=['user', 'position'], validate_unique=False)
+                except ValidationError as e:
+                    row_errors.extend(f'{field}: {message}' for field, messages in e.message_dict.items() for message in messages)
+
+            if row_errors:
+                errors.append({'row': number, 'errors': row_errors})
+            else:
+                valid.append((employee, position))
+
+        created_positions = sorted({p.name for _, p in valid if p.pk is None})
+        if not dry_run and valid:
+            with db_transaction.atomic():
+                new_positions = [p for p in missing.values() if p.name in created_positions]
+                MasterPosition.objects.bulk_create(new_positions)
+                if new_positions and new_positions[0].pk is None:
+                    # Backends that do not return ids from bulk_create
+                    saved = {p.name: p for p in MasterPosition.objects.filter(name__in=created_positions)}
+                    for p in new_positions:
+                        p.pk = saved[p.name].pk
+
+                employees = []
+                for employee, position in valid:
+                    employee.position = position
+                    employees.append(employee)
+                Employee.objects.bulk_create(employees, batch_size=500)
+                # bulk_create sends no signals
+                EmployeeService.touch_stats()
+
+        return JsonResponse({
+            'success': not errors,
+            'message': f"{'Validated' if dry_run else 'Imported'} {len(valid)} of {len(rows)} employees",
+            'data': {
+                'imported': 0 if dry_run else len(valid),
+                'valid': len(valid),
+                'failed': len(errors),
+                'created_positions': created_positions,
+                'errors': errors,
+                'dry_run': dry_run,
+            }
+        })
+
     @staticmethod
     def create_employee(request, data):
         """Create a new employee"""
@@ -367,4 +732,10 @@ class EmployeeService:
             })
 
         except Employee.DoesNotExist:
-            return JsonResponse({'success': False, 'message': 'Employee not found'}, status=404)
\ No newline at end of file
+            return JsonResponse({'success': False, 'message': 'Employee not found'}, status=404)
+
+
+# Employee and position writes invalidate the cached statistics
+for _model in (Employee, MasterPosition):
+    post_save.connect(EmployeeService.touch_stats, sender=_model, dispatch_uid=f'hr_stats_save:{_model.__name__}')
+    post_delete.connect(EmployeeService.touch_stats, sender=_model, dispatch_uid=f'hr_stats_delete:{_model.__name__}')
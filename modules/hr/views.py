@@ -1,9 +1,11 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect
 from django.views import View
 from .models import Employee
 from django.http import JsonResponse
 from django.contrib.auth.mixins import PermissionRequiredMixin
 from django.core.exceptions import PermissionDenied
+from engine.access import has_group
 from django.contrib.auth.models import User
 from .services import EmployeeService
 import json
@@ -13,10 +15,11 @@ class EmployeeIndex(PermissionRequiredMixin, View):
     group_required = 'group_access_hr'
 
     def get(self, request):
-        if not request.user.groups.filter(name__icontains=self.group_required):
+        if not has_group(request, self.group_required):
             raise PermissionDenied
-        employees = Employee.objects.select_related('user').all()
-        return render(request, 'hr_index.html', {'employees': employees})
+        # Cached aggregates, a few fixed queries regardless of staff size
+        stats = EmployeeService.get_stats()
+        return render(request, 'hr_index.html', {'stats': stats})
     
 
 class EmployeeCreatePage(PermissionRequiredMixin, View):
@@ -24,7 +27,7 @@ class EmployeeCreatePage(PermissionRequiredMixin, View):
     group_required = 'group_access_hr'
 
     def get(self, request):
-        if not request.user.groups.filter(name__icontains=self.group_required):
+        if not has_group(request, self.group_required):
             raise PermissionDenied
         # No longer passing users - they will be fetched via JavaScript API
         return render(request, 'hr_create.html')
@@ -35,7 +38,7 @@ class EmployeeListPage(PermissionRequiredMixin, View):
     group_required = 'group_access_hr'
 
     def get(self, request):
-        if not request.user.groups.filter(name__icontains=self.group_required):
+        if not has_group(request, self.group_required):
             raise PermissionDenied
         # No longer passing users - they will be fetched via JavaScript API
         return render(request, 'hr_list.html')
@@ -45,37 +48,46 @@ class EmployeePositionPage(PermissionRequiredMixin, View):
     group_required = 'group_access_hr'
 
     def get(self, request):
-        if not request.user.groups.filter(name__icontains=self.group_required):
+        if not has_group(request, self.group_required):
             raise PermissionDenied
         return render(request, 'hr_position.html')
 
 
 class APIView(View):
     """
-    Unified API view for handling all hr operations through single endpoint
+    Unified API view for handling all hr operations through single endpoint.
+
+    Async for the ASGI deployment; service actions run in a thread via
+    sync_to_async.
     """
     group_required = 'group_access_hr'
     context = ''
 
-    def get(self, request):
+    async def get(self, request):
         """Handle GET requests"""
         return JsonResponse({'success': False, 'message': 'Invalid HTTP Method'}, status=400)
 
-    def post(self, request):
+    async def post(self, request):
         """
         Handle POST requests - process JSON actions
         """
+        # Check permissions for API access, outside the try so it stays a 403
+        if not has_group(request, self.group_required):
+            raise PermissionDenied
+
         try:
-            # Check permissions for API access
-            if not request.user.groups.filter(name__icontains=self.group_required):
-                raise PermissionDenied
+            # Bulk import sent as a multipart CSV upload
+            if request.FILES:
+                if self.context == 'employee_api' and request.POST.get('action') == 'import_employees' and 'file' in request.FILES:
+                    return await sync_to_async(EmployeeService.import_employees)(request, request.POST.dict(), upload=request.FILES['file'])
+                return JsonResponse({'success': False, 'message': 'Invalid file upload action'}, status=400)
 
             # Parse JSON data from request body
             json_request = json.loads(request.body.decode('utf-8'))
 
             if self.context == 'employee_api':
             # Employee Service handling request
-                return EmployeeService.process_post(request, json_request)
+                return await sync_to_async(EmployeeService.process_post)(request, json_request)
             else:
                 # Return 400 Bad request
                 return JsonResponse({'success': False, 'message': 'Invalid API context'}, status=400)
@@ -0,0 +1,27 @@
+import time
+from django.core.management.base import BaseCommand
+from modules.product.services import OutboxService
+
+
+class Command(BaseCommand):
+    help = 'Apply pending product outbox events (receivables, ledger postings) in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--loop', action='store_true', help='Keep draining until interrupted')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to sleep when the outbox is empty')
+
+    def handle(self, *args, **options):
+        while True:
+            result = OutboxService.drain(batch_size=options['batch_size'])
+            if any(result.values()):
+                self.stdout.write(f"done {result['done']}, retry {result['retry']}, failed {result['failed']}")
+
+            if not options['loop']:
+                # Single run drains everything that is currently due
+                if result['done'] + result['retry'] + result['failed'] < options['batch_size']:
+                    break
+                continue
+
+            if result['done'] + result['retry'] + result['failed'] == 0:
+                time.sleep(options['interval'])
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
 from engine.models import MasterDatabase
 
@@ -88,6 +89,12 @@ class Transaction(models.Model):
     due_date = models.DateField(null=True, blank=True)
     transaction_date = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # Date-range reports (open accounting period, dashboards)
+            models.Index(fields=['transaction_date'], name='product_tr_date_idx'),
+        ]
+
     def __str__(self):
         return f"Transaction of {self.product.name} by {self.user.username} on {self.transaction_date}"
     
@@ -111,4 +118,30 @@ class PaymentRecord(models.Model):
     status = models.ForeignKey(PaymentStatus, on_delete=models.SET_NULL, null=True, blank=True)
 
     def __str__(self):
-        return f"Payment of {self.amount} for transaction {self.transaction.id} on {self.payment_date}"
\ No newline at end of file
+        return f"Payment of {self.amount} for transaction {self.transaction.id} on {self.payment_date}"
+
+
+# Transactional outbox for side effects in other modules (e.g. accounting)
+class OutboxEvent(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    event_type = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    dedup_key = models.CharField(max_length=100, unique=True, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True, null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'available_at', 'id'], name='product_outbox_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} #{self.id} ({self.status})"
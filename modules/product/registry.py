@@ -0,0 +1,18 @@
+from engine.registry import MasterDataRegistry, MasterDataMapping
+from .models import PaymentStatus, PaymentTerm
+
+# In-memory lookups for product master data
+payment_status_registry = MasterDataRegistry(PaymentStatus)
+payment_term_registry = MasterDataRegistry(PaymentTerm)
+
+# Product status/term -> accounting status/term, when accounting is available
+try:
+    from modules.accounting.registry import (
+        payment_status_registry as accounting_status_registry,
+        payment_term_registry as accounting_term_registry,
+    )
+    accounting_status_map = MasterDataMapping(payment_status_registry, accounting_status_registry)
+    accounting_term_map = MasterDataMapping(payment_term_registry, accounting_term_registry)
+except ImportError:
+    accounting_status_map = None
+    accounting_term_map = None
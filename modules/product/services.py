@@ -1,22 +1,29 @@
+import asyncio
 import json
+from asgiref.sync import sync_to_async
 from django.http import JsonResponse
 from django.core.exceptions import ValidationError
 from django.contrib import messages
-from django.db.models import Sum, Count
+from django.db import transaction as db_transaction
+from django.db.models import Sum, Count, F, DecimalField
 from django.utils import timezone
-from .models import Product, Category, Transaction, TransactionItem, PaymentTerm, PaymentStatus
+from .models import Product, Category, Transaction, TransactionItem, PaymentTerm, PaymentStatus, OutboxEvent
 from django.contrib.auth.models import User
 from engine.utils import format_rupiah, supabase_storage
+from engine.db_router import use_replica
 from datetime import datetime
+from .registry import payment_status_registry, payment_term_registry
 
 # Import accounting models for receivable creation
 try:
     from modules.accounting.models import AccountingReceivablePayment, AccountingPaymentStatus, AccountingPaymentTerm
+    from modules.accounting.services import TransactionSyncService
 except ImportError:
     # Handle case where accounting module is not available
     AccountingReceivablePayment = None
     AccountingPaymentStatus = None
     AccountingPaymentTerm = None
+    TransactionSyncService = None
 
 
 
@@ -206,6 +213,25 @@ class ProductService:
                 total_amount += product.qty * product.price
         return total_amount
 
+    @staticmethod
+    def _product_row(product, signed_url_img):
+        return {
+            'id': product.id,
+            'name': product.name,
+            'qty': product.qty,
+            'description': product.description,
+            'category': {
+                'id': product.category.id if product.category else None,
+                'name': product.category.name if product.category else None
+            } if product.category else None,
+            'price': str(format_rupiah(product.price)),
+            'raw_price': float(product.price),  # Add raw price for calculations
+            'is_active': product.is_active,
+            'image_url': signed_url_img['url'] if signed_url_img else None,
+            'created_at': product.created_at.isoformat() if product.created_at else None,
+            'updated_at': product.updated_at.isoformat() if product.updated_at else None,
+        }
+
     @staticmethod
     def list_products(request):
         """List all products with category information"""
@@ -216,37 +242,62 @@ class ProductService:
                 signed_url_img = None
             else:
                 signed_url_img = supabase_storage.get_signed_url(product.image_url, cached_url=product.signed_url, last_update=product.last_update_signed_url)
-                if signed_url_img['is_new']:
+                if signed_url_img and signed_url_img['is_new']:
                     # Update signed URL and timestamp
                     product.signed_url = signed_url_img['url']
                     product.last_update_signed_url = timezone.now()
                     product.save()
-                
-            product_data.append({
-                'id': product.id,
-                'name': product.name,
-                'qty': product.qty,
-                'description': product.description,
-                'category': {
-                    'id': product.category.id if product.category else None,
-                    'name': product.category.name if product.category else None
-                } if product.category else None,
-                'price': str(format_rupiah(product.price)),
-                'raw_price': float(product.price),  # Add raw price for calculations
-                'is_active': product.is_active,
-                'image_url': signed_url_img['url'] if signed_url_img else None,
-                'created_at': product.created_at.isoformat() if product.created_at else None,
-                'updated_at': product.updated_at.isoformat() if product.updated_at else None,
-            })
+
+            product_data.append(ProductService._product_row(product, signed_url_img))
 
         return JsonResponse({
             'success': True,
             'data': {
                 'total_amount': format_rupiah(ProductService.get_product_total_amount(request)),
-                'income_today': format_rupiah(TransactionService.list_transaction(request).get('data', {}).get('total_transaction_today', 0)),
+                'income_today': format_rupiah(TransactionService._get_income_today(request)),
                 'product_list': product_data}
         })
 
+    @staticmethod
+    async def alist_products(request):
+        """
+        Async list_products. Expired signed URLs are requested from storage
+        concurrently instead of one round trip per product.
+        """
+        products = [product async for product in Product.objects.select_related('category').all()]
+        with_image = [product for product in products if product.image_url]
+        results = await asyncio.gather(*[
+            supabase_storage.aget_signed_url(product.image_url, cached_url=product.signed_url, last_update=product.last_update_signed_url)
+            for product in with_image
+        ])
+
+        signed = {}
+        refreshed = []
+        now = timezone.now()
+        for product, signed_url_img in zip(with_image, results):
+            signed[product.id] = signed_url_img
+            if signed_url_img and signed_url_img['is_new']:
+                product.signed_url = signed_url_img['url']
+                product.last_update_signed_url = now
+                refreshed.append(product)
+        if refreshed:
+            await Product.objects.abulk_update(refreshed, ['signed_url', 'last_update_signed_url'])
+
+        total_amount = (await Product.objects.aaggregate(
+            total=Sum(F('qty') * F('price'), output_field=DecimalField())
+        ))['total'] or 0
+        income_today = (await Transaction.objects.filter(
+            transaction_date__date=timezone.now().date()
+        ).aaggregate(total=Sum('total_price')))['total'] or 0
+
+        return JsonResponse({
+            'success': True,
+            'data': {
+                'total_amount': format_rupiah(total_amount),
+                'income_today': format_rupiah(income_today),
+                'product_list': [ProductService._product_row(product, signed.get(product.id)) for product in products]}
+        })
+
     @staticmethod
     def create_product(request, data):
         
@@ -407,28 +458,37 @@ class ProductService:
             return JsonResponse({'success': False, 'message': 'Product not found'}, status=404)
 
     @staticmethod
-    def upload_image(request):
-        """Handle product image upload"""
-        try:
-            product_id = request.POST.get('product_id')
-            if not product_id:
-                return JsonResponse({'success': False, 'message': 'Product ID is required'}, status=400)
+    def _validate_image_upload(request):
+        """Return (product_id, image_file, None) or (None, None, error response)"""
+        product_id = request.POST.get('product_id')
+        if not product_id:
+            return None, None, JsonResponse({'success': False, 'message': 'Product ID is required'}, status=400)
+
+        # Get the uploaded file
+        if 'image' not in request.FILES:
+            return None, None, JsonResponse({'success': False, 'message': 'No image file provided'}, status=400)
 
-            # Get the uploaded file
-            if 'image' not in request.FILES:
-                return JsonResponse({'success': False, 'message': 'No image file provided'}, status=400)
+        image_file = request.FILES['image']
 
-            image_file = request.FILES['image']
+        # Validate file type
+        allowed_types = ['image/jpeg', 'image/jpg', 'image/png']
+        if image_file.content_type not in allowed_types:
+            return None, None, JsonResponse({'success': False, 'message': 'Invalid file type. Only JPEG, and PNG are allowed'}, status=400)
 
-            # Validate file type
-            allowed_types = ['image/jpeg', 'image/jpg', 'image/png']
-            if image_file.content_type not in allowed_types:
-                return JsonResponse({'success': False, 'message': 'Invalid file type. Only JPEG, and PNG are allowed'}, status=400)
+        # Validate file size (5MB limit)
+        max_size = 5 * 1024 * 1024  # 5MB
+        if image_file.size > max_size:
+            return None, None, JsonResponse({'success': False, 'message': 'File too large. Maximum size is 5MB'}, status=400)
 
-            # Validate file size (5MB limit)
-            max_size = 5 * 1024 * 1024  # 5MB
-            if image_file.size > max_size:
-                return JsonResponse({'success': False, 'message': 'File too large. Maximum size is 5MB'}, status=400)
+        return product_id, image_file, None
+
+    @staticmethod
+    def upload_image(request):
+        """Handle product image upload"""
+        try:
+            product_id, image_file, error = ProductService._validate_image_upload(request)
+            if error:
+                return error
 
             # Upload to Supabase
             upload_result = supabase_storage.upload_product_image(image_file, product_id)
@@ -464,6 +524,57 @@ class ProductService:
                 'message': f'Upload error: {str(e)}'
             }, status=500)
 
+    @staticmethod
+    async def aupload_image(request):
+        """Async upload_image; the storage upload does not hold the DB thread"""
+        try:
+            product_id, image_file, error = ProductService._validate_image_upload(request)
+            if error:
+                return error
+
+            # Upload to Supabase
+            upload_result = await supabase_storage.aupload_product_image(image_file, product_id)
+
+            if not upload_result['success']:
+                return JsonResponse({'success': False, 'message': f'Upload failed: {upload_result["error"]}'}, status=500)
+
+            # Update product with image URL
+            try:
+                product = await Product.objects.aget(id=product_id)
+            except Product.DoesNotExist:
+                return JsonResponse({'success': False, 'message': 'Product not found'}, status=404)
+
+            product.image_url = upload_result['filename']
+            product.signed_url = upload_result['url']
+            product.last_update_signed_url = timezone.now()
+            await product.asave()
+
+            return JsonResponse({
+                'success': True,
+                'message': 'Image uploaded successfully',
+                'data': {
+                    'image_url': upload_result['url']
+                }
+            })
+
+        except Exception as e:
+            print(f"Error uploading image: {e}")
+            return JsonResponse({'success': False, 'message': f'Upload failed: {str(e)}'}, status=500)
+
+    @staticmethod
+    async def aprocess_get(request, json_request):
+        """Async process_get: storage-bound actions are native, the rest run in a thread"""
+        if json_request.get('action') == 'list':
+            return await ProductService.alist_products(request)
+        return await sync_to_async(ProductService.process_get)(request, json_request)
+
+    @staticmethod
+    async def aprocess_post(request, json_request):
+        """Async process_post: storage-bound actions are native, the rest run in a thread"""
+        if json_request.get('action') == 'list':
+            return await ProductService.alist_products(request)
+        return await sync_to_async(ProductService.process_post)(request, json_request)
+
 
 class TransactionService:
 
@@ -513,63 +624,24 @@ class TransactionService:
     def change_status_transaction(request, json_request):
         try:
             transaction_id = json_request.get('transactionId')
-            transaction = Transaction.objects.get(id=transaction_id)
-            if transaction.tmp_status.name == 'paid':
-                transaction.tmp_status = PaymentStatus.objects.get(name='unpaid')
-            else:
-                transaction.tmp_status = PaymentStatus.objects.get(name='paid')
-            
-            today = timezone.now().date()
-            transaction.paid_date = today       
-            transaction.save()
-            
-            try:
-                receivable = AccountingReceivablePayment.objects.get(
-                    receivable_from='tr',
-                    reference_id=transaction.id
-                )
-                if transaction.tmp_status.name == 'paid':
-                    receivable.status = AccountingPaymentStatus.objects.get(name='paid')
-                else:
-                    receivable.status = AccountingPaymentStatus.objects.get(name='unpaid')
-                receivable.save()
-            except AccountingReceivablePayment.DoesNotExist:
-                try:
-                    # if receivable record not found, we create one
-                    new_receivable = AccountingReceivablePayment.objects.create(
-                        receivable_from='tr',
-                        reference_id=transaction.id,
-                        amount=transaction.total_price,
-                        due_date=transaction.due_date,
-                        status=AccountingPaymentStatus.objects.get(name=transaction.tmp_status.name),
-                        term=AccountingPaymentTerm.objects.get(name=transaction.payment_term.name)
-                    )
-                    if not new_receivable:
-                        if transaction.tmp_status.name == 'paid':
-                            transaction.tmp_status = PaymentStatus.objects.get(name='unpaid')
-                        else:
-                            transaction.tmp_status = PaymentStatus.objects.get(name='paid')
-                        transaction.paid_date = None
-                        transaction.save()
-                        print('Failed to create new receivable record, revoke transaction status change')
-                        return JsonResponse({'success': False, 'message': 'Associated receivable record not found and creating failed'}, status=500)
-                    else:
-                        print(f'Created new receivable record {new_receivable.id} for transaction {transaction.id}')
-                        return JsonResponse({'success': True, 'message': 'Transaction status changed and new receivable'}, status=200)
-                except Exception as e:
-                    if transaction.tmp_status.name == 'paid':
-                        transaction.tmp_status = PaymentStatus.objects.get(name='unpaid')
-                    else:
-                        transaction.tmp_status = PaymentStatus.objects.get(name='paid')
-                    transaction.paid_date = None
-                    transaction.save()
-                    print(f'Error creating receivable record: {e}, revoke transaction status change')
-                    return JsonResponse({'success': False, 'message': 'Associated receivable record not found and creating failed'}, status=500)                                    
+            with db_transaction.atomic():
+                transaction = Transaction.objects.select_for_update().select_related('tmp_status').get(id=transaction_id)
+                paid = transaction.tmp_status.name != 'paid'
+                transaction.tmp_status = payment_status_registry.get(name='paid' if paid else 'unpaid')
+
+                today = timezone.now().date()
+                transaction.paid_date = today
+                transaction.save()
+
+                # Receivable status and ledger posting are applied by the outbox worker
+                OutboxService.enqueue('transaction_status_changed', {'transaction_id': transaction.id, 'paid': paid})
 
             return JsonResponse({
                 'success': True,
                 'message': 'Transaction status changed successfully'
             })
+        except Transaction.DoesNotExist:
+            return JsonResponse({'success': False, 'message': 'Transaction not found'}, status=404)
         except Exception as e:
             return JsonResponse({'success': False, 'message': str(e)}, status=500)
 
@@ -600,6 +672,7 @@ class TransactionService:
         return total_income
     
     @staticmethod
+    @use_replica()
     def income_today(request):
         """Return income today as JSON response"""
         total_income = TransactionService._get_income_today(request)
@@ -613,7 +686,7 @@ class TransactionService:
     @staticmethod
     def get_payment_terms(request):
         """Return payment terms as JSON response"""
-        payment_terms = [{'name': term.name, 'display_name': term.display_name} for term in PaymentTerm.objects.all()]
+        payment_terms = [{'name': term.name, 'display_name': term.display_name} for term in payment_term_registry.all()]
         return JsonResponse({
             'success': True,
             'data': {'payment_terms': payment_terms}
@@ -886,130 +959,114 @@ class TransactionService:
         
         if not all_items:
             return JsonResponse({'success': False, 'message': 'Transaction items are required'}, status=400)
+
+        if schedule_time > datetime.now():
+            return JsonResponse({'success': False, 'message': 'Waktu transaksi melebihi batas hari ini'}, status=400)
+
+        if not AccountingReceivablePayment:
+            # Sales must be booked in accounting, reject when the module is not available
+            print("AccountingReceivablePayment service not available, transaction rejected.")
+            return JsonResponse({'success': False, 'message': "AccountingReceivablePayment service not available, transaction rejected!"}, status=500)
         
         try:
-            total_price = 0
-            
-            # Setup payment term and status
-            if payment_term in ['CASH', 'cash']:
-                tmp_status = PaymentStatus.objects.get(name='paid')
-                payment_term = PaymentTerm.objects.get(name='cash')
-            else:
-                tmp_status = PaymentStatus.objects.get(name='unpaid')
-                payment_term = PaymentTerm.objects.get(name=payment_term)
+            # Sale, stock and outbox event are committed together or not at all
+            with db_transaction.atomic():
+                total_price = 0
                 
-            transaction = Transaction(
-                customer_name=name,
-                tmp_status=tmp_status,
-                payment_term=payment_term
-            )
-            
-            # Setup due date if payment term is credit
-            if payment_term.name.startswith('credit'):
-                days = payment_term.name.split('-')[-2]  # Extract number of days from name
-                if days == 'three':
-                    days = 3
-                elif days == 'seven':
-                    days = 7
-                elif days == 'fourteen':
-                    days = 14
+                # Setup payment term and status
+                if payment_term in ['CASH', 'cash']:
+                    tmp_status = payment_status_registry.get(name='paid')
+                    payment_term = payment_term_registry.get(name='cash')
                 else:
-                    days = 30
+                    tmp_status = payment_status_registry.get(name='unpaid')
+                    payment_term = payment_term_registry.get(name=payment_term)
                     
-                due_date = timezone.now() + timezone.timedelta(days=days)
-                transaction.due_date = due_date
-                
-            elif payment_term.name == 'cash':
-                # set due date to transaction date for cash payments
-                transaction.due_date = timezone.now()
+                transaction = Transaction(
+                    customer_name=name,
+                    tmp_status=tmp_status,
+                    payment_term=payment_term
+                )
                 
-            transaction.full_clean()  # Validate
-            transaction.save()
+                # Setup due date if payment term is credit
+                if payment_term.name.startswith('credit'):
+                    days = payment_term.name.split('-')[-2]  # Extract number of days from name
+                    if days == 'three':
+                        days = 3
+                    elif days == 'seven':
+                        days = 7
+                    elif days == 'fourteen':
+                        days = 14
+                    else:
+                        days = 30
+                        
+                    due_date = timezone.now() + timezone.timedelta(days=days)
+                    transaction.due_date = due_date
+                    
+                elif payment_term.name == 'cash':
+                    # set due date to transaction date for cash payments
+                    transaction.due_date = timezone.now()
+                    
+                transaction.full_clean()  # Validate
+                transaction.save()
 
-            failed_items = []
+                failed_items = []
 
-            for item in all_items:
-                product_id = item.get('product_id')
-                quantity = item.get('qty', 0)
+                for item in all_items:
+                    product_id = item.get('product_id')
+                    quantity = item.get('qty', 0)
 
-                try:
-                    product = Product.objects.get(id=product_id)
-                    if product.qty < int(quantity) or int(quantity) <= 0:
+                    try:
+                        product = Product.objects.select_for_update().get(id=product_id)
+                        if product.qty < int(quantity) or int(quantity) <= 0:
+                            failed_items.append({
+                                'product_id': product_id,
+                                'available_qty': product.qty,
+                                'requested_qty': quantity
+                            })
+                            print(f'Insufficient stock for product {product.name}: available {product.qty}, requested {quantity}')
+                        else:
+                            transaction_item = TransactionItem()
+                            transaction_item.transaction = transaction
+                            transaction_item.product_name = product.name
+                            transaction_item.quantity = int(quantity)
+                            transaction_item.price_per_item = product.price
+                            transaction_item.full_clean()  # Validate
+                            transaction_item.save()
+                            
+                            # Update product quantity
+                            product.qty -= int(quantity)
+                            product.full_clean()
+                            product.save()
+                            
+                            # Calculate total price
+                            total_price += int(product.price) * int(quantity)
+                        
+                    except Product.DoesNotExist:
                         failed_items.append({
                             'product_id': product_id,
-                            'available_qty': product.qty,
+                            'available_qty': 0,
                             'requested_qty': quantity
                         })
-                        print(f'Insufficient stock for product {product.name}: available {product.qty}, requested {quantity}')
-                    else:
-                        transaction_item = TransactionItem()
-                        transaction_item.transaction = transaction
-                        transaction_item.product_name = product.name
-                        transaction_item.quantity = int(quantity)
-                        transaction_item.price_per_item = product.price
-                        transaction_item.full_clean()  # Validate
-                        transaction_item.save()
-                        
-                        # Update product quantity
-                        product.qty -= int(quantity)
-                        product.full_clean()
-                        product.save()
-                        
-                        # Calculate total price
-                        total_price += int(product.price) * int(quantity)
-                    
-                except Product.DoesNotExist:
-                    failed_items.append({
-                        'product_id': product_id,
-                        'available_qty': 0,
-                        'requested_qty': quantity
-                    })
-                    print(f'Product with ID {product_id} does not exist')
-            
-            if total_price == 0:
-                transaction.delete()  # Clean up the transaction if no items were added
-                return JsonResponse({'success': False, 'message': 'No valid items to create transaction'}, status=400)
-            else:
+                        print(f'Product with ID {product_id} does not exist')
+                
+                if total_price == 0:
+                    # Roll back the transaction if no items were added
+                    db_transaction.set_rollback(True)
+                    return JsonResponse({'success': False, 'message': 'No valid items to create transaction'}, status=400)
+
                 # Update total price of the transaction
                 transaction.total_price = total_price
                 # Save date transaction
                 if transaction_date is not None:
                     transaction.transaction_date = schedule_time
-                    if schedule_time > datetime.now():
-                        return JsonResponse({'success': False, 'message': 'Waktu transaksi melebihi batas hari ini'}, status=400)
-
                 transaction.save()
 
-                # Create receivable record for credit transactions (not cash)
-                if AccountingReceivablePayment:
-                    try:
-                        # Get or create accounting payment status and term
-                        receivable_status = AccountingPaymentStatus.objects.get(name=tmp_status.name)
-
-                        receivable_term = AccountingPaymentTerm.objects.get(name=payment_term.name)
-
-                        # Create receivable record
-                        receivable = AccountingReceivablePayment.objects.create(
-                            receivable_from='tr',  # 'tr' for Transaction
-                            reference_id=transaction.id,
-                            amount=total_price,
-                            due_date=transaction.due_date,
-                            status=receivable_status,
-                            term=receivable_term
-                        )
-                        print(f"Created receivable record {receivable.id} for transaction {transaction.id}")
-
-                    except Exception as e:
-                        print(f"Warning: Failed to create receivable record: {e}")
-                        # Don't fail the transaction if receivable creation fails
-                        
-                else:
-                    # If AccountingReceivablePayment model does not exist, rollback transaction
-                    for item in TransactionItem.objects.filter(transaction=transaction):
-                        item.delete()
-                    transaction.delete()
-                    print("AccountingReceivablePayment service not available, rolling back transaction creation.")
-                    return JsonResponse({'success': False, 'message': "AccountingReceivablePayment service not available, transaction rejected!"}, status=500)
+                # Receivable and ledger posting are applied by the outbox worker
+                OutboxService.enqueue(
+                    'transaction_created',
+                    {'transaction_id': transaction.id},
+                    dedup_key=f'transaction_created:{transaction.id}'
+                )
             
             if failed_items:
                 print(f'Failed items due to insufficient stock: {failed_items}')
@@ -1020,7 +1077,7 @@ class TransactionService:
                         'transaction': {
                             'id': transaction.id,
                             'customer_name': transaction.customer_name,
-                            'status': transaction.status,
+                            'status': transaction.tmp_status.name,
                             'total_price': str(format_rupiah(transaction.total_price)),
                             'transaction_date': transaction.transaction_date.isoformat() if transaction.transaction_date else None,
                         },
@@ -1034,7 +1091,7 @@ class TransactionService:
                 'data': {'transaction': {
                     'id': transaction.id,
                     'customer_name': transaction.customer_name,
-                    'status': transaction.status,
+                    'status': transaction.tmp_status.name,
                     'total_price': str(format_rupiah(transaction.total_price)),
                     'transaction_date': transaction.transaction_date.isoformat() if transaction.transaction_date else None,
                 }}
@@ -1172,6 +1229,7 @@ class TransactionService:
             return JsonResponse({'success': False, 'message': 'Transaction not found'}, status=404)
 
     @staticmethod
+    @use_replica()
     def get_transaction_chart(request):
         """Return transaction volume data for the last 7 days"""
         from django.utils import timezone
@@ -1198,6 +1256,7 @@ class TransactionService:
         })
 
     @staticmethod
+    @use_replica()
     def get_daily_totals(request):
         """Return daily transaction totals for the last 7 days"""
         from django.utils import timezone
@@ -1261,4 +1320,83 @@ class TransactionService:
 
         except Transaction.DoesNotExist:
             return JsonResponse({'success': False, 'message': 'Transaction not found'}, status=404)
-        
\ No newline at end of file
+
+
+class OutboxService:
+    """
+    Transactional outbox for side effects in other modules.
+
+    Events are written in the same DB transaction as the change that causes them
+    and applied later, in batches, by the `drain_outbox` worker command.
+    """
+
+    MAX_ATTEMPTS = 10
+
+    @staticmethod
+    def enqueue(event_type, payload, dedup_key=None):
+        """Record an event; call inside the DB transaction of the change itself"""
+        if dedup_key:
+            event, _ = OutboxEvent.objects.get_or_create(
+                dedup_key=dedup_key,
+                defaults={'event_type': event_type, 'payload': payload}
+            )
+            return event
+        return OutboxEvent.objects.create(event_type=event_type, payload=payload)
+
+    @staticmethod
+    def _handlers():
+        """Event type -> handler(**payload)"""
+        if TransactionSyncService is None:
+            return {}
+        return {
+            'transaction_created': TransactionSyncService.transaction_created,
+            'transaction_status_changed': TransactionSyncService.transaction_status_changed,
+        }
+
+    @staticmethod
+    def drain(batch_size=100):
+        """
+        Apply one batch of pending events.
+
+        Each event runs in its own savepoint and is marked done in the same DB
+        transaction as its side effects, so a retried batch never applies an
+        event twice. Failures are retried with exponential backoff.
+        """
+        handlers = OutboxService._handlers()
+        if not handlers:
+            return {'done': 0, 'retry': 0, 'failed': 0}
+
+        now = timezone.now()
+        done = []
+        retry = []
+        with db_transaction.atomic():
+            events = list(OutboxEvent.objects.select_for_update(skip_locked=True).filter(
+                status='pending',
+                available_at__lte=now,
+                event_type__in=list(handlers.keys())
+            ).order_by('id')[:batch_size])
+
+            for event in events:
+                try:
+                    with db_transaction.atomic():
+                        handlers[event.event_type](**event.payload)
+                    event.status = 'done'
+                    event.processed_at = timezone.now()
+                    done.append(event)
+                except Exception as e:
+                    event.attempts += 1
+                    event.last_error = str(e)[:1000]
+                    event.available_at = now + timezone.timedelta(seconds=min(2 ** event.attempts, 300))
+                    if event.attempts >= OutboxService.MAX_ATTEMPTS:
+                        event.status = 'failed'
+                    retry.append(event)
+                    print(f'Outbox event {event.id} ({event.event_type}) failed: {e}')
+
+            OutboxEvent.objects.bulk_update(done, ['status', 'processed_at'])
+            OutboxEvent.objects.bulk_update(retry, ['status', 'attempts', 'last_error', 'available_at'])
+
+        return {
+            'done': len(done),
+            'retry': len([e for e in retry if e.status == 'pending']),
+            'failed': len([e for e in retry if e.status == 'failed']),
+        }
@@ -0,0 +1,153 @@
+from datetime import date
+from decimal import Decimal
+from unittest import skipIf
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import PaymentStatus, PaymentTerm, Transaction, OutboxEvent
+from .registry import payment_status_registry, payment_term_registry
+from .services import OutboxService, TransactionSyncService
+
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@skipIf(TransactionSyncService is None, 'accounting module is not available')
+@override_settings(CACHES=LOCMEM_CACHE)
+class OutboxDrainTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        from modules.accounting.models import AccountingPaymentStatus, AccountingPaymentTerm
+
+        for model in (PaymentStatus, AccountingPaymentStatus):
+            for name in ('paid', 'unpaid'):
+                model.objects.create(name=name, display_name=name.title())
+        for model in (PaymentTerm, AccountingPaymentTerm):
+            model.objects.create(name='cash', display_name='Cash')
+        cls.paid = PaymentStatus.objects.get(name='paid')
+        cls.unpaid = PaymentStatus.objects.get(name='unpaid')
+        cls.term = PaymentTerm.objects.get(name='cash')
+
+    def setUp(self):
+        from modules.accounting.registry import payment_status_registry as accounting_status_registry
+        from modules.accounting.registry import payment_term_registry as accounting_term_registry
+        from modules.accounting.registry import ledger_account_registry
+
+        # Registry version stamps only move on commit, which never happens inside a TestCase
+        cache.clear()
+        for registry in (payment_status_registry, payment_term_registry, accounting_status_registry,
+                         accounting_term_registry, ledger_account_registry):
+            registry.reload()
+
+    def create_transaction(self, status=None, total_price='25000'):
+        return Transaction.objects.create(
+            customer_name='Budi',
+            total_price=Decimal(total_price),
+            tmp_status=status or self.unpaid,
+            payment_term=self.term,
+            due_date=date.today(),
+            transaction_date=timezone.now(),
+        )
+
+    def receivable_for(self, transaction):
+        from modules.accounting.models import AccountingReceivablePayment
+        return AccountingReceivablePayment.objects.for_transaction(transaction.id).get()
+
+    def test_drain_applies_pending_events(self):
+        transaction = self.create_transaction()
+        event = OutboxService.enqueue('transaction_created', {'transaction_id': transaction.id},
+                                      dedup_key=f'transaction_created:{transaction.id}')
+
+        self.assertEqual(OutboxService.drain(), {'done': 1, 'retry': 0, 'failed': 0})
+
+        event.refresh_from_db()
+        self.assertEqual(event.status, 'done')
+        self.assertIsNotNone(event.processed_at)
+        self.assertEqual(self.receivable_for(transaction).amount, Decimal('25000'))
+
+        # Done events are not applied again
+        self.assertEqual(OutboxService.drain(), {'done': 0, 'retry': 0, 'failed': 0})
+
+    def test_enqueue_with_dedup_key_records_one_event(self):
+        transaction = self.create_transaction()
+        for _ in range(2):
+            OutboxService.enqueue('transaction_created', {'transaction_id': transaction.id},
+                                  dedup_key=f'transaction_created:{transaction.id}')
+
+        self.assertEqual(OutboxEvent.objects.count(), 1)
+
+    def test_handlers_are_idempotent(self):
+        from modules.accounting.models import AccountingReceivablePayment, JournalEntry
+
+        transaction = self.create_transaction()
+        OutboxService.enqueue('transaction_created', {'transaction_id': transaction.id})
+        OutboxService.enqueue('transaction_created', {'transaction_id': transaction.id})
+
+        self.assertEqual(OutboxService.drain(), {'done': 2, 'retry': 0, 'failed': 0})
+        self.assertEqual(AccountingReceivablePayment.objects.for_transaction(transaction.id).count(), 1)
+        self.assertEqual(JournalEntry.objects.filter(source='sale', reference=f'TR-{transaction.id}').count(), 1)
+
+    def test_status_change_applies_current_status(self):
+        transaction = self.create_transaction()
+        OutboxService.enqueue('transaction_created', {'transaction_id': transaction.id})
+        OutboxService.drain()
+
+        # Toggled to paid, then the event of an earlier toggle to unpaid arrives last
+        transaction.tmp_status = self.paid
+        transaction.save()
+        OutboxService.enqueue('transaction_status_changed', {'transaction_id': transaction.id, 'paid': True})
+        stale = OutboxService.enqueue('transaction_status_changed', {'transaction_id': transaction.id, 'paid': False})
+
+        self.assertEqual(OutboxService.drain(), {'done': 2, 'retry': 0, 'failed': 0})
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, 'done')
+        self.assertEqual(self.receivable_for(transaction).status.name, 'paid')
+
+    def test_failed_event_is_retried_with_backoff(self):
+        event = OutboxService.enqueue('transaction_created', {'transaction_id': 0})
+        before = timezone.now()
+
+        self.assertEqual(OutboxService.drain(), {'done': 0, 'retry': 1, 'failed': 0})
+
+        event.refresh_from_db()
+        self.assertEqual(event.status, 'pending')
+        self.assertEqual(event.attempts, 1)
+        self.assertTrue(event.last_error)
+        self.assertGreaterEqual(event.available_at, before + timezone.timedelta(seconds=2))
+
+        # Not picked up again before its backoff expires
+        self.assertEqual(OutboxService.drain(), {'done': 0, 'retry': 0, 'failed': 0})
+
+    def test_failure_does_not_block_other_events(self):
+        transaction = self.create_transaction()
+        broken = OutboxService.enqueue('transaction_created', {'transaction_id': 0})
+        OutboxService.enqueue('transaction_created', {'transaction_id': transaction.id})
+
+        self.assertEqual(OutboxService.drain(), {'done': 1, 'retry': 1, 'failed': 0})
+        self.assertEqual(self.receivable_for(transaction).reference_id, str(transaction.id))
+        broken.refresh_from_db()
+        self.assertEqual(broken.status, 'pending')
+
+    def test_event_fails_after_max_attempts(self):
+        event = OutboxService.enqueue('transaction_created', {'transaction_id': 0})
+        OutboxEvent.objects.filter(id=event.id).update(attempts=OutboxService.MAX_ATTEMPTS - 1)
+
+        self.assertEqual(OutboxService.drain(), {'done': 0, 'retry': 0, 'failed': 1})
+
+        event.refresh_from_db()
+        self.assertEqual(event.status, 'failed')
+        self.assertEqual(event.attempts, OutboxService.MAX_ATTEMPTS)
+
+        # Failed events stay failed even once their backoff has passed
+        OutboxEvent.objects.filter(id=event.id).update(available_at=timezone.now())
+        self.assertEqual(OutboxService.drain(), {'done': 0, 'retry': 0, 'failed': 0})
+
+    def test_unknown_event_types_are_left_pending(self):
+        event = OutboxService.enqueue('unknown_event', {})
+
+        self.assertEqual(OutboxService.drain(), {'done': 0, 'retry': 0, 'failed': 0})
+        event.refresh_from_db()
+        self.assertEqual(event.status, 'pending')
@@ -1,21 +1,25 @@
 import json
+from asgiref.sync import sync_to_async
 from django.shortcuts import render
 from django.views import View
 from django.http import JsonResponse
 from django.contrib.auth.mixins import PermissionRequiredMixin
-from django.core.exceptions import PermissionDenied
+from engine.access import GroupRequiredMixin
 from .services import ProductService, CategoryService, TransactionService
 from engine.utils import format_rupiah
 
 
 class APIView(View):
     """
-    Unified API view for handling all product and category operations
+    Unified API view for handling all product and category operations.
+
+    Async so an ASGI worker can overlap storage and DB waits across requests;
+    transactional service actions run in a thread via sync_to_async.
     """
     group_required = 'group_access_product'
     context = ''
     
-    def get(self, request):
+    async def get(self, request):
         """
         Handle GET requests - return data based on context
         """
@@ -25,10 +29,10 @@ class APIView(View):
 
             if self.context == 'category_api':
                 # Category Service handling request
-                return CategoryService.process_get(request, json_request)
+                return await sync_to_async(CategoryService.process_get)(request, json_request)
             elif self.context == 'product_api':
                 # Product Service handling request
-                return ProductService.process_get(request, json_request)
+                return await ProductService.aprocess_get(request, json_request)
             else:
                 # Return 400 Bad request
                 return JsonResponse({'success': False, 'message': 'Invalid API context'}, status=400)
@@ -36,7 +40,7 @@ class APIView(View):
         except Exception as e:
             return JsonResponse({'success': False, 'message': str(e)}, status=500)
 
-    def post(self, request):
+    async def post(self, request):
         """
         Handle POST requests - process JSON actions or file uploads
         """
@@ -46,7 +50,7 @@ class APIView(View):
                 # Handle file upload requests
                 action = request.POST.get('action')
                 if action == 'upload_image' and self.context == 'product_api':
-                    return ProductService.upload_image(request)
+                    return await ProductService.aupload_image(request)
                 else:
                     return JsonResponse({'success': False, 'message': 'Invalid file upload action'}, status=400)
             else:
@@ -55,13 +59,13 @@ class APIView(View):
 
                 if self.context == 'category_api':
                     # Category Service handling request
-                    return CategoryService.process_post(request, json_request)
+                    return await sync_to_async(CategoryService.process_post)(request, json_request)
                 elif self.context == 'product_api':
                     # Product Service handling request
-                    return ProductService.process_post(request, json_request)
+                    return await ProductService.aprocess_post(request, json_request)
                 elif self.context == 'product_transaction_api':
                     # Transaction Service handling request
-                    return TransactionService.process_post(request, json_request)
+                    return await sync_to_async(TransactionService.process_post)(request, json_request)
                 else:
                     # Return 400 Bad request
                     return JsonResponse({'success': False, 'message': 'Invalid API context'}, status=400)
@@ -74,18 +78,13 @@ class APIView(View):
             return JsonResponse({'success': False, 'message': str(e)}, status=500)
 
 
-class ProductPageView(PermissionRequiredMixin, View):
+class ProductPageView(GroupRequiredMixin, PermissionRequiredMixin, View):
     """
     View for rendering product management pages
     """
     group_required = 'group_access_product'
     permission_required = 'product.view_product'
 
-    def dispatch(self, request, *args, **kwargs):
-        if not request.user.groups.filter(name__icontains=self.group_required).exists():
-            raise PermissionDenied
-        return super().dispatch(request, *args, **kwargs)
-
     def get(self, request):
         """Render the main product management page"""
         # Get total amount of products
@@ -94,35 +93,25 @@ class ProductPageView(PermissionRequiredMixin, View):
         return render(request, 'index.html', context={'total_amount': total_amount, 'income_today': income_today})
 
 
-class ProductCreatePageView(PermissionRequiredMixin, View):
+class ProductCreatePageView(GroupRequiredMixin, PermissionRequiredMixin, View):
     """
     View for creating new products
     """
     group_required = 'group_access_product'
     permission_required = 'product.add_product'
 
-    def dispatch(self, request, *args, **kwargs):
-        if not request.user.groups.filter(name__icontains=self.group_required).exists():
-            raise PermissionDenied
-        return super().dispatch(request, *args, **kwargs)
-
     def get(self, request):
         """Render the create product page"""
         return render(request, 'product_create.html')
     
     
-class ProductTransactionPageView(PermissionRequiredMixin, View):
+class ProductTransactionPageView(GroupRequiredMixin, PermissionRequiredMixin, View):
     """
     View for transaction management page
     """
     group_required = 'group_access_product'
     permission_required = 'product.view_product'
 
-    def dispatch(self, request, *args, **kwargs):
-        if not request.user.groups.filter(name__icontains=self.group_required).exists():
-            raise PermissionDenied
-        return super().dispatch(request, *args, **kwargs)
-
     def get(self, request):
         """Render the transaction management page"""
         # Calculate total transaction today for display
@@ -138,17 +127,12 @@ class ProductTransactionPageView(PermissionRequiredMixin, View):
         return render(request, 'product_transaction.html', {'volume_transaction': volume_transaction, 'cash_on_hand': cash_on_hand, 'pending_payment': pending_payment})
     
 
-class ProductTransactionFilterPageView(PermissionRequiredMixin, View):
+class ProductTransactionFilterPageView(GroupRequiredMixin, PermissionRequiredMixin, View):
     """
     View for filter transaction
     """
     group_required = 'group_access_product'
     permission_required = 'product.view_product'
 
-    def dispatch(self, request, *args, **kwargs):
-        if not request.user.groups.filter(name__icontains=self.group_required).exists():
-            raise PermissionDenied
-        return super().dispatch(request, *args, **kwargs)
-
     def get(self, request):
         return render(request, 'product_transaction_filter.html')
\ No newline at end of file
@@ -1,5 +1,11 @@
 import importlib
+import os
+import subprocess
 import sys
+import threading
+import time
+import traceback
+from datetime import timedelta
 from pathlib import Path
 from django.urls.resolvers import get_resolver
 from django.core.management import call_command
@@ -8,10 +14,82 @@ from django.apps import apps
 from django.conf import settings
 from django.template import engines
 from django.core.cache import cache
-from engine.models import Module
-from mOdoo.urls import get_dynamic_urlpatterns
+from django.db import connection, transaction as db_transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from engine.models import Module, ModuleJob
+from engine.registry import module_registry
+
+JOB_LOG_MAX_CHARS = 100000
+JOB_HEARTBEAT_INTERVAL = 10.0
+
+
+class JobLogWriter:
+    """
+    File-like stdout/stderr for call_command that streams into ModuleJob.log,
+    flushed at most once per interval so progress is visible while it runs.
+    """
+
+    def __init__(self, job, flush_interval=1.0):
+        self.job = job
+        self.flush_interval = flush_interval
+        self._parts = []
+        self._flushed_at = 0.0
+
+    def write(self, text):
+        self._parts.append(text)
+        if time.monotonic() - self._flushed_at >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if self._parts:
+            # Keep the tail, the end of a migration log is what matters
+            self.job.log = (self.job.log + ''.join(self._parts))[-JOB_LOG_MAX_CHARS:]
+            self._parts = []
+            ModuleJob.objects.filter(id=self.job.id).update(log=self.job.log)
+        self._flushed_at = time.monotonic()
+
+    def isatty(self):
+        return False
+
+
+class JobHeartbeat:
+    """
+    Stamps ModuleJob.heartbeat_at from a background thread while a job runs,
+    so a runner that crashed or was killed can be told from a slow migration.
+    """
+
+    def __init__(self, job_id, interval=JOB_HEARTBEAT_INTERVAL):
+        self.job_id = job_id
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'module-job-{job_id}-heartbeat', daemon=True)
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.interval):
+                try:
+                    ModuleJob.objects.filter(id=self.job_id, status='running').update(heartbeat_at=timezone.now())
+                except Exception as e:
+                    print(f'Heartbeat for module job #{self.job_id} failed: {e}')
+        finally:
+            # The thread has its own connection
+            connection.close()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
 
 class ModuleUpdater:
+    # Spawned job runners, reaped on the next spawn
+    _children = []
+    _lock = threading.Lock()
 
     @staticmethod
     def reload_file(module_name):
@@ -52,6 +130,9 @@ class ModuleUpdater:
             if 'mOdoo.urls' in sys.modules:
                 importlib.reload(sys.modules['mOdoo.urls'])
 
+            # Imported here, mOdoo.urls -> engine.views -> this module is circular
+            from mOdoo.urls import get_dynamic_urlpatterns
+
             # Force URL resolver to reload
             resolver = get_resolver()
             resolver.url_patterns = get_dynamic_urlpatterns()
@@ -62,7 +143,7 @@ class ModuleUpdater:
             return False
 
     @staticmethod
-    def reload_templates():
+    def reload_templates(clear_cache=True):
         
         try:
             
@@ -71,8 +152,10 @@ class ModuleUpdater:
                     engine.reset()
                     print(f"Engine '{engine.name}' cache cleared.")
             
-            # Clear the general cache (for {% cache %} tags)
-            cache.clear()
+            # Clear the general cache (for {% cache %} tags), once per change -
+            # workers picking up a change from another process skip it
+            if clear_cache:
+                cache.clear()
 
             return True
 
@@ -100,35 +183,9 @@ class ModuleUpdater:
     @staticmethod
     def install_module(module_name, request=None):
         """
-        Install a module with full runtime reloading
+        Queue a module install; migrations run in a background job
         """
-        try:
-            module = Module.objects.get(name=module_name)
-            
-            # Mark as installed
-            module.is_installed = True
-            module.save()
-
-            # Reload everything
-            ModuleUpdater.reload_file(module_name)
-            ModuleUpdater.reload_app_config(module_name)
-            ModuleUpdater.reload_templates()
-            ModuleUpdater.reload_url_patterns()
-            
-            
-            # Run migrations for the app label
-            call_command('makemigrations', module_name)
-            call_command('migrate', module_name)
-
-            print(f'Module {module_name} installed with runtime reload')
-            return True
-
-        except Exception as e:
-            error_msg = f'Failed to install module {module_name}: {str(e)}'
-            if request:
-                messages.error(request, error_msg)
-            print(error_msg)
-            return False
+        return ModuleUpdater.enqueue_job(module_name, 'install', request)
 
     @staticmethod
     def uninstall_module(module_name, request=None):
@@ -137,11 +194,13 @@ class ModuleUpdater:
         """
         try:
             module = Module.objects.get(name=module_name)
-            module.is_installed = False
-            module.save()
+            ModuleUpdater.bump_state(module_name, is_installed=False)
+            module_registry.invalidate()
 
-            # Reload URL patterns to remove module URLs
+            # Reload URL patterns to remove module URLs; other workers follow
+            # through ModuleStateWatcher
             ModuleUpdater.reload_url_patterns()
+            ModuleStateWatcher.mark_seen(module_name)
 
             if request:
                 messages.success(request, f'Module {module_name} uninstalled successfully.')
@@ -156,33 +215,185 @@ class ModuleUpdater:
 
     @staticmethod
     def upgrade_module(module_name, request=None):
+        """
+        Queue a module upgrade; migrations run in a background job
+        """
+        return ModuleUpdater.enqueue_job(module_name, 'upgrade', request)
+
+    @staticmethod
+    def enqueue_job(module_name, action, request=None):
+        """
+        Create a ModuleJob and start a runner process for it after commit.
+        Returns the job (an already active one for the module is reused) or None.
+        """
         try:
-            module = Module.objects.get(name=module_name)
+            with db_transaction.atomic():
+                # Row lock so two clicks cannot queue two jobs for one module
+                module = Module.objects.select_for_update().get(name=module_name)
 
-            if not module.is_installed:
-                if request:
-                    messages.warning(request, f'Module {module_name} is not installed.')
-                return False
+                if action == 'upgrade' and not module.is_installed:
+                    if request:
+                        messages.warning(request, f'Module {module_name} is not installed.')
+                    return None
 
-            # Reload all module files and configs
-            ModuleUpdater.reload_file(module_name)
-            ModuleUpdater.reload_app_config(module_name)
-            ModuleUpdater.reload_templates()
-            ModuleUpdater.reload_url_patterns()
+                ModuleUpdater.fail_stale_jobs(module_name)
+                active = ModuleJob.objects.filter(module_name=module_name, status__in=ModuleJob.ACTIVE_STATUSES).first()
+                if active:
+                    if request:
+                        messages.info(request, f'Module {module_name} already has a {active.action} in progress.')
+                    return active
 
-            # Run migrations for the app label
-            call_command('makemigrations', module_name)
-            call_command('migrate', module_name)
+                job = ModuleJob.objects.create(
+                    module_name=module_name,
+                    action=action,
+                    requested_by=request.user.username if request and request.user.is_authenticated else '',
+                )
+                if getattr(settings, 'MODULE_JOBS_SPAWN', True):
+                    db_transaction.on_commit(lambda: ModuleUpdater.spawn_job(job.id))
 
-            print(f'Module {module_name} upgraded with runtime reload')
-            return True
+            if request:
+                messages.info(request, f'{action.title()} of module {module_name} started.')
+            print(f'Queued {action} job #{job.id} for module {module_name}')
+            return job
 
         except Exception as e:
-            error_msg = f'Failed to upgrade module {module_name}: {str(e)}'
+            error_msg = f'Failed to {action} module {module_name}: {str(e)}'
             if request:
                 messages.error(request, error_msg)
             print(error_msg)
-            return False
+            return None
+
+    @staticmethod
+    def spawn_job(job_id):
+        """
+        Run `manage.py run_module_job <id>` detached from the request worker.
+        When spawning fails the job stays queued for `run_module_job --pending`.
+        """
+        with ModuleUpdater._lock:
+            # Reap finished runners so they do not linger as zombies
+            ModuleUpdater._children = [p for p in ModuleUpdater._children if p.poll() is None]
+            try:
+                process = subprocess.Popen(
+                    [sys.executable, str(Path(settings.BASE_DIR) / 'manage.py'), 'run_module_job', str(job_id)],
+                    cwd=str(settings.BASE_DIR),
+                    env=os.environ.copy(),
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    start_new_session=True,
+                )
+                ModuleUpdater._children.append(process)
+                return True
+            except OSError as e:
+                print(f'Could not start runner for module job #{job_id}: {e}')
+                return False
+
+    @staticmethod
+    def run_job(job_id):
+        """
+        Run a queued job's migrations in the current process (the job runner).
+        Returns the finished job, or None when it was already claimed.
+        """
+        now = timezone.now()
+        claimed = ModuleJob.objects.filter(id=job_id, status='queued').update(
+            status='running', step='starting', started_at=now, heartbeat_at=now
+        )
+        if not claimed:
+            return None
+
+        job = ModuleJob.objects.get(id=job_id)
+        log = JobLogWriter(job)
+        try:
+            # Run migrations for the app label
+            with JobHeartbeat(job.id):
+                for step in ('makemigrations', 'migrate'):
+                    ModuleJob.objects.filter(id=job.id).update(step=step)
+                    log.write(f'$ manage.py {step} {job.module_name}\n')
+                    call_command(step, job.module_name, stdout=log, stderr=log, no_color=True)
+                    log.flush()
+
+            if job.action == 'install':
+                ModuleUpdater.bump_state(job.module_name, is_installed=True)
+            else:
+                ModuleUpdater.bump_state(job.module_name)
+            module_registry.invalidate()
+
+            job.status, job.step = 'succeeded', 'done'
+            print(f'Module {job.module_name} {job.action} job #{job.id} succeeded')
+
+        except Exception as e:
+            log.write(traceback.format_exc())
+            job.status, job.error = 'failed', str(e)
+            print(f'Module {job.module_name} {job.action} job #{job.id} failed: {e}')
+
+        log.flush()
+        job.finished_at = timezone.now()
+        ModuleJob.objects.filter(id=job.id).update(
+            status=job.status, step=job.step, error=job.error, finished_at=job.finished_at
+        )
+        return job
+
+    @staticmethod
+    def fail_stale_jobs(module_name=None):
+        """
+        Mark jobs whose runner is gone as failed, so they stop blocking the
+        module: running jobs without a heartbeat and queued jobs no runner
+        picked up, both for MODULE_JOB_STALE_AFTER seconds. Returns the count.
+        """
+        now = timezone.now()
+        cutoff = now - timedelta(seconds=getattr(settings, 'MODULE_JOB_STALE_AFTER', 300))
+        jobs = ModuleJob.objects.filter(
+            Q(status='running', heartbeat_at__lt=cutoff) | Q(status='queued', created_at__lt=cutoff)
+        )
+        if module_name:
+            jobs = jobs.filter(module_name=module_name)
+        failed = jobs.update(status='failed', error='Job runner stopped responding', finished_at=now)
+        if failed:
+            print(f'Marked {failed} stale module job(s) as failed')
+        return failed
+
+    @staticmethod
+    def job_status(job_id):
+        """
+        Current state of a job. Workers reload the module on their own once
+        the job bumps its state version, see ModuleStateWatcher.
+        """
+        ModuleUpdater.fail_stale_jobs()
+        job = ModuleJob.objects.filter(id=job_id).first()
+        if job is None:
+            return None
+
+        return {
+            'id': job.id,
+            'module_name': job.module_name,
+            'action': job.action,
+            'status': job.status,
+            'step': job.step,
+            'log': job.log,
+            'error': job.error,
+            'created_at': job.created_at.isoformat() if job.created_at else None,
+            'started_at': job.started_at.isoformat() if job.started_at else None,
+            'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        }
+
+    @staticmethod
+    def active_jobs():
+        ModuleUpdater.fail_stale_jobs()
+        return list(ModuleJob.objects.filter(status__in=ModuleJob.ACTIVE_STATUSES).order_by('id'))
+
+    @staticmethod
+    def reload_module(module_name, clear_cache=True):
+        """Reload a module's files, templates and URLs in this process"""
+        ModuleUpdater.reload_file(module_name)
+        ModuleUpdater.reload_app_config(module_name)
+        ModuleUpdater.reload_templates(clear_cache=clear_cache)
+        ModuleUpdater.reload_url_patterns()
+        print(f'Module {module_name} reloaded at runtime')
+
+    @staticmethod
+    def bump_state(module_name, **fields):
+        """Update the module row and move its state version so every worker reloads it"""
+        Module.objects.filter(name=module_name).update(state_version=F('state_version') + 1, **fields)
 
     @staticmethod
     def reload_all_modules():
@@ -200,4 +411,73 @@ class ModuleUpdater:
 
         except Exception as e:
             print(f'Error reloading all modules: {e}')
-            return False
\ No newline at end of file
+            return False
+
+
+class ModuleStateWatcher:
+    """
+    Keeps each worker's loaded modules in line with the Module table.
+
+    Module.state_version is read at most once per check interval per process
+    (one query on a small table). When a module's version or installed state
+    moved since the last check, this process reloads that module: files and
+    URLs when installed, URLs only when uninstalled.
+    """
+
+    _lock = threading.Lock()
+    _states = None
+    _checked_at = 0.0
+
+    @staticmethod
+    def _read_states():
+        return {
+            name: (is_installed, version)
+            for name, is_installed, version in Module.objects.values_list('name', 'is_installed', 'state_version')
+        }
+
+    @classmethod
+    def check(cls, interval=None):
+        """Reload modules changed by other processes. Returns their names"""
+        if interval is None:
+            interval = getattr(settings, 'MODULE_STATE_CHECK_INTERVAL', 1.0)
+        now = time.monotonic()
+        if now - cls._checked_at < interval:
+            return []
+        # Another thread is already checking or reloading
+        if not cls._lock.acquire(blocking=False):
+            return []
+
+        try:
+            cls._checked_at = now
+            states = cls._read_states()
+            if cls._states is None:
+                # First check in this process, what it loaded at startup is current
+                cls._states = states
+                return []
+
+            changed = [name for name, state in states.items() if cls._states.get(name) != state]
+            for name in changed:
+                print(f'Module {name} changed in another process, reloading')
+                if states[name][0]:
+                    ModuleUpdater.reload_module(name, clear_cache=False)
+                else:
+                    ModuleUpdater.reload_url_patterns()
+            if changed:
+                module_registry.reload()
+            cls._states = states
+            return changed
+        except Exception as e:
+            print(f'Error checking module state: {e}')
+            return []
+        finally:
+            cls._lock.release()
+
+    @classmethod
+    def mark_seen(cls, module_name):
+        """Record a change already applied in this process so it is not reloaded twice"""
+        if cls._states is None:
+            return
+        with cls._lock:
+            row = Module.objects.filter(name=module_name).values_list('is_installed', 'state_version').first()
+            if row is not None:
+                cls._states[module_name] = row